@@ -1,4 +1,5 @@
 from .appointment_admin import Appointment
+from .cohort_capacity_admin import CohortCapacityAdmin
 from .eligibility_confirmation_admin import EligibilityConfirmationAdmin
 from .concomitant_medication_admin import ConcomitantMedicationAdmin
 from .informed_consent_admin import InformedConsentAdmin
@@ -17,6 +18,7 @@ from .physical_exam_admin import PhysicalExamAdmin
 from .pregnancy_test_admin import PregnancyTestAdmin
 from .hospitalisation_admin import HospitalisationAdmin
 from .covid19_symptomatic_infections_admin import Covid19SymptomaticInfectionsAdmin
+from .scheduling_job_admin import SchedulingJobAdmin
 from .subject_requisition_admin import SubjectRequisitionAdmin
 from .vital_signs_admin import VitalSignsAdmin
 from .targeted_physical_examination_admin import TargetedPhysicalExaminationAdmin
@@ -5,7 +5,7 @@ from django.forms import Textarea
 from edc_model_admin import audit_fieldset_tuple
 from edc_model_admin.inlines import StackedInlineMixin
 
-from .modeladmin_mixins import CrfModelAdminMixin
+from .modeladmin_mixins import AdverseEventTermSearchMixin, CrfModelAdminMixin
 from ..forms import AdverseEventForm, SeriousAdverseEventForm
 from ..forms import SpecialInterestAdverseEventForm
 from ..models import AdverseEvent, SeriousAdverseEvent
@@ -83,12 +83,15 @@ class SpecialInterestAdverseEventInlineAdmin(StackedInlineMixin,
 
 
 @admin.register(AdverseEvent, site=esr21_subject_admin)
-class AdverseEventAdmin(CrfModelAdminMixin, admin.ModelAdmin):
+class AdverseEventAdmin(AdverseEventTermSearchMixin, CrfModelAdminMixin,
+                        admin.ModelAdmin):
 
     form = AdverseEventForm
     inlines = [SeriousAdverseEventInlineAdmin,
                SpecialInterestAdverseEventInlineAdmin]
 
+    keyset_pagination = True
+
     formfield_overrides = {
         models.TextField: {'widget': Textarea(
             attrs={'rows': 500,
@@ -148,7 +151,9 @@ class AdverseEventAdmin(CrfModelAdminMixin, admin.ModelAdmin):
 
 
 @admin.register(SeriousAdverseEvent, site=esr21_subject_admin)
-class SeriousAdverseEventAdmin(admin.ModelAdmin):
+class SeriousAdverseEventAdmin(AdverseEventTermSearchMixin, admin.ModelAdmin):
+
+    subject_identifier_lookup = 'adverse_event__subject_identifier'
 
     form = SeriousAdverseEventForm
 
@@ -186,7 +191,10 @@ class SeriousAdverseEventAdmin(admin.ModelAdmin):
 
 
 @admin.register(SpecialInterestAdverseEvent, site=esr21_subject_admin)
-class SpecialInterestAdverseEventAdmin(admin.ModelAdmin):
+class SpecialInterestAdverseEventAdmin(AdverseEventTermSearchMixin,
+                                       admin.ModelAdmin):
+
+    subject_identifier_lookup = 'adverse_event__subject_identifier'
 
     form = SpecialInterestAdverseEventForm
 
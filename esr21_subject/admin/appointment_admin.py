@@ -1,6 +1,4 @@
-from django.apps import apps as django_apps
 from django.contrib import admin
-from django.utils.safestring import mark_safe
 from edc_appointment.admin import AppointmentAdmin as BaseAppointmentAdmin
 from edc_appointment.admin_site import edc_appointment_admin
 from edc_appointment.models import Appointment
@@ -34,16 +32,8 @@ class AppointmentAdmin(BaseAppointmentAdmin, VersionControlMixin):
 
         extra_context['form_version'] = self.get_form_version(request)
 
-        appt_model = django_apps.get_model('edc_appointment.appointment')
-
-        try:
-            app_obj = appt_model.objects.get(id=object_id)
-        except appt_model.DoesNotExist:
-            pass
-        else:
-            extra_context['timepoint'] = mark_safe(
-                        f'Timepoint: <i>{app_obj.visits.get(app_obj.visit_code).title} '
-                        '</i> &emsp; ')
+        extra_context['timepoint'] = self.get_timepoint_label(
+            self.get_appointment_context(request, object_id))
 
         return super().change_view(
             request, object_id, form_url=form_url, extra_context=extra_context)
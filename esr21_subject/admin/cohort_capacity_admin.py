@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from ..admin_site import esr21_subject_admin
+from ..models import CohortCapacity
+
+
+@admin.register(CohortCapacity, site=esr21_subject_admin)
+class CohortCapacityAdmin(admin.ModelAdmin):
+
+    list_display = ('name', 'capacity', 'enrolled', 'remaining')
+
+    readonly_fields = ('name', 'enrolled')
+
+    def remaining(self, obj):
+        return obj.remaining
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
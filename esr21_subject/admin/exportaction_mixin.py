@@ -1,16 +1,36 @@
+import csv
 import datetime
+import tempfile
 import uuid
+from importlib.util import find_spec
 
-from django.apps import apps as django_apps
 from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 import xlwt
 
+from ..bulk_decryption import BulkDecryptor
+from ..consent_lookup import consent_lookup
+from ..exports import ColumnarExporter, ExportPlanner
+from ..exports.utils import format_export_value
+
+
+class Echo:
+    """An object that implements just the write method of the file-like
+    interface, so csv.writer hands each row back instead of buffering it.
+    """
+
+    def write(self, value):
+        return value
+
 
 class ExportActionMixin:
 
+    export_chunk_size = 2000
+
+    export_planner_cls = ExportPlanner
+
     def export_as_csv(self, request, queryset):
 
         response = HttpResponse(content_type='application/ms-excel')
@@ -26,6 +46,9 @@ class ExportActionMixin:
         font_style.font.bold = True
         font_style.num_format_str = 'YYYY/MM/DD h:mm:ss'
 
+        export_planner = self.export_planner_cls(queryset.model)
+        queryset = export_planner.prepare(queryset)
+
         field_names = queryset[0].__dict__
         field_names = [a for a in field_names.keys()]
         field_names.remove('_state')
@@ -35,13 +58,13 @@ class ExportActionMixin:
         for col_num in range(len(field_names)):
             ws.write(row_num, col_num, field_names[col_num], font_style)
 
-        for obj in queryset:
-            obj_data = obj.__dict__
-            obj_data['subject_identifier'] = obj.subject_identifier
-            obj_data['consent_datetime'] = self.get_consent_datetime(obj)
-            if getattr(obj, 'maternal_visit', None):
-                obj_data['visit_code'] = obj.maternal_visit.visit_code
-            data = [obj_data[field] for field in field_names]
+        decryptor = BulkDecryptor.for_request(request)
+        for obj in export_planner.iterator(
+                decryptor.iterator(queryset, chunk_size=self.export_chunk_size),
+                chunk_size=self.export_chunk_size):
+            data = self.get_export_row(
+                obj, field_names, export_planner=export_planner,
+                request=request)
 
             row_num += 1
             for col_num in range(len(data)):
@@ -63,23 +86,94 @@ class ExportActionMixin:
     export_as_csv.short_description = _(
         'Export selected %(verbose_name_plural)s')
 
-    actions = [export_as_csv]
+    def export_as_csv_stream(self, request, queryset):
+        """Streams the selected rows as CSV, one chunk of the queryset
+        at a time, so memory use stays flat regardless of row count.
+        """
+        writer = csv.writer(Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in self.iter_export_rows(
+                queryset, request=request)),
+            content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename=%s.csv' % (
+            self.get_export_filename())
+        return response
+
+    export_as_csv_stream.short_description = _(
+        'Export selected %(verbose_name_plural)s (streaming CSV)')
+
+    def export_as_parquet(self, request, queryset):
+        """Writes the selected rows to a typed Parquet file.
+        """
+        exporter = ColumnarExporter(model_cls=queryset.model)
+        export_file = tempfile.TemporaryFile()
+        exporter.write(export_file, queryset=queryset)
+        export_file.seek(0)
+        return FileResponse(
+            export_file, as_attachment=True,
+            filename=f'{self.get_export_filename()}.{exporter.extension}')
+
+    export_as_parquet.short_description = _(
+        'Export selected %(verbose_name_plural)s (Parquet)')
+
+    # the Parquet export needs the optional pyarrow dependency
+    actions = [export_as_csv, export_as_csv_stream] + (
+        [export_as_parquet] if find_spec('pyarrow') else [])
+
+    def iter_export_rows(self, queryset, request=None):
+        """Yields the header row followed by one formatted row per object.
+
+        The header comes from the model's concrete fields so the first
+        bytes go out before the queryset is evaluated. Encrypted fields
+        are decrypted a chunk at a time.
+        """
+        export_planner = self.export_planner_cls(queryset.model)
+        queryset = export_planner.prepare(queryset)
+        field_names = self.get_export_field_names(queryset.model)
+        decryptor = (BulkDecryptor.for_request(request) if request
+                     else BulkDecryptor())
+        yield field_names
+        for obj in export_planner.iterator(
+                decryptor.iterator(queryset, chunk_size=self.export_chunk_size),
+                chunk_size=self.export_chunk_size):
+            row = self.get_export_row(
+                obj, field_names, export_planner=export_planner,
+                request=request)
+            yield [self.format_export_value(value) for value in row]
+
+    def get_export_field_names(self, model):
+        field_names = [field.attname for field in model._meta.concrete_fields]
+        if 'maternal_visit' in [field.name for field in model._meta.fields]:
+            field_names[:0] = ['subject_identifier', 'consent_datetime', 'visit_code']
+        return field_names
+
+    def get_export_row(self, obj, field_names, export_planner=None,
+                       request=None):
+        obj_data = obj.__dict__
+        obj_data['subject_identifier'] = obj.subject_identifier
+        if export_planner:
+            obj_data['consent_datetime'] = export_planner.get_consent_datetime(obj)
+        else:
+            obj_data['consent_datetime'] = self.get_consent_datetime(
+                obj, request=request)
+        if getattr(obj, 'maternal_visit', None):
+            obj_data['visit_code'] = obj.maternal_visit.visit_code
+        return [obj_data.get(field) for field in field_names]
+
+    def format_export_value(self, value):
+        return format_export_value(value)
 
     def get_export_filename(self):
         date_str = datetime.datetime.now().strftime('%Y-%m-%d')
         filename = "%s-%s" % (self.model.__name__, date_str)
         return filename
 
-    def get_consent_datetime(self, model_obj):
-        subject_consent_cls = django_apps.get_model(
-            'td_maternal.subjectconsent')
+    def get_consent_datetime(self, model_obj, request=None):
         consent_version = getattr(model_obj, 'consent_version', None)
         if consent_version:
-            try:
-                maternal_consent = subject_consent_cls.objects.get(
-                    subject_identifier=model_obj.subject_identifier,
-                    version=consent_version)
-            except subject_consent_cls.DoesNotExist:
-                raise ValidationError('Missing Maternal Consent form.')
-            else:
-                return maternal_consent.consent_datetime
+            consent = consent_lookup.get(
+                model_obj.subject_identifier, version=consent_version,
+                request=request)
+            if not consent:
+                raise ValidationError('Missing Informed Consent form.')
+            return consent.consent_datetime
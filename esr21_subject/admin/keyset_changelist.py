@@ -0,0 +1,197 @@
+import json
+
+from django.apps import apps as django_apps
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR, PAGE_VAR
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, Sum
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_VAR = 'after'
+
+
+class EstimatedCountPaginator(Paginator):
+    """A paginator that reports the row count estimated by the database
+    planner instead of running COUNT(*).
+
+    Falls back to an exact count on backends without a usable estimate.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor not in ['postgresql', 'mysql']:
+            return super().count
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [column[0] for column in cursor.description]
+            return int(dict(zip(columns, cursor.fetchone())).get('rows') or 0)
+
+
+class KeysetChangeList(ChangeList):
+    """A changelist that pages by keyset on (modified, id) instead of
+    OFFSET, so any page costs the same as the first.
+
+    Keyset paging applies when the user has not sorted by a column;
+    otherwise the changelist pages as usual, but still with an
+    estimated count.
+    """
+
+    keyset_fields = ('modified', 'id')
+
+    def __init__(self, request, *args, **kwargs):
+        request.GET = request.GET.copy()
+        self.cursor = request.GET.pop(CURSOR_VAR, [None])[0]
+        self.next_cursor = None
+        self.use_keyset = ORDER_VAR not in request.GET
+        super().__init__(request, *args, **kwargs)
+
+    @staticmethod
+    def encode_cursor(obj):
+        return urlsafe_base64_encode(force_bytes(
+            f'{obj.modified.isoformat()}|{obj.pk}'))
+
+    def decode_cursor(self, cursor):
+        """Returns the (modified, pk) of the cursor, or None if the
+        cursor is malformed, e.g. edited by hand.
+        """
+        try:
+            modified, pk = force_str(urlsafe_base64_decode(cursor)).split('|')
+            modified = parse_datetime(modified)
+            pk = self.model._meta.pk.to_python(pk)
+        except (ValueError, ValidationError):
+            return None
+        if not modified:
+            return None
+        return modified, pk
+
+    @classmethod
+    def filter_after(cls, queryset, modified, pk):
+        """Returns the rows that come after (modified, pk) in the keyset
+        order.
+        """
+        return queryset.filter(
+            Q(modified__lt=modified) | Q(modified=modified, pk__lt=pk))
+
+    def get_ordering(self, request, queryset):
+        if self.use_keyset:
+            return [f'-{field}' for field in self.keyset_fields]
+        return super().get_ordering(request, queryset)
+
+    def get_results(self, request):
+        if not self.use_keyset:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page)
+
+        queryset = self.queryset
+        keys = self.decode_cursor(self.cursor) if self.cursor else None
+        if keys:
+            queryset = self.filter_after(queryset, *keys)
+        else:
+            self.cursor = None
+        result_list = list(queryset[:self.list_per_page + 1])
+        if len(result_list) > self.list_per_page:
+            result_list = result_list[:self.list_per_page]
+            self.next_cursor = self.encode_cursor(result_list[-1])
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+        self.paginator = paginator
+
+    def get_next_url(self):
+        if self.next_cursor:
+            return self.get_query_string({CURSOR_VAR: self.next_cursor})
+        return None
+
+    def get_first_url(self):
+        if self.cursor:
+            return self.get_query_string(remove=[CURSOR_VAR])
+        return None
+
+
+class KeysetChangeListModelAdminMixin:
+    """Enables the keyset changelist and the precomputed date buckets
+    when `keyset_pagination` is True.
+    """
+
+    keyset_pagination = False
+    keyset_change_list_template = 'admin/esr21_subject/keyset_change_list.html'
+    date_bucket_model = 'esr21_subject.changelistdatebucket'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.keyset_pagination and not self.change_list_template:
+            self.change_list_template = self.keyset_change_list_template
+
+    def get_changelist(self, request, **kwargs):
+        if self.keyset_pagination:
+            return KeysetChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        if self.keyset_pagination:
+            return EstimatedCountPaginator(
+                queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(
+            request, queryset, per_page, orphans, allow_empty_first_page)
+
+    def changelist_view(self, request, extra_context=None):
+        if self.keyset_pagination:
+            extra_context = extra_context or {}
+            extra_context['date_buckets'] = self.get_date_buckets(request)
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def get_date_buckets(self, request):
+        """Returns a list of (label, url, count) for the years, or the
+        months or days of the selected year or month, read from the
+        precomputed bucket table.
+        """
+        field = self.date_hierarchy
+        if not field:
+            return []
+        year = request.GET.get(f'{field}__year')
+        month = request.GET.get(f'{field}__month')
+        buckets = django_apps.get_model(self.date_bucket_model).objects.filter(
+            model=self.model._meta.label_lower)
+        if year and month:
+            parts = ['year', 'month', 'day']
+            buckets = buckets.filter(year=year, month=month)
+        elif year:
+            parts = ['year', 'month']
+            buckets = buckets.filter(year=year)
+        else:
+            parts = ['year']
+        date_buckets = []
+        buckets = buckets.values_list(*parts).annotate(
+            total=Sum('count')).order_by(*parts)
+        for *values, count in buckets:
+            params = request.GET.copy()
+            params.pop(CURSOR_VAR, None)
+            params.pop(PAGE_VAR, None)
+            for part, value in zip(parts, values):
+                params[f'{field}__{part}'] = value
+            date_buckets.append((
+                '-'.join(f'{value:02d}' for value in values),
+                f'?{params.urlencode()}',
+                count))
+        return date_buckets
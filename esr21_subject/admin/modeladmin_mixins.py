@@ -1,9 +1,11 @@
 from django.apps import apps as django_apps
 from django.conf import settings
 from django.contrib import admin
+from django.db.models import Q
 from django.utils.safestring import mark_safe
 from django.urls.base import reverse
 from django.urls.exceptions import NoReverseMatch
+from django_crypto_fields.constants import HASH_PREFIX
 from django_revision.modeladmin_mixin import ModelAdminRevisionMixin
 from edc_base.modeladmin_mixins import FormAsJSONModelAdminMixin
 from edc_base.sites.admin import ModelAdminSiteMixin
@@ -17,40 +19,134 @@ from edc_model_admin import (
 from edc_visit_tracking.modeladmin_mixins import (
     CrfModelAdminMixin as VisitTrackingCrfModelAdminMixin)
 
+from ..form_versions import form_version_registry
 from .exportaction_mixin import ExportActionMixin
+from .keyset_changelist import KeysetChangeListModelAdminMixin
+
+
+class AppointmentContextMixin:
+    """Loads an appointment with its visit and schedule once per request
+    and shares it across the admin hooks that need it.
+    """
+
+    appointment_model = 'edc_appointment.appointment'
+
+    def get_appointment_context(self, request, appointment_id):
+        """Returns a dictionary of appointment, visit and schedule or None
+        if there is no such appointment.
+        """
+        if not appointment_id:
+            return None
+        cache = getattr(request, '_appointment_context', None)
+        if cache is None:
+            cache = request._appointment_context = {}
+        if str(appointment_id) not in cache:
+            app_obj = self.get_appointment_queryset(appointment_id).first()
+            if app_obj:
+                self.set_appointment_context(request, app_obj)
+            else:
+                cache[str(appointment_id)] = None
+        return cache[str(appointment_id)]
+
+    def get_appointment_queryset(self, appointment_id):
+        return django_apps.get_model(self.appointment_model).objects.filter(
+            id=appointment_id)
+
+    def set_appointment_context(self, request, app_obj):
+        cache = getattr(request, '_appointment_context', None)
+        if cache is None:
+            cache = request._appointment_context = {}
+        if cache.get(str(app_obj.id)) is None:
+            cache[str(app_obj.id)] = dict(
+                appointment=app_obj,
+                visit=app_obj.visits.get(app_obj.visit_code),
+                schedule=app_obj.schedule)
+        return cache[str(app_obj.id)]
+
+    def get_timepoint_label(self, appointment_context):
+        if appointment_context:
+            return mark_safe(
+                    f'Timepoint: <i>{appointment_context.get("visit").title} '
+                    '</i> &emsp; ')
+        return None
 
 
-class VersionControlMixin:
+class VersionControlMixin(AppointmentContextMixin):
 
     def get_form_version(self, request):
 
-        form_versions = django_apps.get_app_config('esr21_subject').form_versions
-
-        queryset = self.get_queryset(request)
-        model_name = queryset.model._meta.label_lower
-        form_version = form_versions.get(model_name)
+        form_version = form_version_registry.get(self.model)
 
         return mark_safe(
                 f' Version: {form_version} ')
 
     def get_timepoint(self, request):
+        appointment_context = self.get_appointment_context(
+            request, request.GET.get('appointment'))
+        return self.get_timepoint_label(appointment_context)
 
-        appt_model = django_apps.get_model('edc_appointment.appointment')
+    # visit_label indicating month and day visit is happenning
 
-        try:
-            app_obj = appt_model.objects.get(id=request.GET.get('appointment'))
-        except appt_model.DoesNotExist:
-            pass
-        else:
-            return mark_safe(
-                    f'Timepoint: <i>{app_obj.visits.get(app_obj.visit_code).title} '
-                    '</i> &emsp; ')
 
-    # visit_label indicating month and day visit is happenning
+class EncryptedSearchMixin:
+    """Adds exact-match search on encrypted fields, e.g. a phone
+    number, by looking up the search term's hash on the indexed column
+    instead of decrypting every row.
+
+    The hash is computed directly; filtering on the plaintext would
+    encrypt it and store its secret in the Crypt table.
+    """
+
+    encrypted_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        results, use_distinct = super().get_search_results(
+            request, queryset, search_term)
+        search_term = search_term.strip()
+        if search_term and self.encrypted_search_fields:
+            encrypted_q = Q()
+            for field_name in self.encrypted_search_fields:
+                encrypted_q |= Q(**{field_name: self.get_search_hash(
+                    queryset.model, field_name, search_term)})
+            results = results | queryset.filter(encrypted_q)
+        return results, use_distinct
+
+    def get_search_hash(self, model_cls, field_name, search_term):
+        """Returns the search term as stored in the field's column,
+        the prefixed hash without the secret.
+        """
+        field_cryptor = model_cls._meta.get_field(field_name).field_cryptor
+        return HASH_PREFIX + field_cryptor.hash(search_term).decode()
+
+
+class AdverseEventTermSearchMixin:
+    """Searches AEs, SAEs and AESIs by the prefixes of the words of their
+    name, MedDRA preferred name and MedDRA code, using the indexed
+    AdverseEventTerm table instead of `icontains` scans, or by exact
+    subject identifier.
+    """
+
+    search_fields = ('meddra_pcode', )
+    subject_identifier_lookup = 'subject_identifier'
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return self.filter_by_term(queryset, search_term), False
+
+    def filter_by_term(self, queryset, search_term):
+        term_model_cls = django_apps.get_model('esr21_subject.adverseeventterm')
+        keys = term_model_cls.objects.search(
+            search_term, models=[queryset.model._meta.label_lower])
+        return queryset.filter(
+            Q(pk__in=[object_id for _, object_id in keys])
+            | Q(**{self.subject_identifier_lookup: search_term}))
 
 
 class ModelAdminMixin(ModelAdminNextUrlRedirectMixin,
                       VersionControlMixin,
+                      KeysetChangeListModelAdminMixin,
                       ModelAdminFormInstructionsMixin,
                       ModelAdminFormAutoNumberMixin, ModelAdminRevisionMixin,
                       ModelAdminAuditFieldsMixin, ModelAdminReadOnlyMixin,
@@ -115,10 +211,20 @@ class CrfModelAdminMixin(VisitTrackingCrfModelAdminMixin,
         return super().change_view(
             request, object_id, form_url=form_url, extra_context=extra_context)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'subject_visit__appointment')
+
+    def get_object(self, request, object_id, from_field=None):
+        obj = super().get_object(request, object_id, from_field=from_field)
+        if obj:
+            self.set_appointment_context(request, obj.subject_visit.appointment)
+        return obj
+
     def post_url_on_delete_kwargs(self, request, obj):
         return dict(
             subject_identifier=obj.subject_identifier,
-            appointment=str(obj.subject_visit.appointment.id))
+            appointment=str(obj.subject_visit.appointment_id))
 
     def view_on_site(self, obj):
         dashboard_url_name = settings.DASHBOARD_URL_NAMES.get(
@@ -127,7 +233,7 @@ class CrfModelAdminMixin(VisitTrackingCrfModelAdminMixin,
             url = reverse(
                 dashboard_url_name, kwargs=dict(
                     subject_identifier=obj.subject_visit.subject_identifier,
-                    appointment=str(obj.subject_visit.appointment.id)))
+                    appointment=str(obj.subject_visit.appointment_id)))
         except NoReverseMatch:
             url = super().view_on_site(obj)
         return url
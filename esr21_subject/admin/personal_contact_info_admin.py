@@ -5,11 +5,12 @@ from edc_model_admin import audit_fieldset_tuple
 from ..forms import PersonalContactInfoForm
 from ..models import PersonalContactInfo
 from ..admin_site import esr21_subject_admin
-from .modeladmin_mixins import ModelAdminMixin
+from .modeladmin_mixins import EncryptedSearchMixin, ModelAdminMixin
 
 
 @admin.register(PersonalContactInfo, site=esr21_subject_admin)
-class PersonalContactInfoAdmin(ModelAdminMixin, admin.ModelAdmin):
+class PersonalContactInfoAdmin(EncryptedSearchMixin, ModelAdminMixin,
+                               admin.ModelAdmin):
 
     form = PersonalContactInfoForm
 
@@ -46,5 +47,8 @@ class PersonalContactInfoAdmin(ModelAdminMixin, admin.ModelAdmin):
 
     search_fields = ('subject_identifier', )
 
+    encrypted_search_fields = (
+        'subject_cell', 'subject_cell_alt', 'indirect_contact_cell')
+
     list_display = ('subject_identifier', 'may_visit_home', 'may_call',
                     'may_call_work')
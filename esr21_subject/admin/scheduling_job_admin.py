@@ -0,0 +1,35 @@
+from django.contrib import admin
+from django.utils.translation import ugettext_lazy as _
+
+from ..admin_site import esr21_subject_admin
+from ..constants import JOB_PENDING
+from ..models import SchedulingJob
+from ..scheduling import async_scheduler
+
+
+@admin.register(SchedulingJob, site=esr21_subject_admin)
+class SchedulingJobAdmin(admin.ModelAdmin):
+
+    list_display = ('subject_identifier', 'status', 'attempts',
+                    'next_run_datetime', 'last_error', 'created', 'modified')
+
+    list_filter = ('status', )
+
+    search_fields = ('subject_identifier', )
+
+    readonly_fields = ('subject_identifier', 'status', 'attempts',
+                       'next_run_datetime', 'last_error')
+
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        subject_identifiers = list(
+            queryset.values_list('subject_identifier', flat=True))
+        queryset.update(status=JOB_PENDING, attempts=0, next_run_datetime=None)
+        for subject_identifier in subject_identifiers:
+            async_scheduler.submit(subject_identifier)
+
+    retry_jobs.short_description = _('Retry selected scheduling jobs')
+
+    def has_add_permission(self, request):
+        return False
@@ -18,6 +18,8 @@ class SubjectRequisitionAdmin(CrfModelAdminMixin, RequisitionAdminMixin,
     form = SubjectRequisitionForm
     ordering = ('requisition_identifier',)
 
+    keyset_pagination = True
+
     fieldsets = (
         (None, {
             'fields': (
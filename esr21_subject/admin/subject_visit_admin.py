@@ -15,6 +15,8 @@ class SubjectVisitAdmin(
 
     form = SubjectVisitForm
 
+    keyset_pagination = True
+
     fieldsets = (
         (None, {
             'fields': [
@@ -35,6 +37,11 @@ class SubjectVisitAdmin(
         'reason': admin.VERTICAL,
         'info_source': admin.VERTICAL}
 
+    def get_form(self, request, obj=None, change=False, **kwargs):
+        form = super().get_form(request, obj=obj, change=change, **kwargs)
+        form.request = request
+        return form
+
     def add_view(self, request, form_url='', extra_context=None):
         extra_context = extra_context or {}
 
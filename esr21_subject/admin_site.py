@@ -1,4 +1,10 @@
 from django.contrib.admin import AdminSite as DjangoAdminSite
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import NoReverseMatch, path, reverse
+
+from .profiling import profiling_enabled, query_profiles
 
 
 class AdminSite(DjangoAdminSite):
@@ -8,5 +14,110 @@ class AdminSite(DjangoAdminSite):
     site_title = 'ESR21 Subject'
     index_title = 'ESR21 Subject'
 
+    def get_urls(self):
+        return [
+            path('query-profiles/', self.admin_view(self.query_profiles_view),
+                 name='query_profiles'),
+            path('crf-ingestion/', self.admin_view(self.crf_ingestion_view),
+                 name='crf_ingestion'),
+            path('adverse-event-summary/',
+                 self.admin_view(self.adverse_event_summary_view),
+                 name='adverse_event_summary'),
+            path('adverse-event-search/',
+                 self.admin_view(self.adverse_event_search_view),
+                 name='adverse_event_search'),
+        ] + super().get_urls()
+
+    def query_profiles_view(self, request):
+        """Staff only report of the ORM query profiles in the buffer.
+        """
+        if request.method == 'POST':
+            query_profiles.clear()
+            return redirect(f'{self.name}:query_profiles')
+        context = dict(
+            self.each_context(request),
+            title='Query profiles',
+            profiling_enabled=profiling_enabled(),
+            summary=query_profiles.summary(),
+            profiles=query_profiles.records()[:50])
+        return TemplateResponse(
+            request, 'admin/esr21_subject/query_profiles.html', context)
+
+    def crf_ingestion_view(self, request):
+        """Validates and inserts the CRFs posted as JSON lines and
+        returns the number created and the errors of each rejected
+        record. Records of models the user may not add, as checked per
+        model by BulkCrfIngestion, are rejected.
+
+        The view is behind `admin_view`, so a client must log in to the
+        admin for a staff session and post with its CSRF token in the
+        `X-CSRFToken` header. There is no token authentication; clients
+        without a session use the `ingest_crfs` management command.
+        """
+        from .ingestion import BulkCrfIngestion, BulkCrfIngestionError
+
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        ingestion = BulkCrfIngestion(
+            all_or_nothing=request.GET.get('all_or_nothing') == 'true',
+            user=request.user, request=request)
+        try:
+            result = ingestion.ingest_lines(
+                request.body.decode('utf-8').splitlines())
+        except (BulkCrfIngestionError, UnicodeDecodeError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse(result, status=200 if not result['errors'] else 207)
+
+    def adverse_event_summary_view(self, request):
+        """Staff only dashboard of the adverse event counters, optionally
+        for one site.
+        """
+        from .models import AdverseEventSummary
+
+        try:
+            site_id = int(request.GET.get('site_id'))
+        except (TypeError, ValueError):
+            site_id = None
+        context = dict(
+            self.each_context(request),
+            title='Adverse event summary',
+            site_id=site_id,
+            sections=AdverseEventSummary.objects.summary(site_id=site_id))
+        return TemplateResponse(
+            request, 'admin/esr21_subject/adverse_event_summary.html', context)
+
+    def adverse_event_search_view(self, request):
+        """Staff only search of AEs, SAEs and AESIs together by name,
+        MedDRA preferred name or MedDRA code, limited to the models the
+        user may view.
+        """
+        from django.apps import apps as django_apps
+        from .models import AdverseEventTerm
+        from .models.adverse_event_term import TERM_FIELDS
+
+        models = []
+        for label in TERM_FIELDS:
+            opts = django_apps.get_model(label)._meta
+            if request.user.has_perm(f'{opts.app_label}.view_{opts.model_name}'):
+                models.append(label)
+        search_term = request.GET.get('q', '').strip()
+        events = AdverseEventTerm.objects.search_events(
+            search_term, models=models)
+        for event in events:
+            opts = event['obj']._meta
+            try:
+                event['url'] = reverse(
+                    f'{self.name}:{opts.app_label}_{opts.model_name}_change',
+                    args=[event['obj'].pk])
+            except NoReverseMatch:
+                event['url'] = None
+        context = dict(
+            self.each_context(request),
+            title='Adverse event search',
+            search_term=search_term,
+            events=events)
+        return TemplateResponse(
+            request, 'admin/esr21_subject/adverse_event_search.html', context)
+
 
 esr21_subject_admin = AdminSite(name='esr21_subject_admin')
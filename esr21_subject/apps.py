@@ -9,6 +9,24 @@ class AppConfig(DjangoAppConfig):
     verbose_name = 'ESR21 Subject CRFs'
     admin_site_name = 'esr21_subject_admin'
 
+    cohort_capacities = {'esr21_sub': 3000}
+
+    async_scheduling = False
+    scheduling_workers = 2
+
+    query_audit_min_rows = 10000
+
+    query_profiling = False
+    query_profile_buffer_size = 500
+
+    identifier_block_size = 20
+    identifier_database = None
+
+    consent_cache_size = 10000
+    consent_cache_ttl = 300
+
+    decryption_cache_size = 50000
+
     form_versions = {
         'edc_appointment.appointment': 1.1,
         'esr21_subject.adverseevent': 1.2,
@@ -38,6 +56,14 @@ class AppConfig(DjangoAppConfig):
 
     def ready(self):
         from .models import informed_consent_on_post_save
+        from .form_versions import form_version_registry
+        from .models.model_mixins import CrfModelMixin
+        from .scheduling import schedule_resolver
+        schedule_resolver.build()
+        form_version_registry.load(
+            self.form_versions,
+            required_models=[model_cls for model_cls in self.get_models()
+                             if issubclass(model_cls, CrfModelMixin)])
 
 
 if settings.APP_NAME == 'esr21_subject':
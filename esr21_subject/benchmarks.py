@@ -0,0 +1,176 @@
+import json
+import os
+import time
+
+from django.apps import apps as django_apps
+from django.db import connections, transaction
+from model_mommy import mommy
+
+BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'tests', 'benchmark_baseline.json')
+
+
+class QueryCounter:
+    """An execute wrapper that counts the statements run.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class EnrolmentBenchmark:
+    """Times each stage of the enrolment to visit workflow for `n`
+    participants, built on the model mommy recipes:
+
+        screening, consent (with post-consent scheduling), enrolment
+        visit (with metadata creation), the visit's CRFs and the admin
+        export of those CRFs.
+
+    Results are keyed by stage, each with the number of operations, the
+    wall clock seconds and the queries run, in total and per operation.
+    """
+
+    stages = ['screening', 'consent', 'visit', 'crfs', 'export']
+    enrolment_visit_code = '1000'
+
+    def __init__(self, n=None, using=None):
+        self.n = n or 100
+        self.using = using or 'default'
+        self.results = {}
+        self.screenings = []
+        self.consents = []
+        self.subject_visits = []
+        self.crfs = {}
+
+    def run(self, rollback=False):
+        """Runs all stages and returns the results. With `rollback`, the
+        rows created are rolled back once the stages have run.
+        """
+        with transaction.atomic(using=self.using):
+            for stage in self.stages:
+                self.measure(stage, getattr(self, f'run_{stage}'))
+            if rollback:
+                transaction.set_rollback(True, using=self.using)
+        return self.results
+
+    def measure(self, stage, func):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connections[self.using].execute_wrapper(counter):
+            operations = func()
+        seconds = time.perf_counter() - started
+        self.results[stage] = dict(
+            operations=operations,
+            seconds=seconds,
+            queries=counter.count,
+            seconds_per_operation=seconds / operations if operations else 0,
+            queries_per_operation=counter.count / operations if operations else 0)
+
+    def run_screening(self):
+        self.screenings = [
+            mommy.make_recipe('esr21_subject.eligibilityconfirmation')
+            for _ in range(self.n)]
+        return len(self.screenings)
+
+    def run_consent(self):
+        self.consents = [
+            mommy.make_recipe(
+                'esr21_subject.informedconsent',
+                screening_identifier=screening.screening_identifier)
+            for screening in self.screenings]
+        return len(self.consents)
+
+    def run_visit(self):
+        appointment_model_cls = django_apps.get_model('edc_appointment.appointment')
+        appointments = appointment_model_cls.objects.filter(
+            subject_identifier__in=[
+                consent.subject_identifier for consent in self.consents],
+            visit_code=self.enrolment_visit_code,
+            visit_code_sequence=0)
+        self.subject_visits = [
+            mommy.make_recipe(
+                'esr21_subject.subjectvisit', appointment=appointment,
+                report_datetime=appointment.appt_datetime)
+            for appointment in appointments]
+        return len(self.subject_visits)
+
+    def run_crfs(self):
+        operations = 0
+        for subject_visit in self.subject_visits:
+            for crf in subject_visit.visit.crfs:
+                model_cls = django_apps.get_model(crf.model)
+                self.crfs.setdefault(model_cls, []).append(mommy.make(
+                    model_cls, subject_visit=subject_visit,
+                    report_datetime=subject_visit.report_datetime))
+                operations += 1
+        return operations
+
+    def run_export(self):
+        from .admin_site import esr21_subject_admin
+
+        operations = 0
+        for model_cls, objs in self.crfs.items():
+            model_admin = esr21_subject_admin._registry.get(model_cls)
+            if not hasattr(model_admin, 'iter_export_rows'):
+                continue
+            queryset = model_cls.objects.filter(pk__in=[obj.pk for obj in objs])
+            operations += sum(
+                1 for _ in model_admin.iter_export_rows(queryset)) - 1
+        return operations
+
+
+def load_baseline(filename=None):
+    filename = filename or BASELINE_FILE
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return json.load(f)
+
+
+def save_baseline(results, filename=None):
+    """Merges the results, keyed by n, into the baseline file.
+    """
+    filename = filename or BASELINE_FILE
+    baseline = load_baseline(filename)
+    baseline.update({str(n): stages for n, stages in results.items()})
+    with open(filename, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(n, results, baseline, tolerance=None, timings=True,
+                        query_tolerance=None):
+    """Returns a list of messages, one per stage that runs more queries
+    per operation than the baseline by more than `query_tolerance` or,
+    with `timings`, is slower per operation by more than `tolerance`
+    (both fractions).
+
+    Query counts are nearly deterministic, so their tolerance is small
+    and only absorbs e.g. a cache warmed by an earlier test; timings
+    depend on the machine, so stages without a baseline time are not
+    timed.
+    """
+    tolerance = 0.25 if tolerance is None else tolerance
+    query_tolerance = 0.05 if query_tolerance is None else query_tolerance
+    regressions = []
+    for stage, result in results.items():
+        expected = baseline.get(str(n), {}).get(stage)
+        if not expected:
+            continue
+        query_limit = expected['queries_per_operation'] * (1 + query_tolerance)
+        if result['queries_per_operation'] > query_limit:
+            regressions.append(
+                f'n={n} {stage}: {result["queries_per_operation"]:.1f} queries '
+                f'per operation, baseline {expected["queries_per_operation"]:.1f}.')
+        if not timings or 'seconds_per_operation' not in expected:
+            continue
+        limit = expected['seconds_per_operation'] * (1 + tolerance)
+        if result['seconds_per_operation'] > limit:
+            regressions.append(
+                f'n={n} {stage}: {result["seconds_per_operation"] * 1000:.2f} ms '
+                f'per operation, baseline '
+                f'{expected["seconds_per_operation"] * 1000:.2f} ms.')
+    return regressions
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django_crypto_fields.constants import HASH_PREFIX
+
+RAW_PREFIX = '_encrypted_'
+
+
+def get_encrypted_fields(model_cls):
+    return [field for field in model_cls._meta.concrete_fields
+            if hasattr(field, 'field_cryptor')]
+
+
+class BulkDecryptor:
+    """Decrypts the encrypted fields of many rows at once.
+
+    The stored hashes are read without decrypting, the secrets of the
+    hashes not yet decrypted are fetched with one query per chunk, and
+    each distinct value is decrypted once with the field's already
+    loaded cryptor. Plaintexts are kept in an LRU cache keyed by hash,
+    bounded by `maxsize`, normally one per request.
+    """
+
+    crypt_model = 'django_crypto_fields.crypt'
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or django_apps.get_app_config(
+            'esr21_subject').decryption_cache_size
+        self._plaintexts = OrderedDict()
+
+    @classmethod
+    def for_request(cls, request):
+        """Returns the decryptor of the request, creating it on first use.
+        """
+        if not hasattr(request, '_bulk_decryptor'):
+            request._bulk_decryptor = cls()
+        return request._bulk_decryptor
+
+    def decrypt(self, field, hashes):
+        """Returns a dictionary of plaintext keyed by stored hash.
+        """
+        hashes = {value for value in hashes if value}
+        plaintexts = {}
+        missing = []
+        for value in hashes:
+            key = (field.algorithm, field.mode, value)
+            if key in self._plaintexts:
+                self._plaintexts.move_to_end(key)
+                plaintexts[value] = self._plaintexts[key]
+            else:
+                missing.append(value)
+        if missing:
+            self.prefetch_secrets(field, missing)
+            for value in missing:
+                plaintext = field.field_cryptor.decrypt(value.encode())
+                plaintexts[value] = plaintext
+                self._plaintexts[(field.algorithm, field.mode, value)] = plaintext
+            while len(self._plaintexts) > self.maxsize:
+                self._plaintexts.popitem(last=False)
+        return plaintexts
+
+    def prefetch_secrets(self, field, hashes):
+        """Loads the secrets of the hashes into the cache the field
+        cryptor reads before querying the Crypt table, with one query.
+        """
+        cache_key_prefix = getattr(field.field_cryptor, 'cache_key_prefix', None)
+        if cache_key_prefix is None:
+            return
+        hashed_values = [value[len(HASH_PREFIX):] for value in hashes]
+        secrets = django_apps.get_model(self.crypt_model).objects.filter(
+            hash__in=hashed_values, algorithm=field.algorithm,
+            mode=field.mode).values_list('hash', 'secret')
+        cache.set_many({
+            cache_key_prefix + hashed_value.encode(): secret
+            for hashed_value, secret in secrets})
+
+    def prepare(self, queryset):
+        """Returns the queryset with its encrypted fields deferred and
+        their stored hashes selected instead.
+        """
+        fields = get_encrypted_fields(queryset.model)
+        if not fields:
+            return queryset
+        return queryset.defer(*[field.name for field in fields]).annotate(**{
+            f'{RAW_PREFIX}{field.attname}': Cast(
+                field.attname, output_field=CharField())
+            for field in fields})
+
+    def decrypt_objects(self, objs):
+        """Sets the decrypted values on a chunk of objects loaded from a
+        prepared queryset and returns them.
+        """
+        if not objs:
+            return objs
+        for field in get_encrypted_fields(objs[0].__class__):
+            raw_attr = f'{RAW_PREFIX}{field.attname}'
+            plaintexts = self.decrypt(
+                field, [obj.__dict__.get(raw_attr) for obj in objs])
+            for obj in objs:
+                value = obj.__dict__.pop(raw_attr, None)
+                obj.__dict__[field.attname] = (
+                    plaintexts.get(value) if value else value)
+        return objs
+
+    def iterator(self, queryset, chunk_size=None):
+        """Yields the objects of the queryset with their encrypted fields
+        decrypted one chunk at a time.
+        """
+        chunk_size = chunk_size or 2000
+        chunk = []
+        for obj in self.prepare(queryset).iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) == chunk_size:
+                yield from self.decrypt_objects(chunk)
+                chunk = []
+        yield from self.decrypt_objects(chunk)
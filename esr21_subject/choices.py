@@ -7,6 +7,7 @@ from edc_visit_tracking.constants import SCHEDULED, UNSCHEDULED, LOST_VISIT
 from edc_visit_tracking.constants import MISSED_VISIT, COMPLETED_PROTOCOL_VISIT
 
 from .constants import NATIONAL_ID, NATIONAL_ID_RECEIPT
+from .constants import JOB_DONE, JOB_FAILED, JOB_PENDING, JOB_RUNNING
 
 ACTION_TAKEN = (
     ('dose_not_changed', 'Dose not changed'),
@@ -171,6 +172,13 @@ ITEM_TYPE = (
     (OTHER, 'Other'),
 )
 
+JOB_STATUS = (
+    (JOB_PENDING, 'Pending'),
+    (JOB_RUNNING, 'Running'),
+    (JOB_DONE, 'Done'),
+    (JOB_FAILED, 'Failed'),
+)
+
 LANGUAGE = (
     ('setswana', 'Setswana'),
     ('setswana', 'English'),
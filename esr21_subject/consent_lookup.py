@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.apps import apps as django_apps
+
+ConsentValues = namedtuple('ConsentValues', 'consent_datetime version')
+
+
+class ConsentLookup:
+    """Returns the consent datetime and version of a subject's consent
+    from memory after the first lookup.
+
+    Lookups are memoized on the request, if given, and in a process wide
+    LRU cache whose entries expire after `ttl` seconds. A subject not
+    consented is not cached, so their consent is seen as soon as it is
+    saved. The InformedConsent post_save and post_delete signals
+    invalidate the subject's entries in this process; other processes
+    see the change once their entry expires.
+    """
+
+    consent_model = 'esr21_subject.informedconsent'
+
+    def __init__(self, maxsize=None, ttl=None):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def consent_model_cls(self):
+        return django_apps.get_model(self.consent_model)
+
+    @property
+    def maxsize(self):
+        return self._maxsize or django_apps.get_app_config(
+            'esr21_subject').consent_cache_size
+
+    @property
+    def ttl(self):
+        return self._ttl or django_apps.get_app_config(
+            'esr21_subject').consent_cache_ttl
+
+    def get(self, subject_identifier, version=None, request=None):
+        """Returns a ConsentValues tuple for the subject's consent of
+        the given version, or their latest consent, or None if not
+        consented.
+        """
+        key = (subject_identifier, str(version) if version else None)
+        memo = None
+        if request is not None:
+            if not hasattr(request, '_consent_lookup'):
+                request._consent_lookup = {}
+            memo = request._consent_lookup
+            if key in memo:
+                return memo[key]
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                consent = entry[1]
+            else:
+                entry = None
+        if not entry:
+            consent = self.fetch(*key)
+            if consent is None:
+                return None
+            with self._lock:
+                self._cache[key] = (time.monotonic() + self.ttl, consent)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        if memo is not None:
+            memo[key] = consent
+        return consent
+
+    def fetch(self, subject_identifier, version):
+        values = self.get_queryset(subject_identifier, version).first()
+        return ConsentValues(*values) if values else None
+
+    def get_queryset(self, subject_identifier, version=None):
+        queryset = self.consent_model_cls.objects.filter(
+            subject_identifier=subject_identifier)
+        if version:
+            queryset = queryset.filter(version=version)
+        return queryset.order_by('-consent_datetime').values_list(
+            'consent_datetime', 'version')
+
+    def invalidate(self, subject_identifier):
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == subject_identifier]:
+                del self._cache[key]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+consent_lookup = ConsentLookup()
@@ -1,2 +1,7 @@
 NATIONAL_ID = 'national_identity_card'
 NATIONAL_ID_RECEIPT = 'national_identity_card_rcpt'
+
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
@@ -0,0 +1,4 @@
+from .export_planner import ExportPlanner
+from .columnar_exporter import ColumnarExporter, ColumnarExporterError
+from .snapshot_exporter import SnapshotExporter
+from .incremental_exporter import IncrementalExporter
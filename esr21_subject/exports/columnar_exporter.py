@@ -0,0 +1,130 @@
+import uuid
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+
+
+class ColumnarExporterError(Exception):
+    pass
+
+
+class ColumnarExporter:
+    """Writes the rows of a model to a Parquet or Arrow IPC file.
+
+    Values are fetched in batches with `values_list`, converted into typed
+    Arrow columns and written one row group per batch so memory use stays
+    bounded by `batch_size`.
+    """
+
+    formats = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+    def __init__(self, model_cls=None, batch_size=None, file_format=None):
+        self.model_cls = model_cls
+        self.batch_size = batch_size or 10000
+        self.file_format = file_format or 'parquet'
+        self._schema = None
+        if self.file_format not in self.formats:
+            raise ColumnarExporterError(
+                f'Invalid file format. Expected one of {list(self.formats)}. '
+                f'Got {self.file_format}.')
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImproperlyConfigured(
+                'Columnar exports require pyarrow. Install esr21-subject[parquet] '
+                'to continue.')
+        else:
+            self.pa = pyarrow
+
+    @property
+    def extension(self):
+        return self.formats.get(self.file_format)
+
+    @property
+    def fields(self):
+        return [field for field in self.model_cls._meta.concrete_fields]
+
+    @property
+    def lookups(self):
+        return [field.attname for field in self.fields]
+
+    def arrow_type(self, field):
+        pa = self.pa
+        if field.is_relation:
+            field = field.target_field
+        if field.choices:
+            return pa.dictionary(pa.int32(), pa.string())
+        elif isinstance(field, models.DateTimeField):
+            return pa.timestamp('us', tz='UTC')
+        elif isinstance(field, models.DateField):
+            return pa.date32()
+        elif isinstance(field, models.DecimalField):
+            return pa.decimal128(field.max_digits, field.decimal_places)
+        elif isinstance(field, models.IntegerField):
+            return pa.int64()
+        elif isinstance(field, models.FloatField):
+            return pa.float64()
+        elif isinstance(field, models.BooleanField):
+            return pa.bool_()
+        return pa.string()
+
+    @property
+    def schema(self):
+        if not self._schema:
+            pa = self.pa
+            self._schema = pa.schema([
+                pa.field(field.attname, self.arrow_type(field))
+                for field in self.fields])
+        return self._schema
+
+    def to_array(self, values, arrow_type):
+        pa = self.pa
+        if pa.types.is_string(arrow_type):
+            values = [str(value) if isinstance(value, uuid.UUID) else value
+                      for value in values]
+        elif pa.types.is_dictionary(arrow_type):
+            return pa.array(
+                [None if value is None else str(value) for value in values],
+                type=pa.string()).dictionary_encode()
+        return pa.array(values, type=arrow_type)
+
+    def record_batch(self, rows):
+        schema = self.schema
+        columns = list(zip(*rows)) if rows else [[] for _ in schema]
+        arrays = [self.to_array(list(values), field.type)
+                  for values, field in zip(columns, schema)]
+        return self.pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def batches(self, queryset=None):
+        """Yields record batches of at most `batch_size` rows.
+        """
+        if queryset is None:
+            queryset = self.model_cls._default_manager.all()
+        rows = []
+        values = queryset.order_by().values_list(*self.lookups).iterator(
+            chunk_size=self.batch_size)
+        for row in values:
+            rows.append(row)
+            if len(rows) == self.batch_size:
+                yield self.record_batch(rows)
+                rows = []
+        if rows:
+            yield self.record_batch(rows)
+
+    def write(self, path, queryset=None):
+        """Writes the queryset to `path` and returns the number of rows
+        written.
+        """
+        row_count = 0
+        if self.file_format == 'parquet':
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(path, self.schema)
+        else:
+            writer = self.pa.ipc.new_file(path, self.schema)
+        try:
+            for batch in self.batches(queryset=queryset):
+                writer.write_batch(batch)
+                row_count += batch.num_rows
+        finally:
+            writer.close()
+        return row_count
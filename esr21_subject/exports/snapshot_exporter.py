@@ -0,0 +1,186 @@
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django import db
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.utils import timezone
+
+from .utils import format_export_value
+
+
+def close_connections():
+    """Pool initializer: drop connections inherited from the parent so
+    each worker opens its own.
+    """
+    db.connections.close_all()
+
+
+def setup_worker():
+    """Pool initializer for spawned workers, which start without Django
+    set up or a database connection.
+    """
+    django.setup()
+
+
+def export_pk_range(task):
+    """Writes the rows of one primary key range of a model to a CSV file
+    and returns the manifest entry for it.
+
+    With a snapshot id, the rows are read in a REPEATABLE READ
+    transaction importing the snapshot exported by the parent, so every
+    worker reads the same database state.
+    """
+    snapshot_id = task[-1]
+    if not snapshot_id:
+        return write_pk_range(*task[:-1])
+    with transaction.atomic():
+        with db.connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot_id])
+        return write_pk_range(*task[:4])
+
+
+def write_pk_range(label, filename, lower_pk, upper_pk, as_of=None):
+    model_cls = django_apps.get_model(label)
+    field_names = [field.attname for field in model_cls._meta.concrete_fields]
+    queryset = model_cls._default_manager.filter(pk__gte=lower_pk)
+    if upper_pk is not None:
+        queryset = queryset.filter(pk__lt=upper_pk)
+    if as_of and 'created' in field_names:
+        queryset = queryset.filter(created__lte=as_of)
+    row_count = 0
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(field_names)
+        for row in queryset.order_by('pk').values_list(*field_names).iterator():
+            writer.writerow([format_export_value(value) for value in row])
+            row_count += 1
+    return dict(
+        model=label,
+        filename=filename,
+        row_count=row_count,
+        sha256=checksum(filename))
+
+
+def checksum(filename):
+    sha256 = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class SnapshotExporter:
+    """Exports a set of models to a single zip archive using a pool of
+    worker processes, one database connection per worker.
+
+    Each model is split into primary key ranges of `chunk_size` rows so
+    large tables are spread across workers. The archive carries a
+    manifest of row counts and checksums per file.
+
+    On PostgreSQL the parent exports its REPEATABLE READ snapshot with
+    `pg_export_snapshot()` and each worker imports it, so all files are
+    consistent with one point in time. Workers are spawned rather than
+    forked so they do not share the parent's open connection.
+
+    On other databases each worker reads in its own transaction and
+    only rows created after the snapshot started are excluded. Rows
+    updated or deleted while the export runs may then be exported as
+    of different points in time.
+    """
+
+    def __init__(self, models=None, workers=None, chunk_size=None):
+        self.models = models or []
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size or 50000
+        self.as_of = timezone.now()
+
+    def pk_ranges(self, model_cls):
+        """Returns a list of (lower_pk, upper_pk) tuples covering the
+        table, read in a single pass over the primary key index.
+        """
+        boundaries = []
+        pks = model_cls._default_manager.order_by('pk').values_list(
+            'pk', flat=True)
+        for index, pk in enumerate(pks.iterator(chunk_size=self.chunk_size)):
+            if index % self.chunk_size == 0:
+                boundaries.append(pk)
+        return list(zip(boundaries, boundaries[1:] + [None]))
+
+    def tasks(self, staging_dir, snapshot_id=None):
+        tasks = []
+        for model_cls in self.models:
+            label = model_cls._meta.label_lower
+            for index, (lower_pk, upper_pk) in enumerate(
+                    self.pk_ranges(model_cls)):
+                filename = os.path.join(staging_dir, f'{label}.{index:05d}.csv')
+                tasks.append((label, filename, lower_pk, upper_pk, self.as_of,
+                              snapshot_id))
+        return tasks
+
+    @property
+    def shared_snapshot(self):
+        return db.connection.vendor == 'postgresql'
+
+    def export(self, archive_name):
+        """Writes the archive and returns the manifest.
+        """
+        staging_dir = tempfile.mkdtemp()
+        try:
+            if self.shared_snapshot:
+                files = self.export_snapshot(staging_dir)
+            else:
+                tasks = self.tasks(staging_dir)
+                db.connections.close_all()
+                with ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        initializer=close_connections) as executor:
+                    files = list(executor.map(export_pk_range, tasks))
+            manifest = self.manifest(files)
+            with zipfile.ZipFile(
+                    archive_name, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for entry in files:
+                    archive.write(entry['filename'], entry['arcname'])
+                archive.writestr(
+                    'manifest.json', json.dumps(manifest, indent=2))
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        return manifest
+
+    def export_snapshot(self, staging_dir):
+        """Writes the files from the snapshot of a transaction held open
+        until every worker has finished.
+        """
+        with transaction.atomic():
+            with db.connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                cursor.execute('SELECT pg_export_snapshot(), now()')
+                snapshot_id, self.as_of = cursor.fetchone()
+            tasks = self.tasks(staging_dir, snapshot_id=snapshot_id)
+            with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=setup_worker) as executor:
+                return list(executor.map(export_pk_range, tasks))
+
+    def manifest(self, files):
+        row_counts = {model_cls._meta.label_lower: 0 for model_cls in self.models}
+        for entry in files:
+            entry['arcname'] = os.path.basename(entry['filename'])
+            row_counts[entry['model']] += entry['row_count']
+        return dict(
+            as_of=self.as_of.isoformat(),
+            row_counts=row_counts,
+            files=[dict(name=entry['arcname'],
+                        model=entry['model'],
+                        row_count=entry['row_count'],
+                        sha256=entry['sha256']) for entry in files])
@@ -0,0 +1,20 @@
+import datetime
+import uuid
+
+from django.utils import timezone
+
+
+def format_export_value(value):
+    """Returns a value formatted for a text export.
+    """
+    if value is None:
+        return ''
+    elif isinstance(value, uuid.UUID):
+        return str(value)
+    elif isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value)
+        return value.strftime('%Y/%m/%d %H:%M:%S')
+    elif isinstance(value, datetime.date):
+        return value.strftime('%Y/%m/%d')
+    return value
@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ImproperlyConfigured
+
+
+class FormVersionRegistry:
+    """Form versions keyed by model class, loaded once from
+    `AppConfig.form_versions`.
+    """
+
+    def __init__(self):
+        self.registry = {}
+
+    def load(self, form_versions, required_models=None):
+        """Loads the form versions, raising ImproperlyConfigured for a
+        label that is not a model or for a required model without a
+        form version.
+        """
+        registry = {}
+        for label, form_version in form_versions.items():
+            try:
+                model_cls = django_apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise ImproperlyConfigured(
+                    f'Invalid model in form_versions. Got {label}. {e}')
+            registry.update({model_cls: Decimal(str(form_version))})
+        missing = [model_cls._meta.label_lower
+                   for model_cls in required_models or []
+                   if model_cls not in registry]
+        if missing:
+            raise ImproperlyConfigured(
+                f'Missing form version. Add these models to '
+                f'AppConfig.form_versions. Got {missing}.')
+        self.registry = registry
+
+    def get(self, model_cls):
+        return self.registry.get(model_cls)
+
+
+form_version_registry = FormVersionRegistry()
@@ -1,8 +1,8 @@
 from django import forms
 from edc_base.sites import SiteModelFormMixin
-from edc_form_validators import FormValidatorMixin
 from esr21_subject_validation.form_validators import EligibilityConfirmationFormValidator
 from ..models import EligibilityConfirmation
+from .form_mixins import FormValidatorMixin
 
 
 class EligibilityConfirmationForm(SiteModelFormMixin, FormValidatorMixin,
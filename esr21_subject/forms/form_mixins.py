@@ -1,12 +1,42 @@
 from django import forms
 from edc_base.sites import SiteModelFormMixin
-from edc_form_validators import FormValidatorMixin
+from edc_form_validators import FormValidatorMixin as BaseFormValidatorMixin
 from edc_visit_tracking.crf_date_validator import CrfDateValidator
 from edc_visit_tracking.crf_date_validator import (
     CrfReportDateAllowanceError, CrfReportDateBeforeStudyStart)
 from edc_visit_tracking.crf_date_validator import CrfReportDateIsFuture
 
 from ..models import SubjectVisit
+from ..profiling import QueryProfiler, profiling_enabled
+
+
+class FormValidatorMixin(BaseFormValidatorMixin):
+    """Passes the keyword arguments of `get_form_validator_kwargs`, if
+    any, to the form validator and profiles the queries of the form and
+    its form validator when query profiling is enabled.
+    """
+
+    def get_form_validator_kwargs(self):
+        return {}
+
+    def clean(self):
+        if not profiling_enabled() or not self.form_validator_cls:
+            return self.clean_with_form_validator()
+        profiler = QueryProfiler('form', self.form_validator_cls.__name__)
+        try:
+            with profiler:
+                return self.clean_with_form_validator()
+        finally:
+            profiler.save()
+
+    def clean_with_form_validator(self):
+        options = self.get_form_validator_kwargs()
+        if not options or not self.form_validator_cls:
+            return super().clean()
+        cleaned_data = super(BaseFormValidatorMixin, self).clean()
+        form_validator = self.form_validator_cls(
+            cleaned_data=cleaned_data, instance=self.instance, **options)
+        return form_validator.validate()
 
 
 class SubjectModelFormMixin(SiteModelFormMixin, FormValidatorMixin,
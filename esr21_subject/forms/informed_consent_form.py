@@ -1,9 +1,9 @@
 from django import forms
 from edc_base.sites import SiteModelFormMixin
 from edc_consent.modelform_mixins import ConsentModelFormMixin
-from edc_form_validators import FormValidatorMixin
 from esr21_subject_validation.form_validators import InformedConsentFormValidator
 from ..models import InformedConsent
+from .form_mixins import FormValidatorMixin
 
 
 class InformedConsentForm(SiteModelFormMixin, FormValidatorMixin,
@@ -1,9 +1,9 @@
 from django import forms
-from edc_form_validators import FormValidatorMixin
 
 from edc_lab.forms.modelform_mixins import RequisitionFormMixin
 
 from ..models import SubjectRequisition
+from .form_mixins import FormValidatorMixin
 
 
 class SubjectRequisitionForm(RequisitionFormMixin,
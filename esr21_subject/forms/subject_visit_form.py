@@ -4,16 +4,21 @@ from django.core.exceptions import ValidationError
 from edc_base.sites import SiteModelFormMixin
 from edc_constants.constants import OTHER
 from edc_visit_tracking.constants import LOST_VISIT, MISSED_VISIT, UNSCHEDULED
-from edc_form_validators import FormValidatorMixin
 from edc_visit_tracking.form_validators import VisitFormValidator as BaseVisitFormValidator
 
+from ..consent_lookup import consent_lookup
 from ..models import SubjectVisit
+from .form_mixins import FormValidatorMixin
 
 
 class VisitFormValidator(BaseVisitFormValidator):
 
     informed_cosent_model = 'esr21_subject.informedconsent'
 
+    def __init__(self, request=None, **kwargs):
+        self.request = request
+        super().__init__(**kwargs)
+
     def clean(self):
         report_datetime = self.cleaned_data.get('report_datetime')
         self.validate_against_consent_datetime(report_datetime=report_datetime)
@@ -25,16 +30,19 @@ class VisitFormValidator(BaseVisitFormValidator):
 
     @property
     def informed_consent_model_obj(self):
-        subject_identifier = self.cleaned_data.get('appointment').subject_identifier
-        try:
-            consent = self.informed_consent_model_cls.objects.get(
-                subject_identifier=subject_identifier,
-                version='1')
-        except self.informed_consent_model_cls.DoesNotExist:
+        """Returns the consent datetime and version of the version 1
+        consent, looked up once per validator and memoized on the
+        request, if any.
+        """
+        if not getattr(self, '_informed_consent', None):
+            subject_identifier = self.cleaned_data.get(
+                'appointment').subject_identifier
+            self._informed_consent = consent_lookup.get(
+                subject_identifier, version='1', request=self.request)
+        if not self._informed_consent:
             raise ValidationError(
                 'Please complete the Informed Consent form before proceeding.')
-        else:
-            return consent
+        return self._informed_consent
 
     def validate_reason_and_info_source(self):
 
@@ -83,6 +91,11 @@ class SubjectVisitForm (
 
     form_validator_cls = VisitFormValidator
 
+    request = None
+
+    def get_form_validator_kwargs(self):
+        return dict(request=self.request) if self.request is not None else {}
+
     class Meta:
         model = SubjectVisit
         fields = '__all__'
@@ -0,0 +1,128 @@
+import threading
+from functools import partial
+
+from django.apps import apps as django_apps
+from django.db import connections, transaction
+
+
+class IdentifierAllocatorError(Exception):
+    pass
+
+
+class IdentifierAllocator:
+    """Hands out identifier sequence values from memory, reserving them
+    from the database in blocks per device and site.
+
+    A block costs one short transaction on the sequence row instead of
+    one locked read of the identifier table per identifier. Blocks are
+    kept per process and shared by its threads. Values left in a block
+    when the process stops are never used, so sequences may have gaps.
+
+    Blocks are reserved and committed on their own connection, so the
+    sequence row is not locked for the rest of the caller's transaction:
+    on AppConfig.identifier_database if set, otherwise on a second
+    connection to the default database. SQLite allows one writer at a
+    time, so there blocks are reserved in the caller's transaction and
+    the values left are only kept, with `transaction.on_commit`, once it
+    commits.
+
+    Values already taken in the identifier model, e.g. made before the
+    allocator was used, are skipped with one query per block: by
+    identifier if `formatter` formats a value as an identifier,
+    otherwise by sequence number for the name, device and site.
+    """
+
+    identifier_model = 'edc_identifier.identifiermodel'
+    sequence_model = 'esr21_subject.identifiersequence'
+    block_database = 'esr21_identifier_blocks'
+
+    def __init__(self, name=None, block_size=None, formatter=None):
+        self.name = name
+        self._block_size = block_size
+        self.formatter = formatter
+        self.blocks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def app_config(self):
+        return django_apps.get_app_config('esr21_subject')
+
+    @property
+    def block_size(self):
+        return self._block_size or self.app_config.identifier_block_size
+
+    @property
+    def using(self):
+        """The database alias blocks are reserved on.
+        """
+        if self.app_config.identifier_database:
+            return self.app_config.identifier_database
+        if connections['default'].vendor == 'sqlite':
+            return 'default'
+        if self.block_database not in connections.databases:
+            connections.databases[self.block_database] = connections.databases[
+                'default']
+        return self.block_database
+
+    def next(self, device_id, site_id=None):
+        return self.take(1, device_id, site_id=site_id)[0]
+
+    def take(self, count, device_id, site_id=None):
+        """Returns a list of `count` values for the device and site.
+        """
+        key = (str(device_id), site_id)
+        with self._lock:
+            block = self.blocks.get(key) or []
+            values = block[:count]
+            del block[:count]
+        while len(values) < count:
+            needed = count - len(values)
+            block = self.reserve(
+                str(device_id), site_id, max(needed, self.block_size))
+            values.extend(block[:needed])
+            if connections[self.using].in_atomic_block:
+                transaction.on_commit(
+                    partial(self.keep, key, block[needed:]), using=self.using)
+            else:
+                self.keep(key, block[needed:])
+        return values
+
+    def keep(self, key, values):
+        """Adds the values left in a reserved block to the process's
+        block for the device and site.
+        """
+        with self._lock:
+            self.blocks.setdefault(key, []).extend(values)
+
+    def reserve(self, device_id, site_id, size):
+        sequence_model_cls = django_apps.get_model(self.sequence_model)
+        values = sequence_model_cls.objects.db_manager(self.using).reserve(
+            self.name, device_id, site_id=site_id, size=size,
+            seed=lambda: self.seed(device_id, site_id))
+        return self.exclude_taken(list(values), device_id, site_id)
+
+    def seed(self, device_id, site_id):
+        """Returns the last sequence number used by the identifier model
+        for the device and site, so a new sequence continues from it.
+        """
+        identifier_model_cls = django_apps.get_model(self.identifier_model)
+        last = identifier_model_cls.objects.filter(
+            name=self.name, device_id=device_id, site_id=site_id).order_by(
+                '-sequence_number').values_list(
+                    'sequence_number', flat=True).first()
+        return last or 0
+
+    def exclude_taken(self, values, device_id, site_id):
+        identifier_model_cls = django_apps.get_model(self.identifier_model)
+        if not self.formatter:
+            taken = set(identifier_model_cls.objects.filter(
+                name=self.name, device_id=device_id, site_id=site_id,
+                sequence_number__in=values).values_list(
+                    'sequence_number', flat=True))
+            return [value for value in values if value not in taken]
+        identifiers = {
+            self.formatter(value, device_id, site_id): value for value in values}
+        taken = set(identifier_model_cls.objects.filter(
+            identifier__in=list(identifiers)).values_list('identifier', flat=True))
+        return [value for identifier, value in identifiers.items()
+                if identifier not in taken]
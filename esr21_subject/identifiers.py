@@ -1,8 +1,85 @@
+from django.apps import apps as django_apps
 from edc_identifier.simple_identifier import SimpleUniqueIdentifier
 
+from .identifier_allocator import IdentifierAllocator, IdentifierAllocatorError
+
 
 class ScreeningIdentifier(SimpleUniqueIdentifier):
 
     random_string_length = 5
     identifier_type = 'screening_identifier'
     template = 'S{device_id}{random_string}'
+
+    allowed_chars = 'ABCDEFGHKMNPRTUVWXYZ2346789'
+    # coprime with len(allowed_chars) ** random_string_length, so each
+    # sequence value maps to a different string
+    multiplier = 1000003
+
+    @property
+    def identifier(self):
+        """Returns a new identifier, recorded in the identifier model as
+        by `make_many`.
+        """
+        if not self._identifier:
+            value = screening_identifier_allocator.next(self.device_id)
+            self._identifier = self.format_identifier(value, self.device_id)
+            self.record(
+                {value: self._identifier}, self.device_id,
+                site_id=getattr(self, 'site_id', None))
+        return self._identifier
+
+    @classmethod
+    def format_identifier(cls, value, device_id, site_id=None):
+        """Returns the identifier for a sequence value, its random string
+        being the value scrambled and written in `allowed_chars`.
+        """
+        base = len(cls.allowed_chars)
+        size = base ** cls.random_string_length
+        if value >= size:
+            raise IdentifierAllocatorError(
+                'Screening identifiers exhausted for device '
+                f'{device_id}. Increase the length of the random string.')
+        value = (value * cls.multiplier) % size
+        chars = []
+        for _ in range(cls.random_string_length):
+            value, index = divmod(value, base)
+            chars.append(cls.allowed_chars[index])
+        return cls.template.format(
+            device_id=device_id, random_string=''.join(chars))
+
+    @classmethod
+    def make_many(cls, count, site_id=None):
+        """Returns a list of `count` new identifiers, taken from the
+        allocator and recorded in the identifier model with one insert.
+        """
+        device_id = django_apps.get_app_config('edc_device').device_id
+        identifiers = {
+            value: cls.format_identifier(value, device_id)
+            for value in screening_identifier_allocator.take(count, device_id)}
+        cls.record(identifiers, device_id, site_id=site_id)
+        return list(identifiers.values())
+
+    @classmethod
+    def record(cls, identifiers, device_id, site_id=None):
+        """Records the identifiers, keyed by sequence value, in the
+        identifier model with one insert, skipping any already recorded.
+        """
+        model_cls = django_apps.get_model(cls.model)
+        recorded = set(model_cls.objects.filter(
+            identifier__in=list(identifiers.values())).values_list(
+                'identifier', flat=True))
+        model_cls.objects.bulk_create([
+            model_cls(
+                name=cls.identifier_type,
+                sequence_number=value,
+                identifier=identifier,
+                identifier_type=cls.identifier_type,
+                device_id=device_id,
+                site_id=site_id)
+            for value, identifier in identifiers.items()
+            if identifier not in recorded])
+
+
+screening_identifier_allocator = IdentifierAllocator(
+    name=ScreeningIdentifier.identifier_type,
+    formatter=ScreeningIdentifier.format_identifier)
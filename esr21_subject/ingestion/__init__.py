@@ -0,0 +1 @@
+from .bulk_crf_ingestion import BulkCrfIngestion, BulkCrfIngestionError
@@ -0,0 +1,338 @@
+import json
+import uuid
+from collections import OrderedDict
+from functools import reduce
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Q
+from django.forms import inlineformset_factory, modelform_factory
+from edc_metadata.constants import KEYED
+from edc_visit_schedule.subject_schedule import NotOnScheduleError
+from edc_visit_schedule.subject_schedule import NotOnScheduleForDateError
+from edc_visit_schedule.subject_schedule import SubjectSchedule
+from edc_visit_tracking.visit_sequence import VisitSequenceError
+
+from ..admin_site import esr21_subject_admin
+from ..consent_lookup import consent_lookup
+from ..form_versions import form_version_registry
+from ..models import AdverseEventSummary, AdverseEventTerm, ChangelistDateBucket
+from ..models.model_mixins import CrfModelMixin
+
+
+class BulkCrfIngestionError(Exception):
+    pass
+
+
+class BulkCrfIngestion:
+    """Validates and inserts a batch of CRFs keyed offline, e.g. a
+    tablet's daily sync.
+
+    Each record is a dictionary with the `model` label, the
+    `subject_visit` as a primary key or as a dictionary of
+    subject_identifier, visit_code and visit_code_sequence, the form
+    `data`, optional `inlines` rows keyed by formset prefix and an
+    optional client `id`.
+
+    Records are validated with the form and inline forms of the model's
+    admin, so the form validators run as when keyed, and with the
+    on-schedule and previous visit checks of the CRF's save(). Valid
+    records are
+    inserted with `bulk_create` in one transaction, then references are
+    updated per CRF and the CRF metadata and metadata rules once per
+    visit instead of once per CRF. Model save() and signals are not
+    called for the rows created, so the adverse event summary counters
+    and term index are updated here.
+    """
+
+    metadata_model = 'edc_metadata.crfmetadata'
+    visit_model = 'esr21_subject.subjectvisit'
+    admin_site = esr21_subject_admin
+    exclude = ['subject_identifier']
+
+    def __init__(self, all_or_nothing=False, batch_size=None, user=None,
+                 request=None):
+        self.all_or_nothing = all_or_nothing
+        self.batch_size = batch_size or 500
+        self.user = user
+        self.request = request
+        self._form_classes = {}
+
+    @property
+    def metadata_model_cls(self):
+        return django_apps.get_model(self.metadata_model)
+
+    @property
+    def visit_model_cls(self):
+        return django_apps.get_model(self.visit_model)
+
+    def ingest_lines(self, lines):
+        """Ingests records given as JSON lines.
+        """
+        records = []
+        for index, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise BulkCrfIngestionError(f'Line {index}: invalid JSON. {e}')
+            if not isinstance(record, dict):
+                raise BulkCrfIngestionError(
+                    f'Line {index}: expected an object. Got {line.strip()[:50]}.')
+            records.append(record)
+        return self.ingest(records)
+
+    def ingest(self, records):
+        """Returns a dictionary with the number of CRFs created and the
+        errors of each rejected record keyed by record id.
+        """
+        errors = OrderedDict()
+        visit_keys = {}
+        for index, record in enumerate(records, start=1):
+            record_id = str(record.get('id') or index)
+            try:
+                visit_keys[index] = self.get_visit_key(record.get('subject_visit'))
+            except BulkCrfIngestionError as e:
+                errors[record_id] = str(e)
+        visits = self.get_visits(visit_keys.values())
+        validated = []
+        keys = set()
+        for index, record in enumerate(records, start=1):
+            record_id = str(record.get('id') or index)
+            if index not in visit_keys:
+                continue
+            visit = visits.get(visit_keys[index])
+            try:
+                model_cls = self.get_model_cls(record.get('model'))
+                if not visit:
+                    raise BulkCrfIngestionError(
+                        'Subject visit not found. '
+                        f'Got {record.get("subject_visit")}.')
+                if (model_cls, visit.pk) in keys:
+                    raise BulkCrfIngestionError(
+                        f'Duplicate {model_cls._meta.label_lower} for this visit '
+                        'in the batch.')
+                keys.add((model_cls, visit.pk))
+                validated.append(self.validate(model_cls, visit, record))
+            except BulkCrfIngestionError as e:
+                errors[record_id] = e.args[0] if e.args else str(e)
+        if errors and self.all_or_nothing:
+            return dict(created=0, errors=errors)
+        self.create(validated)
+        return dict(created=len(validated), errors=errors)
+
+    def get_model_cls(self, label):
+        try:
+            model_cls = django_apps.get_model(label or '')
+        except (LookupError, ValueError):
+            raise BulkCrfIngestionError(f'Unknown model. Got {label}.')
+        if (not issubclass(model_cls, CrfModelMixin)
+                or model_cls not in self.admin_site._registry):
+            raise BulkCrfIngestionError(f'Not a CRF. Got {label}.')
+        if not self.has_add_permission(model_cls):
+            raise BulkCrfIngestionError(
+                f'Permission denied to add {model_cls._meta.verbose_name}.')
+        return model_cls
+
+    def has_add_permission(self, model_cls):
+        """Returns True if there is no user, e.g. from the command line,
+        or if the user may add the model and the models of its admin
+        inlines.
+        """
+        if self.user is None:
+            return True
+        model_admin = self.admin_site._registry[model_cls]
+        for opts in [model_cls._meta] + [
+                inline.model._meta for inline in model_admin.inlines]:
+            if not self.user.has_perm(f'{opts.app_label}.add_{opts.model_name}'):
+                return False
+        return True
+
+    def get_visit_key(self, subject_visit):
+        """Returns the visit primary key as a string, or a tuple of
+        (subject_identifier, visit_code, visit_code_sequence), raising
+        BulkCrfIngestionError if invalid.
+        """
+        if isinstance(subject_visit, dict):
+            try:
+                visit_code_sequence = int(
+                    subject_visit.get('visit_code_sequence') or 0)
+            except (TypeError, ValueError):
+                raise BulkCrfIngestionError(
+                    'Invalid visit_code_sequence. '
+                    f'Got {subject_visit.get("visit_code_sequence")}.')
+            if (not subject_visit.get('subject_identifier')
+                    or not subject_visit.get('visit_code')):
+                raise BulkCrfIngestionError(
+                    'Subject visit requires subject_identifier and visit_code. '
+                    f'Got {subject_visit}.')
+            return (str(subject_visit.get('subject_identifier')),
+                    str(subject_visit.get('visit_code')), visit_code_sequence)
+        try:
+            return str(uuid.UUID(str(subject_visit)))
+        except ValueError:
+            raise BulkCrfIngestionError(
+                f'Invalid subject visit. Got {subject_visit}.')
+
+    def get_visits(self, visit_keys):
+        """Returns the visits of the visit keys, with one query, keyed
+        both by primary key and by (subject_identifier, visit_code,
+        visit_code_sequence).
+        """
+        visits = {}
+        for visit in self.get_visit_queryset(visit_keys):
+            visits[str(visit.pk)] = visit
+            visits[(visit.subject_identifier, visit.visit_code,
+                    visit.visit_code_sequence)] = visit
+        return visits
+
+    def get_visit_queryset(self, visit_keys):
+        pks, conditions = [], []
+        for key in visit_keys:
+            if isinstance(key, tuple):
+                conditions.append(Q(
+                    subject_identifier=key[0], visit_code=key[1],
+                    visit_code_sequence=key[2]))
+            else:
+                pks.append(key)
+        if pks:
+            conditions.append(Q(pk__in=pks))
+        if not conditions:
+            return self.visit_model_cls.objects.none()
+        return self.visit_model_cls.objects.filter(
+            reduce(lambda x, y: x | y, conditions)).select_related('appointment')
+
+    def get_form_classes(self, model_cls):
+        """Returns the form class and the inline formset classes of the
+        model's admin.
+        """
+        if model_cls not in self._form_classes:
+            model_admin = self.admin_site._registry[model_cls]
+            form_cls = modelform_factory(
+                model_cls, form=model_admin.form, exclude=self.exclude)
+            formset_classes = [
+                inlineformset_factory(
+                    model_cls, inline.model, form=inline.form,
+                    fk_name=inline.fk_name, fields='__all__', extra=0,
+                    can_delete=False)
+                for inline in model_admin.inlines]
+            self._form_classes[model_cls] = (form_cls, formset_classes)
+        return self._form_classes[model_cls]
+
+    def validate(self, model_cls, visit, record):
+        """Returns the visit, validated form and inline formsets of the
+        record, raising BulkCrfIngestionError with the form errors if
+        invalid.
+        """
+        form_cls, formset_classes = self.get_form_classes(model_cls)
+        data = dict(record.get('data') or {})
+        data.update(subject_visit=str(visit.pk))
+        inlines = record.get('inlines') or {}
+        for formset_cls in formset_classes:
+            prefix = formset_cls.get_default_prefix()
+            rows = inlines.get(prefix) or []
+            data.update({f'{prefix}-TOTAL_FORMS': len(rows),
+                         f'{prefix}-INITIAL_FORMS': 0})
+            for index, row in enumerate(rows):
+                data.update({f'{prefix}-{index}-{name}': value
+                             for name, value in row.items()})
+        form = form_cls(data=data)
+        formsets = [formset_cls(data=data, instance=form.instance)
+                    for formset_cls in formset_classes]
+        if not form.is_valid():
+            raise BulkCrfIngestionError(
+                {field: list(messages) for field, messages in form.errors.items()})
+        formset_errors = {}
+        for formset in formsets:
+            if not formset.is_valid():
+                formset_errors[formset.prefix] = (
+                    [{field: list(messages) for field, messages in errors.items()}
+                     for errors in formset.errors]
+                    + list(formset.non_form_errors()))
+        if formset_errors:
+            raise BulkCrfIngestionError(formset_errors)
+        consent = consent_lookup.get(
+            visit.subject_identifier, request=self.request)
+        report_datetime = form.cleaned_data.get('report_datetime')
+        if not consent or (
+                report_datetime and report_datetime < consent.consent_datetime):
+            raise BulkCrfIngestionError(
+                f'Subject {visit.subject_identifier} was not consented on '
+                f'{report_datetime}.')
+        obj = form.save(commit=False)
+        self.validate_schedule(obj, visit)
+        obj.subject_identifier = visit.subject_identifier
+        obj.form_version = form_version_registry.get(model_cls)
+        obj.consent_version = consent.version
+        obj.site_id = obj.site_id or visit.site_id
+        if self.user:
+            obj.user_created = self.user.username
+        return visit, form, formsets
+
+    def validate_schedule(self, obj, visit):
+        """Raises BulkCrfIngestionError if the subject is not on the
+        visit's schedule on the report date or the previous visit is
+        missing, as the CRF's save() would.
+        """
+        subject_schedule = SubjectSchedule(
+            visit_schedule=visit.visit_schedule, schedule=visit.schedule)
+        try:
+            subject_schedule.onschedule_or_raise(
+                subject_identifier=visit.subject_identifier,
+                report_datetime=obj.report_datetime,
+                compare_as_datetimes=obj.offschedule_compare_dates_as_datetimes)
+        except (NotOnScheduleError, NotOnScheduleForDateError) as e:
+            raise BulkCrfIngestionError(str(e))
+        try:
+            obj.visit_sequence_cls(
+                appointment=visit.appointment).enforce_sequence()
+        except VisitSequenceError as e:
+            raise BulkCrfIngestionError(str(e))
+
+    def create(self, validated):
+        """Inserts the CRFs and their inline rows in one transaction, then
+        updates the references, metadata and metadata rules.
+        """
+        objs, inline_objs, visits = OrderedDict(), OrderedDict(), OrderedDict()
+        for visit, form, formsets in validated:
+            objs.setdefault(form.instance.__class__, []).append(form.instance)
+            for formset in formsets:
+                for inline_obj in formset.save(commit=False):
+                    if self.user:
+                        inline_obj.user_created = self.user.username
+                    inline_objs.setdefault(inline_obj.__class__, []).append(
+                        inline_obj)
+            visits.setdefault(visit.pk, (visit, set()))[1].add(
+                form.instance._meta.label_lower)
+        with transaction.atomic():
+            for model_cls, model_objs in list(objs.items()) + list(
+                    inline_objs.items()):
+                model_cls.objects.bulk_create(
+                    model_objs, batch_size=self.batch_size)
+            for model_objs in list(objs.values()) + list(inline_objs.values()):
+                AdverseEventSummary.objects.add_objects(model_objs)
+                ChangelistDateBucket.objects.add_objects(model_objs)
+                AdverseEventTerm.objects.index_objects(model_objs)
+            for _, form, formsets in validated:
+                form.save_m2m()
+                for formset in formsets:
+                    formset.save_m2m()
+            for model_objs in objs.values():
+                for obj in model_objs:
+                    obj.update_reference_on_save()
+            for visit, labels in visits.values():
+                self.update_metadata(visit, labels)
+
+    def update_metadata(self, visit, labels):
+        """Sets the metadata of the visit's CRFs created to KEYED with one
+        query and runs the visit's metadata rules once.
+        """
+        self.metadata_model_cls.objects.filter(
+            subject_identifier=visit.subject_identifier,
+            model__in=labels,
+            **visit.metadata_query_options).exclude(
+                entry_status=KEYED).update(entry_status=KEYED)
+        if django_apps.get_app_config(
+                'edc_metadata_rules').metadata_rules_enabled:
+            visit.run_metadata_rules()
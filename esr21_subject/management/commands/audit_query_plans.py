@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...query_audit import QueryPlanAudit
+
+
+class Command(BaseCommand):
+
+    help = ('EXPLAIN the hot queries of signals, forms and admin and fail '
+            'if any reads a large table by sequential scan.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', dest='min_rows', type=int, default=None,
+            help='Ignore sequential scans of tables with at most this '
+                 'many rows. Defaults to AppConfig.query_audit_min_rows.')
+        parser.add_argument(
+            '--database', dest='database', default='default')
+
+    def handle(self, *args, **options):
+        audit = QueryPlanAudit(
+            min_rows=options.get('min_rows'), using=options.get('database'))
+        failures = audit.run()
+        for name, table, row_count, plan in failures:
+            self.stderr.write(
+                f'{name}: sequential scan on {table} ({row_count} rows)')
+            if options.get('verbosity') > 1:
+                self.stderr.write(plan)
+        if failures:
+            raise CommandError(
+                f'{len(failures)} hot queries read a table of more than '
+                f'{audit.min_rows} rows by sequential scan.')
+        self.stdout.write('No sequential scans over the size limit.')
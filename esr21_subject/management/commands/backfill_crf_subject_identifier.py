@@ -0,0 +1,42 @@
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import OuterRef, Q, Subquery
+from edc_base.utils import get_utcnow
+
+from ...models import SubjectVisit
+from ...models.model_mixins import CrfModelMixin
+
+
+class Command(BaseCommand):
+
+    help = ('Fill the subject identifier column of CRF rows saved before '
+            'it was added, with one UPDATE per CRF model. Sets `modified` '
+            'so the incremental export picks the rows up.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='CRF model labels, e.g. esr21_subject.vitalsigns. '
+                 'Defaults to all CRF models.')
+
+    def handle(self, *args, **options):
+        crf_models = [
+            model_cls for model_cls in
+            django_apps.get_app_config('esr21_subject').get_models()
+            if issubclass(model_cls, CrfModelMixin)]
+        if options.get('models'):
+            labels = [label.lower() for label in options.get('models')]
+            crf_models = [model_cls for model_cls in crf_models
+                          if model_cls._meta.label_lower in labels]
+            if len(crf_models) != len(labels):
+                raise CommandError(
+                    f'Expected CRF model labels. Got {", ".join(labels)}.')
+
+        subject_identifier = Subquery(SubjectVisit.objects.filter(
+            pk=OuterRef('subject_visit_id')).values('subject_identifier')[:1])
+        for model_cls in crf_models:
+            updated = model_cls._default_manager.filter(
+                Q(subject_identifier__isnull=True) | Q(subject_identifier='')
+            ).update(
+                subject_identifier=subject_identifier, modified=get_utcnow())
+            self.stdout.write(f'{model_cls._meta.label_lower}: {updated} rows')
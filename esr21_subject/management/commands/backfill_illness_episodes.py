@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from edc_base.utils import get_utcnow
+
+from ...models import OnScheduleIll
+
+
+class Command(BaseCommand):
+
+    help = ('Fill the episode column of illness onschedule rows saved '
+            'before it was added from their schedule name, with one UPDATE '
+            'per illness schedule. Sets `modified` so the incremental export '
+            'picks the rows up.')
+
+    def handle(self, *args, **options):
+        schedule_names = OnScheduleIll.objects.order_by().values_list(
+            'schedule_name', flat=True).distinct()
+        for schedule_name in schedule_names:
+            episode = OnScheduleIll.get_episode(schedule_name)
+            if not episode:
+                continue
+            updated = OnScheduleIll.objects.filter(
+                schedule_name=schedule_name).exclude(
+                    episode=episode).update(
+                        episode=episode, modified=get_utcnow())
+            self.stdout.write(f'{schedule_name}: {updated} rows')
@@ -0,0 +1,53 @@
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+
+from ...scheduling import BulkSchedulerError, put_on_schedule_many
+
+
+class Command(BaseCommand):
+
+    help = ('Put many subjects on one or more schedules, e.g. after a '
+            'consent import or a visit schedule change.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'subject_identifiers', nargs='*',
+            help='Subject identifiers. Defaults to all consented subjects.')
+        parser.add_argument(
+            '--schedule', dest='schedule_names', action='append', required=True,
+            help='Schedule name, e.g. esr21_sub_enrol_schedule. Repeat for '
+                 'more than one schedule.')
+        parser.add_argument(
+            '--onschedule-model', dest='onschedule_model',
+            default='esr21_subject.onschedule',
+            help='Label of the onschedule model for the schedules.')
+
+    def handle(self, *args, **options):
+        subject_identifiers = options.get('subject_identifiers')
+        if not subject_identifiers:
+            consent_model_cls = django_apps.get_model(
+                'esr21_subject.informedconsent')
+            subject_identifiers = consent_model_cls.objects.values_list(
+                'subject_identifier', flat=True).distinct()
+
+        try:
+            result = put_on_schedule_many(
+                subject_identifiers,
+                options.get('schedule_names'),
+                onschedule_model=options.get('onschedule_model'),
+                progress=self.progress)
+        except BulkSchedulerError as e:
+            raise CommandError(e)
+
+        for subject_identifier in result.get('skipped'):
+            self.stdout.write(self.style.WARNING(
+                f'Skipped {subject_identifier}. Not registered or consented.'))
+        for subject_identifier in result.get('full'):
+            self.stdout.write(self.style.WARNING(
+                f'Skipped {subject_identifier}. The cohort is full.'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {result.get("onschedules")} onschedule and '
+            f'{result.get("appointments")} appointment records.'))
+
+    def progress(self, done, total):
+        self.stdout.write(f'{done}/{total}')
@@ -0,0 +1,58 @@
+import os
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from ...exports import ColumnarExporter, ColumnarExporterError
+from ...models.model_mixins import CrfModelMixin
+
+
+class Command(BaseCommand):
+
+    help = 'Export CRF models to Parquet or Arrow IPC files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='Model labels, e.g. esr21_subject.vitalsigns. '
+                 'Defaults to all CRF models.')
+        parser.add_argument(
+            '--path', dest='path', default='.',
+            help='Directory to write the export files to.')
+        parser.add_argument(
+            '--format', dest='file_format', default='parquet',
+            choices=['parquet', 'arrow'],
+            help='Output file format.')
+        parser.add_argument(
+            '--batch-size', dest='batch_size', type=int, default=10000,
+            help='Number of rows fetched and written per row group.')
+
+    def handle(self, *args, **options):
+        path = options.get('path')
+        if not os.path.isdir(path):
+            raise CommandError(f'Invalid path. Got {path}.')
+
+        for model_cls in self.get_models(options.get('models')):
+            try:
+                exporter = ColumnarExporter(
+                    model_cls=model_cls,
+                    batch_size=options.get('batch_size'),
+                    file_format=options.get('file_format'))
+            except (ColumnarExporterError, ImproperlyConfigured) as e:
+                raise CommandError(e)
+            filename = os.path.join(
+                path, f'{model_cls._meta.label_lower}.{exporter.extension}')
+            row_count = exporter.write(filename)
+            self.stdout.write(self.style.SUCCESS(
+                f'Exported {row_count} rows to {filename}'))
+
+    def get_models(self, labels=None):
+        if labels:
+            try:
+                return [django_apps.get_model(label) for label in labels]
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+        app_config = django_apps.get_app_config('esr21_subject')
+        return [model_cls for model_cls in app_config.get_models()
+                if issubclass(model_cls, CrfModelMixin)]
@@ -0,0 +1,58 @@
+import os
+
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+
+from ...admin_site import esr21_subject_admin
+from ...exports import IncrementalExporter
+
+
+class Command(BaseCommand):
+
+    help = ('Export rows created, modified or deleted since the last export '
+            'for a consumer.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='Model labels, e.g. esr21_subject.adverseevent. Defaults to '
+                 'all models registered on the esr21_subject admin site.')
+        parser.add_argument(
+            '--consumer', dest='consumer', required=True,
+            help='Name of the downstream consumer the watermark is kept for.')
+        parser.add_argument(
+            '--path', dest='path', default='.',
+            help='Directory to write the export files to.')
+        parser.add_argument(
+            '--lag', dest='lag_seconds', type=int, default=60,
+            help='Seconds the upper bound trails the current time.')
+        parser.add_argument(
+            '--reset', dest='reset', action='store_true', default=False,
+            help='Discard the watermarks and export everything.')
+
+    def handle(self, *args, **options):
+        path = options.get('path')
+        if not os.path.isdir(path):
+            raise CommandError(f'Invalid path. Got {path}.')
+
+        for model_cls in self.get_models(options.get('models')):
+            exporter = IncrementalExporter(
+                model_cls=model_cls,
+                consumer=options.get('consumer'),
+                lag_seconds=options.get('lag_seconds'))
+            if options.get('reset'):
+                exporter.reset()
+            label = model_cls._meta.label_lower
+            changed_count, deleted_count = exporter.export(
+                os.path.join(path, f'{label}.changed.csv'),
+                os.path.join(path, f'{label}.deleted.csv'))
+            self.stdout.write(
+                f'{label}: {changed_count} changed, {deleted_count} deleted')
+
+    def get_models(self, labels=None):
+        if labels:
+            try:
+                return [django_apps.get_model(label) for label in labels]
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+        return list(esr21_subject_admin._registry)
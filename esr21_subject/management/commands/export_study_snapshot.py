@@ -0,0 +1,46 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...admin_site import esr21_subject_admin
+from ...exports import SnapshotExporter
+
+
+class Command(BaseCommand):
+
+    help = ('Export every model registered on the esr21_subject admin site '
+            'to a single zip archive with a manifest, in parallel. On '
+            'PostgreSQL all workers read one shared snapshot. On other '
+            'databases only rows created after the export started are '
+            'excluded, so rows changed during the export may be inconsistent.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', dest='path', default='.',
+            help='Directory to write the archive to.')
+        parser.add_argument(
+            '--workers', dest='workers', type=int, default=None,
+            help='Number of worker processes. Defaults to the CPU count.')
+        parser.add_argument(
+            '--chunk-size', dest='chunk_size', type=int, default=50000,
+            help='Number of rows per primary key range.')
+
+    def handle(self, *args, **options):
+        path = options.get('path')
+        if not os.path.isdir(path):
+            raise CommandError(f'Invalid path. Got {path}.')
+
+        exporter = SnapshotExporter(
+            models=list(esr21_subject_admin._registry),
+            workers=options.get('workers'),
+            chunk_size=options.get('chunk_size'))
+        archive_name = os.path.join(
+            path,
+            f'esr21_subject-{timezone.now().strftime("%Y%m%d%H%M%S")}.zip')
+        manifest = exporter.export(archive_name)
+
+        for label, row_count in manifest.get('row_counts').items():
+            self.stdout.write(f'{label}: {row_count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {len(manifest.get("files"))} files to {archive_name}'))
@@ -0,0 +1,35 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...screening import BulkScreening, BulkScreeningError
+
+
+class Command(BaseCommand):
+
+    help = ('Screen the candidates in a CSV file with columns age_in_years, '
+            'received_vaccines and, optionally, report_datetime.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', help='CSV file of candidates.')
+        parser.add_argument(
+            '--chunk-size', dest='chunk_size', type=int, default=1000)
+        parser.add_argument(
+            '--site-id', dest='site_id', type=int, default=None,
+            help='Site of the screenings. Defaults to the current site.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options.get('filename'), newline='') as f:
+                rows = list(csv.DictReader(f))
+        except OSError as e:
+            raise CommandError(e)
+        try:
+            result = BulkScreening(
+                chunk_size=options.get('chunk_size'),
+                site_id=options.get('site_id')).screen(rows)
+        except BulkScreeningError as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(
+            f'Screened {result.get("created")} candidates, '
+            f'{result.get("eligible")} eligible.'))
@@ -0,0 +1,47 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ...ingestion import BulkCrfIngestion, BulkCrfIngestionError
+
+
+class Command(BaseCommand):
+
+    help = ('Validate and insert the CRFs in a JSON lines file, e.g. from an '
+            'offline tablet, and report the records rejected.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', help='JSON lines file of CRF records.')
+        parser.add_argument(
+            '--all-or-nothing', dest='all_or_nothing', action='store_true',
+            default=False,
+            help='Insert nothing if any record is rejected.')
+        parser.add_argument(
+            '--batch-size', dest='batch_size', type=int, default=500)
+        parser.add_argument(
+            '--username', dest='username', default=None,
+            help='User the CRFs are created by.')
+
+    def handle(self, *args, **options):
+        user = None
+        if options.get('username'):
+            try:
+                user = get_user_model().objects.get(
+                    username=options.get('username'))
+            except get_user_model().DoesNotExist:
+                raise CommandError(
+                    f'Unknown user. Got {options.get("username")}.')
+        try:
+            with open(options.get('filename')) as f:
+                result = BulkCrfIngestion(
+                    all_or_nothing=options.get('all_or_nothing'),
+                    batch_size=options.get('batch_size'),
+                    user=user).ingest_lines(f)
+        except (OSError, BulkCrfIngestionError) as e:
+            raise CommandError(e)
+        for record_id, error in result.get('errors').items():
+            self.stderr.write(f'{record_id}: {json.dumps(error)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {result.get("created")} CRFs, '
+            f'{len(result.get("errors"))} records rejected.'))
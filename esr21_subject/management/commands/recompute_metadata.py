@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from ...metadata_recompute import MetadataRecompute
+
+
+class Command(BaseCommand):
+
+    help = ('Recompute the CRF metadata of subjects from the visit schedule '
+            'and metadata rule groups, e.g. after the rules change.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'subject_identifiers', nargs='*',
+            help='Subjects to recompute. Defaults to every subject with a visit.')
+        parser.add_argument(
+            '--chunk-size', dest='chunk_size', type=int, default=200,
+            help='Number of subjects per chunk.')
+        parser.add_argument(
+            '--workers', dest='workers', type=int, default=None,
+            help='Number of worker processes. Defaults to the number of CPUs.')
+        parser.add_argument(
+            '--dry-run', dest='dry_run', action='store_true', default=False,
+            help='Report the changes without writing them.')
+
+    def handle(self, *args, **options):
+        result = MetadataRecompute(
+            chunk_size=options.get('chunk_size'),
+            workers=options.get('workers'),
+            dry_run=options.get('dry_run')).recompute(
+                options.get('subject_identifiers'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would recompute" if options.get("dry_run") else "Recomputed"} '
+            f'metadata of {result.get("subjects")} subjects: '
+            f'{result.get("created")} created, {result.get("updated")} updated.'))
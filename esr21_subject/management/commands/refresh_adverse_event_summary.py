@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...models import AdverseEventSummary
+
+
+class Command(BaseCommand):
+
+    help = ('Recount the adverse event summary counters from the AE, SAE '
+            'and AESI tables, e.g. after loading data without signals.')
+
+    def handle(self, *args, **options):
+        summaries = AdverseEventSummary.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted {len(summaries)} adverse event summary counters.'))
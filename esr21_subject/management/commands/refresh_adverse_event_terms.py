@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...models import AdverseEventTerm
+
+
+class Command(BaseCommand):
+
+    help = ('Rebuild the AE, SAE and AESI term index used by the adverse '
+            'event search, e.g. after loading data without signals.')
+
+    def handle(self, *args, **options):
+        count = AdverseEventTerm.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed the terms of {count} adverse events.'))
@@ -0,0 +1,36 @@
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from ...admin_site import esr21_subject_admin
+
+
+class Command(BaseCommand):
+
+    help = ('Recompute the per-day row counts used by the keyset '
+            'changelists for their date drilldown. Signals keep the counts '
+            'current; run this after queryset updates or deletes that '
+            'bypass them.')
+
+    def handle(self, *args, **options):
+        bucket_model_cls = django_apps.get_model(
+            'esr21_subject.changelistdatebucket')
+        for model_cls, model_admin in esr21_subject_admin._registry.items():
+            if not getattr(model_admin, 'keyset_pagination', False):
+                continue
+            label = model_cls._meta.label_lower
+            field = model_admin.date_hierarchy
+            counts = model_cls._default_manager.order_by().annotate(
+                date=TruncDate(field)).values('date').annotate(
+                    total=Count('pk')).values_list('date', 'total')
+            buckets = [
+                bucket_model_cls(
+                    model=label, year=date.year, month=date.month,
+                    day=date.day, count=total)
+                for date, total in counts if date]
+            with transaction.atomic():
+                bucket_model_cls.objects.filter(model=label).delete()
+                bucket_model_cls.objects.bulk_create(buckets)
+            self.stdout.write(f'{label}: {len(buckets)} days')
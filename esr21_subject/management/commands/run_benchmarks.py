@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import EnrolmentBenchmark
+from ...benchmarks import compare_to_baseline, load_baseline, save_baseline
+
+
+class Command(BaseCommand):
+
+    help = ('Time the enrolment to visit workflow for N participants and '
+            'compare it to the baseline. All rows created are rolled back. '
+            'Run against a benchmark database, not a study database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--n', dest='sizes', type=int, nargs='+', default=[100, 1000, 10000],
+            help='Number of participants per run.')
+        parser.add_argument(
+            '--baseline', dest='baseline', default=None,
+            help='Baseline JSON file. Defaults to tests/benchmark_baseline.json.')
+        parser.add_argument(
+            '--tolerance', dest='tolerance', type=float, default=0.25,
+            help='Allowed slowdown per operation, as a fraction.')
+        parser.add_argument(
+            '--query-tolerance', dest='query_tolerance', type=float,
+            default=0.05,
+            help='Allowed increase in queries per operation, as a fraction.')
+        parser.add_argument(
+            '--update-baseline', dest='update_baseline', action='store_true',
+            default=False,
+            help='Write the results to the baseline instead of comparing.')
+
+    def handle(self, *args, **options):
+        baseline = load_baseline(options.get('baseline'))
+        results = {}
+        regressions = []
+        for n in options.get('sizes'):
+            results[n] = EnrolmentBenchmark(n=n).run(rollback=True)
+            for stage, result in results[n].items():
+                self.stdout.write(
+                    f'n={n} {stage}: {result["operations"]} operations, '
+                    f'{result["seconds"]:.2f}s, {result["queries"]} queries '
+                    f'({result["queries_per_operation"]:.1f} per operation)')
+            regressions.extend(compare_to_baseline(
+                n, results[n], baseline, tolerance=options.get('tolerance'),
+                query_tolerance=options.get('query_tolerance')))
+
+        if options.get('update_baseline'):
+            save_baseline(results, options.get('baseline'))
+            self.stdout.write('Baseline updated.')
+        elif regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(
+                f'{len(regressions)} stages regressed against the baseline.')
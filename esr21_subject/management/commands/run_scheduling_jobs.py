@@ -0,0 +1,32 @@
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand
+
+from ...constants import JOB_FAILED, JOB_PENDING
+from ...scheduling import async_scheduler
+
+
+class Command(BaseCommand):
+
+    help = ('Run post-consent scheduling jobs left pending, failed and due '
+            'for a retry, or running past their lease, e.g. after a restart. '
+            'Each job is attempted once.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed', dest='retry_failed', action='store_true',
+            default=False,
+            help='Also retry jobs that used all their attempts.')
+
+    def handle(self, *args, **options):
+        job_model_cls = django_apps.get_model(async_scheduler.job_model)
+        if options.get('retry_failed'):
+            job_model_cls.objects.filter(status=JOB_FAILED).update(
+                status=JOB_PENDING, attempts=0, next_run_datetime=None)
+        subject_identifiers = job_model_cls.objects.filter(
+            async_scheduler.due).values_list('subject_identifier', flat=True)
+        for subject_identifier in list(subject_identifiers):
+            async_scheduler.run_once(subject_identifier)
+        counts = {status: job_model_cls.objects.filter(status=status).count()
+                  for status in [JOB_PENDING, JOB_FAILED]}
+        self.stdout.write(
+            f'{counts.get(JOB_PENDING)} pending, {counts.get(JOB_FAILED)} failed.')
@@ -0,0 +1,233 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from django import db
+from django.apps import apps as django_apps
+from django.db import transaction
+from edc_metadata import MetadataUpdater as BaseMetadataUpdater
+from edc_metadata.constants import KEYED, NOT_REQUIRED, REQUIRED
+from edc_metadata_rules import CrfRuleGroup, site_metadata_rules
+from edc_visit_tracking.constants import MISSED_VISIT
+
+
+def close_connections():
+    """Pool initializer: drop connections inherited from the parent so
+    each worker opens its own.
+    """
+    db.connections.close_all()
+
+
+def recompute_subjects(task):
+    """Recomputes the CRF metadata of one chunk of subjects and returns
+    the number of metadata rows created and updated.
+    """
+    subject_identifiers, dry_run = task
+    return MetadataRecompute(dry_run=dry_run).recompute_chunk(subject_identifiers)
+
+
+class MetadataUpdater(BaseMetadataUpdater):
+    """Sets the entry status a rule gives a CRF on the metadata read by
+    MetadataRecompute for the visit's chunk, instead of reading and
+    saving the metadata row.
+
+    Visits not being recomputed are updated as by edc_metadata.
+    """
+
+    def update(self, entry_status=None):
+        update = getattr(self.visit_model_instance, '_metadata_update', None)
+        if update is None:
+            return super().update(entry_status=entry_status)
+        return update(self.target_model, entry_status)
+
+
+class MetadataRecompute:
+    """Rebuilds the CRF metadata of many subjects as re-saving each
+    visit would, e.g. after the metadata rule groups change.
+
+    Per chunk of subjects, visits, metadata and which CRFs are keyed
+    are read with one query each (one per CRF model for the latter).
+    Entry statuses are set from the visit schedule, then each CRF rule
+    group's `evaluate_rules` is run per visit with a MetadataUpdater
+    that changes the metadata in memory. The changes are written with
+    one `bulk_create` and one `bulk_update`. Chunks run in a pool of
+    worker processes, one database connection per worker.
+    """
+
+    metadata_model = 'edc_metadata.crfmetadata'
+    visit_model = 'esr21_subject.subjectvisit'
+    metadata_updater_cls = MetadataUpdater
+
+    def __init__(self, chunk_size=None, workers=None, dry_run=None):
+        self.chunk_size = chunk_size or 200
+        self.workers = workers or os.cpu_count()
+        self.dry_run = dry_run
+
+    @property
+    def metadata_model_cls(self):
+        return django_apps.get_model(self.metadata_model)
+
+    @property
+    def visit_model_cls(self):
+        return django_apps.get_model(self.visit_model)
+
+    @property
+    def rule_groups(self):
+        """Returns the CRF rule groups of the visit model's app, as run
+        by the visit's `run_metadata_rules`, or an empty list if rules
+        are disabled.
+        """
+        if not django_apps.get_app_config(
+                'edc_metadata_rules').metadata_rules_enabled:
+            return []
+        return [rule_group for rule_group in site_metadata_rules.registry.get(
+            self.visit_model_cls._meta.app_label, [])
+            if issubclass(rule_group, CrfRuleGroup)]
+
+    def chunks(self, subject_identifiers=None):
+        if not subject_identifiers:
+            subject_identifiers = self.visit_model_cls.objects.order_by(
+                'subject_identifier').values_list(
+                    'subject_identifier', flat=True).distinct()
+        subject_identifiers = list(subject_identifiers)
+        for start in range(0, len(subject_identifiers), self.chunk_size):
+            yield subject_identifiers[start:start + self.chunk_size]
+
+    def recompute(self, subject_identifiers=None):
+        """Recomputes the metadata of the subjects, or of every subject
+        with a visit, and returns the number of rows created and updated.
+        """
+        tasks = [(chunk, self.dry_run) for chunk in self.chunks(subject_identifiers)]
+        if self.workers > 1 and len(tasks) > 1:
+            db.connections.close_all()
+            with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=close_connections) as executor:
+                results = list(executor.map(recompute_subjects, tasks))
+        else:
+            results = [recompute_subjects(task) for task in tasks]
+        return dict(
+            subjects=sum(len(task[0]) for task in tasks),
+            created=sum(result.get('created') for result in results),
+            updated=sum(result.get('updated') for result in results))
+
+    def recompute_chunk(self, subject_identifiers):
+        visits = list(self.get_visit_queryset(subject_identifiers))
+        metadata = OrderedDict(
+            (self.get_key(obj.subject_identifier, obj.__dict__, obj.model), obj)
+            for obj in self.metadata_model_cls.objects.filter(
+                subject_identifier__in=subject_identifiers))
+        original = {key: obj.entry_status for key, obj in metadata.items()}
+        keyed = self.get_keyed(visits)
+        rule_groups = self.rule_groups
+        with self.batched_updates(rule_groups):
+            for visit in visits:
+                self.apply_schedule(visit, metadata, keyed)
+                if visit.reason == MISSED_VISIT:
+                    continue
+                visit._metadata_update = partial(
+                    self.update, visit, metadata=metadata, keyed=keyed)
+                for rule_group in rule_groups:
+                    rule_group.evaluate_rules(visit=visit)
+        created = [obj for key, obj in metadata.items() if key not in original]
+        updated = [obj for key, obj in metadata.items()
+                   if key in original and obj.entry_status != original[key]]
+        if not self.dry_run:
+            with transaction.atomic():
+                self.metadata_model_cls.objects.bulk_create(created)
+                self.metadata_model_cls.objects.bulk_update(
+                    updated, ['entry_status'], batch_size=500)
+        return dict(created=len(created), updated=len(updated))
+
+    def get_visit_queryset(self, subject_identifiers):
+        return self.visit_model_cls.objects.filter(
+            subject_identifier__in=subject_identifiers).select_related(
+                'appointment').order_by('subject_identifier', 'report_datetime')
+
+    @contextmanager
+    def batched_updates(self, rule_groups):
+        """Sets the rule groups' metadata updater to one that updates
+        the chunk's metadata in memory, restoring it on exit.
+        """
+        originals = [(rule_group, rule_group.__dict__.get('metadata_updater_cls'))
+                     for rule_group in rule_groups]
+        for rule_group in rule_groups:
+            rule_group.metadata_updater_cls = self.metadata_updater_cls
+        try:
+            yield
+        finally:
+            for rule_group, original in originals:
+                if original is None:
+                    del rule_group.metadata_updater_cls
+                else:
+                    rule_group.metadata_updater_cls = original
+
+    def get_key(self, subject_identifier, options, model):
+        return (subject_identifier, options.get('visit_schedule_name'),
+                options.get('schedule_name'), options.get('visit_code'),
+                options.get('visit_code_sequence'), model)
+
+    def get_keyed(self, visits):
+        """Returns a set of (visit pk, CRF label) for the CRFs keyed for
+        the visits, with one query per CRF model scheduled.
+        """
+        labels = set()
+        for visit in visits:
+            labels.update(crf.model for crf in visit.visit.all_crfs)
+        keyed = set()
+        visit_pks = [visit.pk for visit in visits]
+        for label in labels:
+            model_cls = django_apps.get_model(label)
+            keyed.update(
+                (visit_pk, label) for visit_pk in model_cls.objects.filter(**{
+                    f'{model_cls.visit_model_attr()}__in': visit_pks}).values_list(
+                        f'{model_cls.visit_model_attr()}_id', flat=True))
+        return keyed
+
+    def get_metadata_obj(self, visit, crf, metadata):
+        """Returns the metadata of the CRF for the visit, adding a new
+        one with the scheduled entry status if there is none.
+        """
+        options = visit.metadata_query_options
+        key = self.get_key(visit.subject_identifier, options, crf.model)
+        if key not in metadata:
+            metadata[key] = self.metadata_model_cls(
+                entry_status=REQUIRED if crf.required else NOT_REQUIRED,
+                show_order=crf.show_order,
+                site_id=visit.site_id,
+                subject_identifier=visit.subject_identifier,
+                model=crf.model,
+                **options)
+        return metadata[key]
+
+    def apply_schedule(self, visit, metadata, keyed):
+        """Sets the entry status of each CRF of the visit as scheduled,
+        or KEYED if entered.
+        """
+        if visit.reason == MISSED_VISIT:
+            crfs = visit.visit.crfs_missed
+        elif visit.visit_code_sequence != 0:
+            crfs = visit.visit.crfs_unscheduled
+        else:
+            crfs = visit.visit.crfs
+        for crf in crfs:
+            obj = self.get_metadata_obj(visit, crf, metadata)
+            if obj.entry_status in [REQUIRED, NOT_REQUIRED]:
+                obj.entry_status = REQUIRED if crf.required else NOT_REQUIRED
+            if (visit.pk, crf.model) in keyed:
+                obj.entry_status = KEYED
+
+    def update(self, visit, target_model, entry_status, metadata=None,
+               keyed=None):
+        """Sets the entry status a rule gives the CRF for the visit, or
+        KEYED if entered, as MetadataUpdater.update does.
+        """
+        crf = [crf for crf in visit.visit.all_crfs if crf.model == target_model][0]
+        obj = self.get_metadata_obj(visit, crf, metadata)
+        if (visit.pk, target_model) in keyed:
+            entry_status = KEYED
+        if entry_status:
+            obj.entry_status = entry_status
+        return obj
@@ -1,10 +1,16 @@
 from .adverse_event import AdverseEvent
+from .adverse_event_summary import AdverseEventSummary
+from .adverse_event_term import AdverseEventTerm
+from .changelist_date_bucket import ChangelistDateBucket
+from .cohort_capacity import CohortCapacity
 from .concomitant_medication import ConcomitantMedication
 from .covid19_preventative_behaviours import Covid19PreventativeBehaviours
 from .covid19_symptomatic_infections import Covid19SymptomaticInfections
 from .demographics_data import DemographicsData
 from .eligibility_confirmation import EligibilityConfirmation
+from .export_watermark import ExportWatermark
 from .hospitalisation import Hospitalisation
+from .identifier_sequence import IdentifierSequence
 from .informed_consent import InformedConsent
 from .medical_history import MedicalDiagnosis
 from .medical_history import MedicalHistory
@@ -16,6 +22,7 @@ from .pregnancy_status import PregnancyStatus
 from .pregnancy_test import PregnancyTest
 from .rapid_hiv_testing import RapidHIVTesting
 from .sample_collection import SampleCollection
+from .scheduling_job import SchedulingJob
 from .serious_adverse_event import SeriousAdverseEvent
 from .signals import informed_consent_on_post_save
 from .special_interest_adverse_event import SpecialInterestAdverseEvent
@@ -0,0 +1,159 @@
+from collections import Counter
+
+from django.apps import apps as django_apps
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Sum
+from edc_base.model_mixins import BaseUuidModel
+
+TOTAL = 'total'
+
+# site_id of the counters of events without a site, so the unique
+# constraint also holds for them
+NO_SITE = 0
+
+SUMMARY_FIELDS = {
+    'esr21_subject.adverseevent': [
+        'ae_grade', 'serious_event', 'special_interest_ae', 'covid_related_ae',
+        'study_treatmnt_rel'],
+    'esr21_subject.seriousadverseevent': [],
+    'esr21_subject.specialinterestadverseevent': ['aesi_category'],
+}
+
+SUMMARY_M2M_FIELDS = {
+    'esr21_subject.seriousadverseevent': ['seriousness_criteria'],
+}
+
+
+def get_summary_counts(obj, values=None):
+    """Returns a Counter of (field, value) for the summary fields of a
+    model instance, or of its `values` if given, plus its total.
+    """
+    label = obj._meta.label_lower
+    values = values if values is not None else {
+        field: getattr(obj, field) for field in SUMMARY_FIELDS.get(label, [])}
+    counts = Counter({(TOTAL, ''): 1})
+    counts.update((field, value or '') for field, value in values.items())
+    return counts
+
+
+class AdverseEventSummaryManager(models.Manager):
+
+    def add(self, model, counts, site_id=None):
+        """Adds the Counter of (field, value) deltas to the counters of
+        the model and site, one UPDATE per counter changed.
+        """
+        site_id = NO_SITE if site_id is None else site_id
+        for (field, value), delta in counts.items():
+            if not delta:
+                continue
+            options = dict(model=model, field=field, value=value, site_id=site_id)
+            with transaction.atomic(using=self.db):
+                if not self.filter(**options).update(count=F('count') + delta):
+                    try:
+                        with transaction.atomic(using=self.db):
+                            self.create(count=delta, **options)
+                    except IntegrityError:
+                        self.filter(**options).update(count=F('count') + delta)
+
+    def add_objects(self, objs, sign=1):
+        """Counts model instances created, or deleted if `sign` is -1,
+        e.g. by `bulk_create`.
+        """
+        counts = {}
+        for obj in objs:
+            label = obj._meta.label_lower
+            if label not in SUMMARY_FIELDS:
+                continue
+            key = (label, obj.site_id)
+            counts.setdefault(key, Counter()).update(get_summary_counts(obj))
+        for (label, site_id), model_counts in counts.items():
+            self.add(label, Counter(
+                {key: sign * count for key, count in model_counts.items()}),
+                site_id=site_id)
+
+    def summary(self, site_id=None):
+        """Returns a list of dictionaries, one per model, with its total
+        and the counts per value of each summary field.
+        """
+        queryset = self.all() if site_id is None else self.filter(site_id=site_id)
+        totals = {
+            (model, field, value): total for model, field, value, total in
+            queryset.order_by().values('model', 'field', 'value').annotate(
+                total=Sum('count')).values_list('model', 'field', 'value', 'total')
+            if total}
+        sections = []
+        for label, fields in SUMMARY_FIELDS.items():
+            model_cls = django_apps.get_model(label)
+            section = dict(
+                model=label,
+                verbose_name=model_cls._meta.verbose_name_plural,
+                total=totals.get((label, TOTAL, ''), 0),
+                fields=[])
+            for field_name in fields + SUMMARY_M2M_FIELDS.get(label, []):
+                field = model_cls._meta.get_field(field_name)
+                choices = dict(field.flatchoices)
+                section['fields'].append(dict(
+                    name=field_name,
+                    verbose_name=field.verbose_name,
+                    counts=sorted(
+                        [(choices.get(value, value) or 'Not answered', total)
+                         for (model, name, value), total in totals.items()
+                         if model == label and name == field_name],
+                        key=lambda count: -count[1])))
+            sections.append(section)
+        return sections
+
+    def rebuild(self):
+        """Recounts every counter from the adverse event tables.
+        """
+        summaries = []
+        for label, fields in SUMMARY_FIELDS.items():
+            model_cls = django_apps.get_model(label)
+            group_bys = [(TOTAL, None)] + [(field, field) for field in fields]
+            group_bys += [(field, f'{field}__short_name')
+                          for field in SUMMARY_M2M_FIELDS.get(label, [])]
+            for field, lookup in group_bys:
+                names = ['site_id', lookup] if lookup else ['site_id']
+                rows = model_cls._default_manager.order_by().values(
+                    *names).annotate(total=Count('pk')).values_list(
+                        *names, 'total')
+                for row in rows:
+                    if lookup and row[1] is None and field != lookup:
+                        continue
+                    summaries.append(self.model(
+                        model=label, field=field,
+                        value=(row[1] or '') if lookup else '',
+                        site_id=NO_SITE if row[0] is None else row[0],
+                        count=row[-1]))
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(summaries)
+        return summaries
+
+
+class AdverseEventSummary(BaseUuidModel):
+
+    """Counts of adverse events, SAEs and AESIs per site and value of
+    each summary field, kept up to date by signals.
+    """
+
+    model = models.CharField(
+        verbose_name='Model',
+        max_length=100)
+
+    field = models.CharField(max_length=50)
+
+    value = models.CharField(max_length=100, blank=True)
+
+    site_id = models.IntegerField(default=NO_SITE)
+
+    count = models.IntegerField(default=0)
+
+    objects = AdverseEventSummaryManager()
+
+    def __str__(self):
+        return f'{self.model} {self.field}={self.value}: {self.count}'
+
+    class Meta:
+        app_label = 'esr21_subject'
+        unique_together = ('model', 'field', 'value', 'site_id')
@@ -0,0 +1,188 @@
+import re
+
+from django.apps import apps as django_apps
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+from edc_base.model_mixins import BaseUuidModel
+
+TERM_FIELDS = {
+    'esr21_subject.adverseevent': ['ae_name', 'meddra_pname', 'meddra_pcode'],
+    'esr21_subject.seriousadverseevent': [
+        'sae_name', 'meddra_pname', 'meddra_pcode'],
+    'esr21_subject.specialinterestadverseevent': [
+        'aesi_name', 'meddra_pname', 'meddra_pcode'],
+}
+
+
+def tokenize(value):
+    """Returns the lower case words of a term, e.g. 'Injection-site
+    pain' as ['injection', 'site', 'pain'].
+    """
+    return re.findall(r'\w+', str(value or '').lower())
+
+
+class AdverseEventTermManager(models.Manager):
+
+    min_prefix_length = 2
+
+    def get_terms(self, obj):
+        """Returns the term rows of an AE, SAE or AESI instance.
+        """
+        label = obj._meta.label_lower
+        adverse_event = getattr(obj, 'adverse_event', obj)
+        tokens = set()
+        for field in TERM_FIELDS[label]:
+            tokens.update(token[:100] for token in tokenize(getattr(obj, field)))
+        return [self.model(
+            model=label, object_id=str(obj.pk), token=token,
+            report_datetime=adverse_event.report_datetime) for token in tokens]
+
+    def index_objects(self, objs):
+        """Replaces the term rows of the model instances, e.g. those
+        created by `bulk_create`.
+        """
+        objs = [obj for obj in objs if obj._meta.label_lower in TERM_FIELDS]
+        if not objs:
+            return
+        terms = []
+        for obj in objs:
+            terms.extend(self.get_terms(obj))
+        with transaction.atomic(using=self.db):
+            self.unindex(objs)
+            self.bulk_create(terms)
+
+    def unindex(self, objs):
+        object_ids = {}
+        for obj in objs:
+            object_ids.setdefault(obj._meta.label_lower, []).append(str(obj.pk))
+        for model, pks in object_ids.items():
+            self.filter(model=model, object_id__in=pks).delete()
+
+    def search(self, search_term, models=None, limit=None):
+        """Returns a list of (model, object_id) of the events with a
+        term word starting with each word of the search term, latest
+        first, limited to `models` if given.
+
+        Each word matches on the prefix index of `token`. Rows are
+        grouped by event in one query, keeping the events with a match
+        for every word (HAVING) and applying the limit in SQL.
+        """
+        queryset = self.get_search_queryset(search_term, models=models)
+        if limit:
+            queryset = queryset[:limit]
+        return [(row['model'], row['object_id']) for row in queryset]
+
+    def get_search_queryset(self, search_term, models=None):
+        """Returns the grouped query of `search`, as values of model
+        and object_id.
+        """
+        words = [word for word in tokenize(search_term)
+                 if len(word) >= self.min_prefix_length or word.isdigit()]
+        if not words or models is not None and not models:
+            return self.none().values('model', 'object_id')
+        condition = Q()
+        for word in words:
+            condition |= Q(token__startswith=word)
+        queryset = self.filter(condition)
+        if models is not None:
+            queryset = queryset.filter(model__in=models)
+        matched = {
+            f'word_{index}': Max(Case(
+                When(token__startswith=word, then=Value(1)),
+                default=Value(0), output_field=IntegerField()))
+            for index, word in enumerate(words)}
+        return queryset.values('model', 'object_id').annotate(
+            latest=Max('report_datetime'), **matched).filter(
+                **{name: 1 for name in matched}).order_by(
+                    F('latest').desc(nulls_last=True), 'model', 'object_id')
+
+    def search_events(self, search_term, models=None, limit=None):
+        """Returns a list of the AEs, SAEs and AESIs matching the search
+        term as dictionaries with the subject and visit, reading each
+        model's matches with one query.
+        """
+        keys = self.search(search_term, models=models, limit=limit or 200)
+        object_ids = {}
+        for model, object_id in keys:
+            object_ids.setdefault(model, []).append(object_id)
+        objs = {}
+        for model, pks in object_ids.items():
+            model_cls = django_apps.get_model(model)
+            visit_lookup = 'subject_visit'
+            if model_cls is not self.adverse_event_model_cls:
+                visit_lookup = 'adverse_event__subject_visit'
+            for obj in model_cls.objects.filter(pk__in=pks).select_related(
+                    visit_lookup):
+                objs[(model, str(obj.pk))] = obj
+        events = []
+        for key in keys:
+            obj = objs.get(key)
+            if not obj:
+                continue
+            adverse_event = getattr(obj, 'adverse_event', obj)
+            name_field = TERM_FIELDS[key[0]][0]
+            events.append(dict(
+                model=key[0],
+                verbose_name=obj._meta.verbose_name,
+                obj=obj,
+                subject_identifier=adverse_event.subject_identifier,
+                visit_code=adverse_event.subject_visit.visit_code,
+                report_datetime=adverse_event.report_datetime,
+                name=getattr(obj, name_field),
+                meddra_pname=obj.meddra_pname,
+                meddra_pcode=obj.meddra_pcode))
+        return events
+
+    @property
+    def adverse_event_model_cls(self):
+        return django_apps.get_model('esr21_subject.adverseevent')
+
+    def rebuild(self):
+        """Re-indexes every AE, SAE and AESI.
+        """
+        count = 0
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            for label in TERM_FIELDS:
+                model_cls = django_apps.get_model(label)
+                queryset = model_cls.objects.all()
+                if model_cls is not self.adverse_event_model_cls:
+                    queryset = queryset.select_related('adverse_event')
+                terms = []
+                for obj in queryset.iterator(chunk_size=2000):
+                    terms.extend(self.get_terms(obj))
+                    count += 1
+                    if len(terms) >= 2000:
+                        self.bulk_create(terms)
+                        terms = []
+                self.bulk_create(terms)
+        return count
+
+
+class AdverseEventTerm(BaseUuidModel):
+
+    """One word of the name, MedDRA preferred name or MedDRA code of an
+    AE, SAE or AESI, indexed for prefix search across the three models.
+    """
+
+    model = models.CharField(
+        verbose_name='Model',
+        max_length=100)
+
+    object_id = models.CharField(max_length=36)
+
+    token = models.CharField(max_length=100)
+
+    report_datetime = models.DateTimeField(null=True)
+
+    objects = AdverseEventTermManager()
+
+    def __str__(self):
+        return f'{self.model} {self.object_id} {self.token}'
+
+    class Meta:
+        app_label = 'esr21_subject'
+        indexes = [
+            models.Index(fields=['token', 'model'], name='ae_term_token_idx',
+                         opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+            models.Index(fields=['model', 'object_id'])]
@@ -0,0 +1,77 @@
+from collections import Counter
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+from edc_base.model_mixins import BaseUuidModel
+
+# models whose admin changelists page by keyset and drill down by the
+# date buckets
+BUCKET_MODELS = [
+    'esr21_subject.adverseevent',
+    'esr21_subject.subjectrequisition',
+    'esr21_subject.subjectvisit',
+]
+
+
+def get_bucket_date(value):
+    """Returns the date of `modified` as the changelist date drilldown
+    filters it, in the current time zone.
+    """
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+class ChangelistDateBucketManager(models.Manager):
+
+    def add(self, model, date, delta):
+        """Adds `delta` to the count of the model's rows modified on the
+        date.
+        """
+        if not delta:
+            return
+        options = dict(model=model, year=date.year, month=date.month, day=date.day)
+        with transaction.atomic(using=self.db):
+            if not self.filter(**options).update(count=F('count') + delta):
+                try:
+                    with transaction.atomic(using=self.db):
+                        self.create(count=delta, **options)
+                except IntegrityError:
+                    self.filter(**options).update(count=F('count') + delta)
+
+    def add_objects(self, objs):
+        """Counts model instances created, e.g. by `bulk_create`.
+        """
+        counts = Counter(
+            (obj._meta.label_lower, get_bucket_date(obj.modified))
+            for obj in objs if obj._meta.label_lower in BUCKET_MODELS)
+        for (model, date), count in counts.items():
+            self.add(model, date, count)
+
+
+class ChangelistDateBucket(BaseUuidModel):
+
+    """Row counts per model and day of `modified`, used for the admin
+    changelist date drilldown instead of aggregating the model's table.
+    Kept up to date by signals.
+    """
+
+    model = models.CharField(
+        verbose_name='Model',
+        max_length=100)
+
+    year = models.IntegerField()
+
+    month = models.IntegerField()
+
+    day = models.IntegerField()
+
+    count = models.IntegerField(default=0)
+
+    objects = ChangelistDateBucketManager()
+
+    def __str__(self):
+        return f'{self.model} {self.year}-{self.month:02d}-{self.day:02d}'
+
+    class Meta:
+        app_label = 'esr21_subject'
+        unique_together = ('model', 'year', 'month', 'day')
@@ -0,0 +1,110 @@
+from django.apps import apps as django_apps
+from django.db import IntegrityError, models, transaction
+from edc_base.model_mixins import BaseUuidModel
+
+
+def get_capacity(name):
+    """Returns the configured capacity of a cohort, or None if
+    enrolment into it is not capped.
+    """
+    return django_apps.get_app_config('esr21_subject').cohort_capacities.get(name)
+
+
+class CohortCapacityManager(models.Manager):
+
+    onschedule_model = 'esr21_subject.onschedule'
+
+    def get_for_update(self, name):
+        """Returns the counter row for a cohort locked for the rest of
+        the current transaction, creating it on first use from the
+        number of participants already on the cohort's enrolment schedule.
+        """
+        try:
+            return self.get_locked(name).get()
+        except self.model.DoesNotExist:
+            enrolled = self.get_enrolled(name).count()
+            try:
+                with transaction.atomic():
+                    self.create(name=name, enrolled=enrolled)
+            except IntegrityError:
+                pass
+            return self.get_locked(name).get()
+
+    def get_locked(self, name):
+        return self.select_for_update().filter(name=name)
+
+    def get_enrolled(self, name):
+        return django_apps.get_model(self.onschedule_model).objects.filter(
+            schedule_name=f'{name}_enrol_schedule')
+
+    def reserve(self, name):
+        """Takes a slot in the cohort and returns True, or returns False
+        if the cohort is full.
+
+        The capacity is read from the app config on each call. The slot
+        is released if the surrounding transaction rolls back.
+        """
+        return self.reserve_many(name, 1) == 1
+
+    def reserve_many(self, name, count):
+        """Takes up to `count` slots in the cohort, as many as are left,
+        and returns the number taken.
+        """
+        capacity = get_capacity(name)
+        with transaction.atomic():
+            cohort = self.get_for_update(name)
+            if capacity is not None:
+                count = min(count, max(capacity - cohort.enrolled, 0))
+            if count > 0:
+                self.filter(pk=cohort.pk).update(
+                    enrolled=models.F('enrolled') + count)
+        return max(count, 0)
+
+    def release(self, name):
+        """Gives back a slot taken in the cohort, e.g. when a
+        participant's consent is deleted.
+        """
+        with transaction.atomic():
+            cohort = self.get_for_update(name)
+            self.filter(pk=cohort.pk, enrolled__gt=0).update(
+                enrolled=models.F('enrolled') - 1)
+
+    def remaining(self, name):
+        with transaction.atomic():
+            return self.get_for_update(name).remaining
+
+
+class CohortCapacity(BaseUuidModel):
+
+    """A row-locked enrolment counter per cohort. Capacities are set in
+    AppConfig.cohort_capacities.
+    """
+
+    name = models.CharField(
+        verbose_name='Cohort',
+        max_length=25,
+        unique=True)
+
+    enrolled = models.IntegerField(
+        verbose_name='Enrolled',
+        default=0)
+
+    objects = CohortCapacityManager()
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def capacity(self):
+        return get_capacity(self.name)
+
+    @property
+    def remaining(self):
+        if self.capacity is None:
+            return None
+        return max(self.capacity - self.enrolled, 0)
+
+    class Meta:
+        app_label = 'esr21_subject'
+        verbose_name = 'Cohort Capacity'
+        verbose_name_plural = 'Cohort Capacity'
@@ -1,6 +1,11 @@
 MIN_AGE_OF_CONSENT = 40
 MAX_AGE_OF_CONSENT = 60
 
+UNDER_AGE_MESSAGE = 'Participant is under {}'.format(MIN_AGE_OF_CONSENT)
+OVER_AGE_MESSAGE = 'Participant is too old (>{})'.format(MAX_AGE_OF_CONSENT)
+RECEIVED_VACCINES_MESSAGE = (
+    'Participant received vaccines other than licensed influenza vaccines')
+
 
 class Eligibility:
 
@@ -11,15 +16,37 @@ class Eligibility:
         self.age_in_years = age_in_years
         self.received_vaccines = received_vaccines
         if self.age_in_years < MIN_AGE_OF_CONSENT:
-            self.error_message.append(
-                'Participant is under {}'.format(MIN_AGE_OF_CONSENT))
+            self.error_message.append(UNDER_AGE_MESSAGE)
         if self.age_in_years > MAX_AGE_OF_CONSENT:
-            self.error_message.append(
-                'Participant is too old (>{})'.format(MAX_AGE_OF_CONSENT))
+            self.error_message.append(OVER_AGE_MESSAGE)
         if self.received_vaccines == 'Yes':
-            self.error_message.append(
-                'Participant received vaccines other than licensed influenza vaccines')
+            self.error_message.append(RECEIVED_VACCINES_MESSAGE)
         self.is_eligible = False if self.error_message else True
 
     def __str__(self):
         return "Screened, age ({})".format(self.age_in_years)
+
+
+class BatchEligibility:
+
+    def __init__(self, ages_in_years=None, received_vaccines=None):
+        """ applies the Eligibility criteria to whole columns at once,
+            one criterion per pass, giving the error messages and
+            eligibility of each row in order."""
+        ages_in_years = list(ages_in_years or [])
+        received_vaccines = list(received_vaccines or [])
+        criteria = [
+            ([age < MIN_AGE_OF_CONSENT for age in ages_in_years],
+             UNDER_AGE_MESSAGE),
+            ([age > MAX_AGE_OF_CONSENT for age in ages_in_years],
+             OVER_AGE_MESSAGE),
+            ([value == 'Yes' for value in received_vaccines],
+             RECEIVED_VACCINES_MESSAGE)]
+        self.error_messages = [[] for _ in ages_in_years]
+        for failed, message in criteria:
+            for error_message, row_failed in zip(self.error_messages, failed):
+                if row_failed:
+                    error_message.append(message)
+        self.is_eligible = [
+            False if error_message else True
+            for error_message in self.error_messages]
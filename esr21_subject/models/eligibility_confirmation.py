@@ -92,3 +92,5 @@ class EligibilityConfirmation(NonUniqueSubjectIdentifierFieldMixin,
         app_label = 'esr21_subject'
         verbose_name = 'Eligibility Confirmation'
         verbose_name_plural = 'Eligibility Confirmation'
+        indexes = [
+            models.Index(fields=['modified', 'id'])]
@@ -0,0 +1,27 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+
+class ExportWatermark(BaseUuidModel):
+
+    """Records, per model and consumer, the upper bound of the last
+    incremental export.
+    """
+
+    model = models.CharField(
+        verbose_name='Model',
+        max_length=100)
+
+    consumer = models.CharField(
+        verbose_name='Consumer',
+        max_length=50)
+
+    watermark = models.DateTimeField(
+        verbose_name='Exported up to')
+
+    def __str__(self):
+        return f'{self.model} {self.consumer} {self.watermark}'
+
+    class Meta:
+        app_label = 'esr21_subject'
+        unique_together = ('model', 'consumer')
@@ -0,0 +1,53 @@
+from django.db import IntegrityError, models, transaction
+from edc_base.model_mixins import BaseUuidModel
+
+
+class IdentifierSequenceManager(models.Manager):
+
+    def reserve(self, name, device_id, site_id=None, size=None, seed=None):
+        """Advances the sequence by `size` and returns the range of
+        values reserved, creating the sequence on first use from
+        `seed`, a callable returning the last value already used.
+        """
+        with transaction.atomic(using=self.db):
+            try:
+                sequence = self.select_for_update().get(
+                    name=name, device_id=device_id, site_id=site_id)
+            except self.model.DoesNotExist:
+                try:
+                    with transaction.atomic(using=self.db):
+                        self.create(
+                            name=name, device_id=device_id, site_id=site_id,
+                            last_value=seed() if seed else 0)
+                except IntegrityError:
+                    pass
+                sequence = self.select_for_update().get(
+                    name=name, device_id=device_id, site_id=site_id)
+            start = sequence.last_value + 1
+            self.filter(pk=sequence.pk).update(
+                last_value=models.F('last_value') + size)
+        return range(start, start + size)
+
+
+class IdentifierSequence(BaseUuidModel):
+
+    """The last sequence value reserved per identifier, device and
+    site.
+    """
+
+    name = models.CharField(max_length=50)
+
+    device_id = models.CharField(max_length=10)
+
+    site_id = models.IntegerField(null=True)
+
+    last_value = models.IntegerField(default=0)
+
+    objects = IdentifierSequenceManager()
+
+    def __str__(self):
+        return f'{self.name} {self.device_id} {self.site_id}'
+
+    class Meta:
+        app_label = 'esr21_subject'
+        unique_together = ('name', 'device_id', 'site_id')
@@ -117,3 +117,7 @@ class InformedConsent(ConsentModelMixin, SiteModelMixin,
             ('subject_identifier', 'version'),
             ('subject_identifier', 'screening_identifier', 'version'),
             ('first_name', 'dob', 'initials', 'version'))
+        indexes = [
+            models.Index(fields=['subject_identifier', 'consent_datetime']),
+            models.Index(fields=['identity']),
+            models.Index(fields=['modified', 'id'])]
@@ -5,6 +5,7 @@ from django.db.models.deletion import PROTECT
 from edc_base.model_mixins import BaseUuidModel, FormAsJSONModelMixin
 from edc_base.sites.site_model_mixin import SiteModelMixin
 from edc_consent.model_mixins import RequiresConsentFieldsModelMixin
+from edc_identifier.model_mixins import NonUniqueSubjectIdentifierFieldMixin
 from edc_metadata.model_mixins.updates import UpdatesCrfMetadataModelMixin
 from edc_reference.model_mixins import ReferenceModelMixin
 from edc_protocol.validators import datetime_not_before_study_start
@@ -14,11 +15,13 @@ from edc_base.utils import get_utcnow
 from edc_visit_tracking.model_mixins import CrfModelMixin as BaseCrfModelMixin
 from edc_visit_tracking.model_mixins import PreviousVisitModelMixin
 
+from ...form_versions import form_version_registry
 from ..subject_visit import SubjectVisit
 from django.db.models.fields import DecimalField
 
 
-class CrfModelMixin(BaseCrfModelMixin, SubjectScheduleCrfModelMixin,
+class CrfModelMixin(NonUniqueSubjectIdentifierFieldMixin,
+                    BaseCrfModelMixin, SubjectScheduleCrfModelMixin,
                     RequiresConsentFieldsModelMixin, PreviousVisitModelMixin,
                     UpdatesCrfMetadataModelMixin, SiteModelMixin,
                     FormAsJSONModelMixin, ReferenceModelMixin, BaseUuidModel):
@@ -39,13 +42,18 @@ class CrfModelMixin(BaseCrfModelMixin, SubjectScheduleCrfModelMixin,
         help_text=('If reporting today, use today\'s date/time, otherwise use '
                    'the date/time this information was reported.'))
 
-    # form_version = DecimalField(
-        # decimal_places=1,
-        # max_digits=3)
+    form_version = DecimalField(
+        decimal_places=1,
+        max_digits=3,
+        null=True,
+        editable=False,
+        db_index=True)
 
-    @property
-    def subject_identifier(self):
-        return self.subject_visit.appointment.subject_identifier
+    def save(self, *args, **kwargs):
+        self.subject_identifier = self.subject_visit.subject_identifier
+        if self._state.adding:
+            self.form_version = form_version_registry.get(self.__class__)
+        super().save(*args, **kwargs)
 
     def natural_key(self):
         return self.subject_visit.natural_key()
@@ -54,3 +62,6 @@ class CrfModelMixin(BaseCrfModelMixin, SubjectScheduleCrfModelMixin,
 
     class Meta:
         abstract = True
+        indexes = [
+            models.Index(fields=['subject_identifier', 'report_datetime']),
+            models.Index(fields=['modified', 'id'])]
@@ -1,3 +1,5 @@
+import re
+
 from django.db import models
 from edc_base.model_managers import HistoricalRecords
 from edc_base.model_mixins import BaseUuidModel
@@ -32,11 +34,18 @@ class OnSchedule(
         self.consent_version = None
         super().save(*args, **kwargs)
 
+    class Meta(OnScheduleModelMixin.Meta):
+        indexes = [
+            models.Index(fields=['subject_identifier', 'onschedule_datetime']),
+            models.Index(fields=['schedule_name', 'subject_identifier'])]
+
 
 class OnScheduleIll(
         # RequiresConsentFieldsModelMixin,
         OnScheduleModelMixin, BaseUuidModel):
 
+    schedule_name_template = 'esr21_illness{episode}_schedule'
+
     subject_identifier = models.CharField(
         verbose_name="Subject Identifier",
         max_length=50)
@@ -45,6 +54,11 @@ class OnScheduleIll(
                                      blank=True,
                                      null=True)
 
+    episode = models.IntegerField(
+        verbose_name='Illness episode',
+        default=1,
+        editable=False)
+
     onsite = CurrentSiteManager()
 
     objects = SubjectIdentifierManager()
@@ -56,7 +70,22 @@ class OnScheduleIll(
 
     def save(self, *args, **kwargs):
         self.consent_version = None
+        self.episode = self.get_episode(self.schedule_name) or self.episode
         super().save(*args, **kwargs)
 
+    @classmethod
+    def get_schedule_name(cls, episode):
+        return cls.schedule_name_template.format(episode=episode)
+
+    @classmethod
+    def get_episode(cls, schedule_name):
+        """Returns the episode number of an illness schedule name, or
+        None if it is not one.
+        """
+        episode = re.match(r'^esr21_illness(\d+)_schedule$', schedule_name or '')
+        return int(episode.group(1)) if episode else None
+
     class Meta:
         unique_together = ('subject_identifier', 'schedule_name')
+        indexes = [
+            models.Index(fields=['subject_identifier', 'onschedule_datetime'])]
@@ -77,3 +77,8 @@ class PersonalContactInfo(LocatorModelMixin, ActionModelMixin, SiteModelMixin,
         app_label = 'esr21_subject'
         verbose_name = 'Personal Contact Information'
         verbose_name_plural = 'Personal Contact Information'
+        indexes = [
+            models.Index(fields=['subject_cell']),
+            models.Index(fields=['subject_cell_alt']),
+            models.Index(fields=['indirect_contact_cell']),
+            models.Index(fields=['modified', 'id'])]
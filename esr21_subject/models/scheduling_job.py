@@ -0,0 +1,47 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+from ..choices import JOB_STATUS
+from ..constants import JOB_PENDING
+
+
+class SchedulingJob(BaseUuidModel):
+
+    """A queued post-consent scheduling job, one per subject.
+    """
+
+    subject_identifier = models.CharField(
+        verbose_name='Subject Identifier',
+        max_length=50,
+        unique=True)
+
+    status = models.CharField(
+        verbose_name='Status',
+        max_length=15,
+        choices=JOB_STATUS,
+        default=JOB_PENDING)
+
+    attempts = models.IntegerField(
+        verbose_name='Attempts',
+        default=0)
+
+    last_error = models.TextField(
+        verbose_name='Last error',
+        null=True,
+        blank=True)
+
+    next_run_datetime = models.DateTimeField(
+        verbose_name='Next attempt after',
+        null=True,
+        blank=True)
+
+    def __str__(self):
+        return f'{self.subject_identifier} {self.status}'
+
+    class Meta:
+        app_label = 'esr21_subject'
+        verbose_name = 'Scheduling Job'
+        verbose_name_plural = 'Scheduling Jobs'
+        indexes = [
+            models.Index(fields=['status', 'modified']),
+            models.Index(fields=['status', 'next_run_datetime'])]
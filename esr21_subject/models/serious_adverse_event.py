@@ -108,3 +108,5 @@ class SeriousAdverseEvent(SiteModelMixin, BaseUuidModel):
         app_label = 'esr21_subject'
         verbose_name = 'Serious Adverse Event'
         verbose_name_plural = 'Serious Adverse Events'
+        indexes = [
+            models.Index(fields=['modified', 'id'])]
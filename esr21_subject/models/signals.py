@@ -1,66 +1,269 @@
 from django.apps import apps as django_apps
-from django.db.models.signals import post_save
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save)
 from django.dispatch import receiver
 from edc_constants.constants import YES
-from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 
+from ..consent_lookup import consent_lookup
+from ..profiling import profile_receiver
+from ..scheduling import async_scheduler, schedule_resolver
+from .adverse_event import AdverseEvent
+from .adverse_event_summary import AdverseEventSummary, SUMMARY_FIELDS
+from .adverse_event_summary import get_summary_counts
+from .adverse_event_term import AdverseEventTerm
+from .changelist_date_bucket import ChangelistDateBucket, get_bucket_date
+from .cohort_capacity import CohortCapacity
 from .covid19_symptomatic_infections import Covid19SymptomaticInfections
 from .informed_consent import InformedConsent
-from .onschedule import OnSchedule
+from .offschedule import OffSchedule
+from .onschedule import OnSchedule, OnScheduleIll
+from .serious_adverse_event import SeriousAdverseEvent
+from .special_interest_adverse_event import SpecialInterestAdverseEvent
+from .subject_requisition import SubjectRequisition
+from .subject_visit import SubjectVisit
+
+adverse_event_models = [
+    AdverseEvent, SeriousAdverseEvent, SpecialInterestAdverseEvent]
+
+changelist_bucket_models = [AdverseEvent, SubjectRequisition, SubjectVisit]
 
 
 @receiver(post_save, weak=False, sender=InformedConsent,
           dispatch_uid='informed_consent_on_post_save')
+@profile_receiver
 def informed_consent_on_post_save(sender, instance, raw, created, **kwargs):
     """ Put participant on schedule post consent """
     if not raw:
         if created:
             instance.registration_update_or_create()
 
-        if is_subcohort_full():
-            cohort = 'esr21'
+        if django_apps.get_app_config('esr21_subject').async_scheduling:
+            async_scheduler.enqueue(instance.subject_identifier)
         else:
-            cohort = 'esr21_sub'
+            schedule_subject(instance)
+
+
+@receiver([post_save, post_delete], weak=False, sender=InformedConsent,
+          dispatch_uid='informed_consent_invalidate_consent_lookup')
+def informed_consent_invalidate_consent_lookup(sender, instance, **kwargs):
+    consent_lookup.invalidate(instance.subject_identifier)
+
+
+@receiver(post_delete, weak=False, sender=OnSchedule,
+          dispatch_uid='onschedule_release_cohort_on_post_delete')
+def onschedule_release_cohort_on_post_delete(sender, instance, **kwargs):
+    """Releases the participant's slot in a capped cohort when they are
+    taken off its enrolment schedule.
+
+    The slot is held for as long as the schedule row exists, e.g. while
+    a deleted consent is re-captured, so the counter always matches the
+    participants on the enrolment schedule.
+    """
+    for cohort in django_apps.get_app_config('esr21_subject').cohort_capacities:
+        if instance.schedule_name == f'{cohort}_enrol_schedule':
+            CohortCapacity.objects.release(cohort)
+
+
+def adverse_event_summary_on_pre_save(sender, instance, raw, **kwargs):
+    """Keeps the summary values of an adverse event being changed so
+    post_save can move its counts.
+    """
+    if not raw and not instance._state.adding:
+        instance._summary_previous = sender.objects.filter(
+            pk=instance.pk).values(
+                'site_id', *SUMMARY_FIELDS[sender._meta.label_lower]).first()
+
+
+def adverse_event_summary_on_post_save(sender, instance, raw, created, **kwargs):
+    if not raw:
+        previous = getattr(instance, '_summary_previous', None)
+        instance._summary_previous = None
+        counts = get_summary_counts(instance)
+        if previous:
+            site_id = previous.pop('site_id')
+            previous_counts = get_summary_counts(instance, values=previous)
+            if site_id == instance.site_id:
+                counts.subtract(previous_counts)
+            else:
+                AdverseEventSummary.objects.add(
+                    sender._meta.label_lower,
+                    {key: -count for key, count in previous_counts.items()},
+                    site_id=site_id)
+        if created or previous:
+            AdverseEventSummary.objects.add(
+                sender._meta.label_lower, counts, site_id=instance.site_id)
 
-            onschedule_model = 'esr21_subject.onschedule'
-            put_on_schedule(f'{cohort}_enrol_schedule', instance=instance,
-                            onschedule_model=onschedule_model)
 
-            put_on_schedule(f'{cohort}_fu_schedule', instance=instance,
-                            onschedule_model=onschedule_model)
+def adverse_event_term_on_post_save(sender, instance, raw, **kwargs):
+    if not raw:
+        AdverseEventTerm.objects.index_objects([instance])
+
+
+def adverse_event_term_on_post_delete(sender, instance, **kwargs):
+    AdverseEventTerm.objects.unindex([instance])
+
+
+@receiver(pre_delete, weak=False, sender=SeriousAdverseEvent,
+          dispatch_uid='serious_adverse_event_summary_on_pre_delete')
+def serious_adverse_event_summary_on_pre_delete(sender, instance, **kwargs):
+    """Keeps the seriousness criteria of an SAE being deleted, as its
+    rows in the through table go without an m2m_changed signal.
+    """
+    instance._summary_criteria = list(
+        instance.seriousness_criteria.values_list('short_name', flat=True))
+
+
+def adverse_event_summary_on_post_delete(sender, instance, **kwargs):
+    counts = get_summary_counts(instance)
+    counts.update(('seriousness_criteria', short_name) for short_name in
+                  getattr(instance, '_summary_criteria', []))
+    AdverseEventSummary.objects.add(
+        sender._meta.label_lower,
+        {key: -count for key, count in counts.items()},
+        site_id=instance.site_id)
+
+
+for model_cls in adverse_event_models:
+    for signal, model_receiver in [
+            (pre_save, adverse_event_summary_on_pre_save),
+            (post_save, adverse_event_summary_on_post_save),
+            (post_delete, adverse_event_summary_on_post_delete),
+            (post_save, adverse_event_term_on_post_save),
+            (post_delete, adverse_event_term_on_post_delete)]:
+        signal.connect(
+            model_receiver, sender=model_cls, weak=False,
+            dispatch_uid=f'{model_receiver.__name__}_{model_cls._meta.model_name}')
+
+
+def changelist_date_bucket_on_pre_save(sender, instance, raw, **kwargs):
+    """Keeps the modified datetime of a row being changed so post_save
+    can move it to the day it is modified on.
+    """
+    if not raw and not instance._state.adding:
+        instance._bucket_previous = sender.objects.filter(
+            pk=instance.pk).values_list('modified', flat=True).first()
+
+
+def changelist_date_bucket_on_post_save(sender, instance, raw, **kwargs):
+    if not raw:
+        previous = getattr(instance, '_bucket_previous', None)
+        instance._bucket_previous = None
+        date = get_bucket_date(instance.modified)
+        previous_date = get_bucket_date(previous) if previous else None
+        if previous_date != date:
+            if previous_date:
+                ChangelistDateBucket.objects.add(
+                    sender._meta.label_lower, previous_date, -1)
+            ChangelistDateBucket.objects.add(sender._meta.label_lower, date, 1)
+
+
+def changelist_date_bucket_on_post_delete(sender, instance, **kwargs):
+    ChangelistDateBucket.objects.add(
+        sender._meta.label_lower, get_bucket_date(instance.modified), -1)
+
+
+for model_cls in changelist_bucket_models:
+    for signal, model_receiver in [
+            (pre_save, changelist_date_bucket_on_pre_save),
+            (post_save, changelist_date_bucket_on_post_save),
+            (post_delete, changelist_date_bucket_on_post_delete)]:
+        signal.connect(
+            model_receiver, sender=model_cls, weak=False,
+            dispatch_uid=f'{model_receiver.__name__}_{model_cls._meta.model_name}')
+
+
+@receiver(m2m_changed, weak=False,
+          sender=SeriousAdverseEvent.seriousness_criteria.through,
+          dispatch_uid='serious_adverse_event_summary_on_m2m_changed')
+def serious_adverse_event_summary_on_m2m_changed(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """Counts SAEs per seriousness criteria as criteria are added to or
+    removed from them.
+    """
+    if action == 'pre_clear':
+        pk_set = set(sender.objects.filter(**{
+            'saecriteria_id' if reverse else 'seriousadverseevent_id':
+            instance.pk}).values_list(
+                'seriousadverseevent_id' if reverse else 'saecriteria_id',
+                flat=True))
+    elif action not in ['post_add', 'post_remove'] or not pk_set:
+        return
+    sign = 1 if action == 'post_add' else -1
+    if reverse:
+        saes = SeriousAdverseEvent.objects.filter(pk__in=pk_set).values_list(
+            'site_id', flat=True)
+        rows = [(site_id, instance.short_name) for site_id in saes]
+    else:
+        rows = [(instance.site_id, short_name) for short_name in
+                instance.seriousness_criteria.model.objects.filter(
+                    pk__in=pk_set).values_list('short_name', flat=True)]
+    for site_id, short_name in rows:
+        AdverseEventSummary.objects.add(
+            SeriousAdverseEvent._meta.label_lower,
+            {('seriousness_criteria', short_name): sign}, site_id=site_id)
+
+
+def schedule_subject(instance):
+    """Puts a consented participant on the enrolment and follow up
+    schedules of their cohort.
+    """
+    cohort = get_cohort(instance.subject_identifier)
+
+    onschedule_model = 'esr21_subject.onschedule'
+    put_on_schedule(f'{cohort}_enrol_schedule', instance=instance,
+                    onschedule_model=onschedule_model)
+
+    put_on_schedule(f'{cohort}_fu_schedule', instance=instance,
+                    onschedule_model=onschedule_model)
 
 
 @receiver(post_save, weak=False, sender=Covid19SymptomaticInfections,
           dispatch_uid='informed_consent_on_post_save')
+@profile_receiver
 def covid19_symptomatic_infections_on_post_save(sender, instance, raw, created, **kwargs):
 
     if not raw and instance.symptomatic_infections == YES:
         onschedule_model = 'esr21_subject.onscheduleill'
-        offschedule_model = 'esr21_subject.offschedule'
 
-        illness_count = None
+        put_on_schedule(get_illness_schedule_name(instance.subject_identifier),
+                        instance=instance,
+                        onschedule_model=onschedule_model)
 
-        latest_onschedule = onschedule_model.objects.all().latest('onschedule_datetime')
-        if latest_onschedule:
-            try:
-                offschedule_model.objects.get(schedule_name=latest_onschedule.schedule_name)
-            except offschedule_model.DoesNotExist:
-                pass
-            else:
-                illness_count = 1 + onschedule_model.objects.all().count()
 
-        put_on_schedule(f'esr21_illness{illness_count}_schedule', instance=instance,
-                        onschedule_model=onschedule_model)
+def get_illness_schedule_name(subject_identifier):
+    """Returns the schedule name of the participant's current illness
+    episode, or of the next episode if the current one is closed.
+
+    The episode is read from the schedule name, so rows saved before
+    the episode column was filled are numbered correctly.
+    """
+    latest_onschedule = get_illness_onschedules(subject_identifier).first()
+    if not latest_onschedule:
+        return OnScheduleIll.get_schedule_name(1)
+    episode = (OnScheduleIll.get_episode(latest_onschedule.schedule_name)
+               or latest_onschedule.episode)
+    if get_offschedules(
+            subject_identifier, latest_onschedule.schedule_name).exists():
+        episode += 1
+    return OnScheduleIll.get_schedule_name(episode)
+
+
+def get_illness_onschedules(subject_identifier):
+    return OnScheduleIll.objects.filter(
+        subject_identifier=subject_identifier).order_by('-onschedule_datetime')
+
+
+def get_offschedules(subject_identifier, schedule_name):
+    return OffSchedule.objects.filter(
+        subject_identifier=subject_identifier, schedule_name=schedule_name)
 
 
 def put_on_schedule(schedule_name, onschedule_model, instance=None):
 
     if instance:
 
-        _, schedule = site_visit_schedules.get_by_onschedule_model_schedule_name(
-            onschedule_model=onschedule_model, name=schedule_name)
-
-        onschedule_model_cls = django_apps.get_model(onschedule_model)
+        _, schedule, onschedule_model_cls = schedule_resolver.get(
+            onschedule_model=onschedule_model, schedule_name=schedule_name)
 
         try:
             onschedule_model_cls.objects.get(
@@ -69,7 +272,9 @@ def put_on_schedule(schedule_name, onschedule_model, instance=None):
         except onschedule_model_cls.DoesNotExist:
             schedule.put_on_schedule(
                 subject_identifier=instance.subject_identifier,
-                onschedule_datetime=instance.consent_datetime,
+                onschedule_datetime=(
+                    getattr(instance, 'consent_datetime', None)
+                    or instance.report_datetime),
                 schedule_name=schedule_name)
         else:
             schedule.refresh_schedule(
@@ -77,8 +282,26 @@ def put_on_schedule(schedule_name, onschedule_model, instance=None):
                 schedule_name=schedule_name)
 
 
-def is_subcohort_full():
-        onschedule_subcohort = OnSchedule.objects.filter(
-            schedule_name='esr21_sub_enrol_schedule')
+def get_cohort(subject_identifier):
+    """Returns the cohort a participant is already enrolled in, otherwise
+    reserves a slot in the sub cohort, falling back to the main cohort
+    once the sub cohort is full.
+    """
+    schedule_names = get_schedule_names(subject_identifier)
+    if 'esr21_sub_enrol_schedule' in schedule_names:
+        return 'esr21_sub'
+    elif 'esr21_enrol_schedule' in schedule_names:
+        return 'esr21'
+    elif CohortCapacity.objects.reserve('esr21_sub'):
+        return 'esr21_sub'
+    return 'esr21'
+
 
-        return onschedule_subcohort.count() == 3000
+def get_schedule_names(subject_identifier):
+    return OnSchedule.objects.filter(
+        subject_identifier=subject_identifier).values_list(
+            'schedule_name', flat=True)
+
+
+def is_subcohort_full():
+    return CohortCapacity.objects.remaining('esr21_sub') == 0
@@ -70,3 +70,5 @@ class SpecialInterestAdverseEvent(SiteModelMixin, BaseUuidModel):
                            'aesi_category')
         verbose_name = 'Adverse Event of Special Interest'
         verbose_name_plural = 'Adverse Events of Special Interest'
+        indexes = [
+            models.Index(fields=['modified', 'id'])]
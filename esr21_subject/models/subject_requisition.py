@@ -133,3 +133,6 @@ class SubjectRequisition(
 
     class Meta:
         unique_together = ('panel', 'subject_visit')
+        indexes = [
+            models.Index(fields=['subject_identifier', 'requisition_datetime']),
+            models.Index(fields=['modified', 'id'])]
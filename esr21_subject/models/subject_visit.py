@@ -59,4 +59,5 @@ class SubjectVisit(
     history = HistoricalRecords()
 
     class Meta(VisitModelMixin.Meta):
-        pass
+        indexes = getattr(VisitModelMixin.Meta, 'indexes', []) + [
+            models.Index(fields=['modified', 'id'])]
@@ -88,3 +88,5 @@ class VaccinationDetails(CrfModelMixin):
         app_label = 'esr21_subject'
         verbose_name = 'Collection of vaccination details'
         verbose_name_plural = 'Collection of vaccination details'
+        indexes = CrfModelMixin.Meta.indexes + [
+            models.Index(fields=['provider_name'])]
@@ -0,0 +1,2 @@
+from .query_profiler import QueryProfiler, profile_receiver, profiling_enabled
+from .query_profile_buffer import QueryProfileBuffer, query_profiles
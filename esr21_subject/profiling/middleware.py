@@ -0,0 +1,29 @@
+from django.core.exceptions import MiddlewareNotUsed
+
+from .query_profiler import QueryProfiler, profiling_enabled
+
+
+class QueryProfilerMiddleware:
+    """Profiles the queries of each request to the esr21_subject admin
+    site when `AppConfig.query_profiling` is True.
+    """
+
+    admin_namespace = 'esr21_subject_admin'
+    report_view_name = 'esr21_subject_admin:query_profiles'
+
+    def __init__(self, get_response):
+        if not profiling_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiler = QueryProfiler('request')
+        with profiler:
+            response = self.get_response(request)
+        resolver_match = request.resolver_match
+        if (resolver_match
+                and self.admin_namespace in resolver_match.namespaces
+                and resolver_match.view_name != self.report_view_name):
+            profiler.name = f'{request.method} {resolver_match.view_name}'
+            profiler.save()
+        return response
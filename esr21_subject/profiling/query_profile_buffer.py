@@ -0,0 +1,60 @@
+import threading
+from collections import deque
+
+from django.apps import apps as django_apps
+
+
+class QueryProfileBuffer:
+    """A thread safe, fixed size, in-process buffer of the latest query
+    profiles. The oldest profile is dropped once the buffer is full.
+    """
+
+    def __init__(self, maxlen=None):
+        self.maxlen = maxlen
+        self._profiles = None
+        self._lock = threading.Lock()
+
+    @property
+    def profiles(self):
+        if self._profiles is None:
+            self._profiles = deque(maxlen=self.maxlen or django_apps.get_app_config(
+                'esr21_subject').query_profile_buffer_size)
+        return self._profiles
+
+    def append(self, profile):
+        with self._lock:
+            self.profiles.append(profile)
+
+    def clear(self):
+        with self._lock:
+            self.profiles.clear()
+
+    def records(self):
+        """Returns the profiles, newest first.
+        """
+        with self._lock:
+            return list(reversed(self.profiles))
+
+    def summary(self):
+        """Returns one row per profiled request, receiver or form
+        validator, sorted by total DB time, descending.
+        """
+        summary = {}
+        for profile in self.records():
+            key = (profile['kind'], profile['name'])
+            row = summary.setdefault(key, dict(
+                kind=profile['kind'], name=profile['name'], calls=0,
+                queries=0, max_queries=0, db_time_ms=0.0, duplicates=0))
+            row['calls'] += 1
+            row['queries'] += profile['query_count']
+            row['max_queries'] = max(row['max_queries'], profile['query_count'])
+            row['db_time_ms'] += profile['db_time_ms']
+            row['duplicates'] += profile['duplicate_count']
+        for row in summary.values():
+            row['avg_queries'] = row['queries'] / row['calls']
+            row['avg_db_time_ms'] = row['db_time_ms'] / row['calls']
+        return sorted(
+            summary.values(), key=lambda row: row['db_time_ms'], reverse=True)
+
+
+query_profiles = QueryProfileBuffer()
@@ -0,0 +1,111 @@
+import os
+import time
+import traceback
+from collections import Counter
+from functools import wraps
+
+from django.apps import apps as django_apps
+from django.db import connections
+from django.utils import timezone
+
+from .query_profile_buffer import query_profiles
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILING_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def profiling_enabled():
+    return django_apps.get_app_config('esr21_subject').query_profiling
+
+
+def get_call_site():
+    """Returns the innermost frame in this app, outside of the profiler,
+    as `path:line in function`.
+    """
+    for frame, lineno in traceback.walk_stack(None):
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and not filename.startswith(PROFILING_DIR):
+            return (f'{os.path.relpath(filename, os.path.dirname(APP_DIR))}'
+                    f':{lineno} in {frame.f_code.co_name}')
+    return None
+
+
+class QueryProfiler:
+    """Records the SQL run on a connection while active, with the time
+    each statement took and the call site that issued it.
+
+        with QueryProfiler('signal', 'informed_consent_on_post_save') as profiler:
+            ...
+        profiler.save()
+    """
+
+    def __init__(self, kind=None, name=None, using=None):
+        self.kind = kind
+        self.name = name
+        self.using = using or 'default'
+        self.queries = []
+        self.duration = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._wrapper = connections[self.using].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+        self.duration = time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(dict(
+                sql=sql,
+                params=repr(params),
+                duration=time.perf_counter() - started,
+                call_site=get_call_site()))
+
+    def as_dict(self):
+        statements = Counter((query['sql'], query['params'])
+                             for query in self.queries)
+        duplicates = [
+            dict(sql=sql, count=count,
+                 call_sites=sorted(set(
+                     query['call_site'] or '' for query in self.queries
+                     if query['sql'] == sql and query['params'] == params)))
+            for (sql, params), count in statements.most_common() if count > 1]
+        call_sites = Counter(query['call_site'] for query in self.queries)
+        return dict(
+            kind=self.kind,
+            name=self.name,
+            timestamp=timezone.now(),
+            duration=self.duration,
+            query_count=len(self.queries),
+            db_time_ms=1000 * sum(query['duration'] for query in self.queries),
+            duplicate_count=sum(
+                duplicate['count'] - 1 for duplicate in duplicates),
+            duplicates=duplicates,
+            call_sites=call_sites.most_common(10))
+
+    def save(self):
+        query_profiles.append(self.as_dict())
+
+
+def profile_receiver(receiver):
+    """Decorates a signal receiver to profile its queries when query
+    profiling is enabled.
+    """
+    @wraps(receiver)
+    def wrapper(sender, *args, **kwargs):
+        if not profiling_enabled():
+            return receiver(sender, *args, **kwargs)
+        profiler = QueryProfiler(
+            'signal', f'{receiver.__name__} ({sender._meta.label_lower})')
+        try:
+            with profiler:
+                return receiver(sender, *args, **kwargs)
+        finally:
+            profiler.save()
+    return wrapper
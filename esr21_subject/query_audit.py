@@ -0,0 +1,165 @@
+import json
+import re
+import uuid
+
+from django.apps import apps as django_apps
+from django.db import connections, transaction
+from edc_base.utils import get_utcnow
+
+
+def sample(model_cls, field_name, default=None):
+    """Returns a value of the field from any row, so queries are
+    planned with a realistic value, or the default on an empty table.
+    """
+    value = model_cls._default_manager.order_by().values_list(
+        field_name, flat=True).first()
+    return default if value is None else value
+
+
+def get_hot_queries():
+    """Returns a list of (name, queryset) for the ORM queries run on every
+    consent, visit, CRF save, export or admin page, built by the same
+    managers and methods the calling code uses.
+    """
+    from .admin.keyset_changelist import KeysetChangeList
+    from .admin_site import esr21_subject_admin
+    from .consent_lookup import consent_lookup
+    from .exports.export_planner import ExportPlanner
+    from .ingestion.bulk_crf_ingestion import BulkCrfIngestion
+    from .models import AdverseEvent, AdverseEventTerm, CohortCapacity
+    from .models.signals import get_illness_onschedules, get_offschedules
+    from .models.signals import get_schedule_names
+    from .scheduling import async_scheduler
+
+    appointment_cls = django_apps.get_model('edc_appointment.appointment')
+    informed_consent_cls = django_apps.get_model('esr21_subject.informedconsent')
+    onschedule_cls = django_apps.get_model('esr21_subject.onschedule')
+    subject_visit_cls = django_apps.get_model('esr21_subject.subjectvisit')
+
+    subject_identifier = sample(
+        informed_consent_cls, 'subject_identifier', '000-00000000-0')
+    schedule_name = sample(onschedule_cls, 'schedule_name', 'esr21_enrol_schedule')
+    visit = subject_visit_cls.objects.order_by().first()
+    visit_keys = [str(visit.pk), (visit.subject_identifier, visit.visit_code,
+                                  visit.visit_code_sequence)] if visit else []
+    adverse_event_admin = esr21_subject_admin._registry[AdverseEvent]
+
+    keyset_queries = [
+        (f'KeysetChangeList.filter_after ({model_cls._meta.label_lower})',
+         KeysetChangeList.filter_after(
+             model_cls._default_manager.order_by('-modified', '-id'),
+             get_utcnow(), uuid.uuid4())[:model_admin.list_per_page + 1])
+        for model_cls, model_admin in esr21_subject_admin._registry.items()
+        if getattr(model_admin, 'keyset_pagination', False)]
+
+    return [
+        ('signals.get_schedule_names', get_schedule_names(subject_identifier)),
+        ('signals.put_on_schedule',
+         onschedule_cls.objects.filter(
+             subject_identifier=subject_identifier, schedule_name=schedule_name)),
+        ('CohortCapacityManager.get_locked',
+         CohortCapacity.objects.get_locked('esr21_sub')),
+        ('CohortCapacityManager.get_enrolled',
+         CohortCapacity.objects.get_enrolled('esr21_sub')),
+        ('signals.get_illness_onschedules',
+         get_illness_onschedules(subject_identifier)[:1]),
+        ('signals.get_offschedules',
+         get_offschedules(subject_identifier, schedule_name)),
+        ('ConsentLookup.get_queryset',
+         consent_lookup.get_queryset(subject_identifier)[:1]),
+        ('ConsentLookup.get_queryset (version)',
+         consent_lookup.get_queryset(subject_identifier, '1')[:1]),
+        ('AsyncScheduler.get_job_queryset',
+         async_scheduler.get_job_queryset(subject_identifier)),
+        ('AsyncScheduler.get_consent_queryset',
+         async_scheduler.get_consent_queryset(subject_identifier)[:1]),
+        ('ExportPlanner.get_consent_queryset',
+         ExportPlanner().get_consent_queryset([subject_identifier])),
+        ('BulkCrfIngestion.get_visit_queryset',
+         BulkCrfIngestion().get_visit_queryset(visit_keys)),
+        ('AppointmentContextMixin.get_appointment_queryset',
+         adverse_event_admin.get_appointment_queryset(
+             sample(appointment_cls, 'id', uuid.uuid4()))),
+        ('AdverseEventTermManager.get_search_queryset',
+         AdverseEventTerm.objects.get_search_queryset(
+             'injection site', models=['esr21_subject.adverseevent'])),
+        ('AdverseEventTermSearchMixin.filter_by_term',
+         adverse_event_admin.filter_by_term(
+             AdverseEvent.objects.all(), subject_identifier)),
+    ] + keyset_queries
+
+
+class QueryPlanAudit:
+    """Runs EXPLAIN on each hot query and reports the tables read by a
+    sequential scan that hold more than `min_rows` rows.
+    """
+
+    def __init__(self, hot_queries=None, min_rows=None, using=None):
+        self.hot_queries = hot_queries
+        self.min_rows = django_apps.get_app_config(
+            'esr21_subject').query_audit_min_rows if min_rows is None else min_rows
+        self.using = using or 'default'
+        self.connection = connections[self.using]
+        self._row_counts = {}
+
+    def explain(self, queryset):
+        """Returns the plan of the queryset, explained in a transaction
+        so querysets locking rows with select_for_update are allowed.
+        """
+        options = dict(format='json') if self.connection.vendor == 'mysql' else {}
+        with transaction.atomic(using=self.using):
+            return queryset.using(self.using).explain(**options)
+
+    def seq_scans(self, plan):
+        """Returns the names of the tables read in full in the plan.
+        """
+        vendor = self.connection.vendor
+        if vendor == 'postgresql':
+            return re.findall(r'Seq Scan on (\w+)', plan)
+        elif vendor == 'sqlite':
+            return re.findall(r'SCAN (?:TABLE )?(\w+)\s*$', plan, re.MULTILINE)
+        elif vendor == 'mysql':
+            tables = []
+            self.find_full_scans(json.loads(plan), tables)
+            return tables
+        return []
+
+    def find_full_scans(self, node, tables):
+        if isinstance(node, dict):
+            if node.get('access_type') == 'ALL':
+                tables.append(node.get('table_name'))
+            for value in node.values():
+                self.find_full_scans(value, tables)
+        elif isinstance(node, list):
+            for value in node:
+                self.find_full_scans(value, tables)
+
+    def row_count(self, table):
+        if table not in self._row_counts:
+            with self.connection.cursor() as cursor:
+                if self.connection.vendor == 'postgresql':
+                    cursor.execute(
+                        'SELECT reltuples FROM pg_class WHERE relname = %s',
+                        [table])
+                else:
+                    cursor.execute(
+                        'SELECT COUNT(*) FROM '
+                        f'{self.connection.ops.quote_name(table)}')
+                row = cursor.fetchone()
+            self._row_counts[table] = int(row[0]) if row else 0
+        return self._row_counts[table]
+
+    def run(self):
+        """Returns a list of (name, table, row_count, plan) for each
+        sequential scan over the size limit.
+        """
+        failures = []
+        hot_queries = (get_hot_queries() if self.hot_queries is None
+                       else self.hot_queries)
+        for name, queryset in hot_queries:
+            plan = self.explain(queryset)
+            for table in dict.fromkeys(self.seq_scans(plan)):
+                row_count = self.row_count(table)
+                if row_count > self.min_rows:
+                    failures.append((name, table, row_count, plan))
+        return failures
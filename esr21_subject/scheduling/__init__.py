@@ -0,0 +1,4 @@
+from .async_scheduler import AsyncScheduler, async_scheduler
+from .bulk_scheduler import BulkScheduler, BulkSchedulerError, put_on_schedule_many
+from .schedule_resolver import ScheduleResolver, ScheduleResolverError
+from .schedule_resolver import schedule_resolver
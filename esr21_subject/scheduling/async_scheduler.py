@@ -0,0 +1,151 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django import db
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Q
+from edc_base.utils import get_utcnow
+
+from ..constants import JOB_DONE, JOB_FAILED, JOB_PENDING, JOB_RUNNING
+
+
+class AsyncScheduler:
+    """Defers post-consent scheduling to a local thread pool.
+
+    A job row is written in the same transaction as the consent and the
+    job is only handed to the pool once that transaction commits. Jobs
+    are claimed with a row lock, so a job is never run twice at once, and
+    scheduling itself is idempotent, so a failed job can be retried.
+
+    A failed job is retried up to `max_attempts` times, each retry
+    waiting twice as long as the one before, starting at `retry_delay`
+    seconds. A job left running for more than `lease_seconds`, e.g. by a
+    process that died while scheduling, may be claimed again. Jobs still
+    pending, due for a retry or left running after a restart are picked
+    up by the `run_scheduling_jobs` management command.
+    """
+
+    job_model = 'esr21_subject.schedulingjob'
+    consent_model = 'esr21_subject.informedconsent'
+
+    max_attempts = 3
+    retry_delay = 30
+    lease_seconds = 600
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._executor = None
+
+    @property
+    def job_model_cls(self):
+        return django_apps.get_model(self.job_model)
+
+    @property
+    def consent_model_cls(self):
+        return django_apps.get_model(self.consent_model)
+
+    @property
+    def executor(self):
+        if not self._executor:
+            workers = self.workers or django_apps.get_app_config(
+                'esr21_subject').scheduling_workers
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='esr21_scheduling')
+        return self._executor
+
+    def enqueue(self, subject_identifier):
+        self.job_model_cls.objects.update_or_create(
+            subject_identifier=subject_identifier,
+            defaults={'status': JOB_PENDING, 'attempts': 0, 'last_error': None,
+                      'next_run_datetime': None})
+        transaction.on_commit(lambda: self.submit(subject_identifier))
+
+    def submit(self, subject_identifier, delay=None):
+        """Hands the job to the pool, after `delay` seconds if given.
+        """
+        if delay:
+            timer = threading.Timer(delay, self.submit, [subject_identifier])
+            timer.daemon = True
+            timer.start()
+            return timer
+        return self.executor.submit(self.run_in_worker, subject_identifier)
+
+    def run_in_worker(self, subject_identifier):
+        """Runs a job on a pool thread, closing the thread's connection
+        after, and resubmits it with its backoff if it failed with
+        attempts left.
+        """
+        try:
+            job = self.run_once(subject_identifier)
+        finally:
+            db.connection.close()
+        if job and job.status == JOB_FAILED and job.attempts < self.max_attempts:
+            self.submit(
+                subject_identifier, delay=self.get_retry_delay(job.attempts))
+        return job
+
+    def get_retry_delay(self, attempts):
+        return self.retry_delay * 2 ** max(attempts - 1, 0)
+
+    @property
+    def due(self):
+        """Returns the condition of jobs that may be claimed now,
+        including running jobs whose lease has expired.
+        """
+        now = get_utcnow()
+        return Q(status=JOB_PENDING) | Q(
+            Q(next_run_datetime__isnull=True)
+            | Q(next_run_datetime__lte=now),
+            status=JOB_FAILED, attempts__lt=self.max_attempts) | Q(
+                status=JOB_RUNNING,
+                modified__lt=now - timedelta(seconds=self.lease_seconds))
+
+    def claim(self, subject_identifier):
+        with transaction.atomic():
+            try:
+                job = self.get_job_queryset(subject_identifier).get()
+            except self.job_model_cls.DoesNotExist:
+                return None
+            job.status = JOB_RUNNING
+            job.attempts += 1
+            job.save(update_fields=['status', 'attempts', 'modified'])
+        return job
+
+    def get_job_queryset(self, subject_identifier):
+        return self.job_model_cls.objects.select_for_update().filter(
+            self.due, subject_identifier=subject_identifier)
+
+    def get_consent_queryset(self, subject_identifier):
+        return self.consent_model_cls.objects.filter(
+            subject_identifier=subject_identifier).order_by('-consent_datetime')
+
+    def run_once(self, subject_identifier):
+        from ..models.signals import schedule_subject
+
+        job = self.claim(subject_identifier)
+        if not job:
+            return None
+        try:
+            with transaction.atomic():
+                consent = self.get_consent_queryset(subject_identifier).first()
+                if not consent:
+                    raise self.consent_model_cls.DoesNotExist(
+                        f'Subject {subject_identifier} is not consented.')
+                schedule_subject(consent)
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.last_error = f'{e.__class__.__name__}: {e}'
+            job.next_run_datetime = get_utcnow() + timedelta(
+                seconds=self.get_retry_delay(job.attempts))
+        else:
+            job.status = JOB_DONE
+            job.last_error = None
+            job.next_run_datetime = None
+        job.save(update_fields=[
+            'status', 'last_error', 'next_run_datetime', 'modified'])
+        return job
+
+
+async_scheduler = AsyncScheduler()
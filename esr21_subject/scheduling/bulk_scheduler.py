@@ -0,0 +1,215 @@
+from django.apps import apps as django_apps
+from django.db import transaction
+from edc_appointment.constants import SCHEDULED_APPT
+from edc_visit_schedule.constants import ON_SCHEDULE
+
+from .schedule_resolver import ScheduleResolverError, schedule_resolver
+
+
+class BulkSchedulerError(Exception):
+    pass
+
+
+class BulkScheduler:
+    """Puts many subjects on one or more schedules at once.
+
+    Existing onschedule, schedule history and appointment rows are read
+    with one query each per chunk of subjects and only the missing rows
+    are created, with `bulk_create`. Model save() and post_save signals
+    are not called for the rows created.
+
+    Subjects put on the enrolment schedule of a capped cohort take a
+    slot in its CohortCapacity counter; those left once the cohort is
+    full are not put on the schedule and are reported as `full`.
+    """
+
+    appointment_model = 'edc_appointment.appointment'
+    cohort_capacity_model = 'esr21_subject.cohortcapacity'
+    consent_model = 'esr21_subject.informedconsent'
+    history_model = 'edc_visit_schedule.subjectschedulehistory'
+    registered_subject_model = 'edc_registration.registeredsubject'
+
+    def __init__(self, onschedule_model=None, chunk_size=None, progress=None):
+        self.onschedule_model = onschedule_model or 'esr21_subject.onschedule'
+        self.chunk_size = chunk_size or 500
+        self.progress = progress
+
+    @property
+    def onschedule_model_cls(self):
+        return django_apps.get_model(self.onschedule_model)
+
+    @property
+    def appointment_model_cls(self):
+        return django_apps.get_model(self.appointment_model)
+
+    @property
+    def history_model_cls(self):
+        return django_apps.get_model(self.history_model)
+
+    def get_schedules(self, schedule_names):
+        schedules = {}
+        for schedule_name in schedule_names:
+            try:
+                visit_schedule, schedule, _ = schedule_resolver.get(
+                    onschedule_model=self.onschedule_model,
+                    schedule_name=schedule_name)
+            except ScheduleResolverError as e:
+                raise BulkSchedulerError(e)
+            schedules.update({schedule_name: (visit_schedule, schedule)})
+        return schedules
+
+    def get_consents(self, subject_identifiers):
+        """Returns a dictionary of (consent_datetime, site_id) keyed by
+        subject identifier for registered, consented subjects.
+        """
+        consent_model_cls = django_apps.get_model(self.consent_model)
+        registered = set(
+            django_apps.get_model(self.registered_subject_model).objects.filter(
+                subject_identifier__in=subject_identifiers).values_list(
+                    'subject_identifier', flat=True))
+        consents = consent_model_cls.objects.filter(
+            subject_identifier__in=registered).order_by(
+                'consent_datetime').values_list(
+                    'subject_identifier', 'consent_datetime', 'site_id')
+        return {subject_identifier: (consent_datetime, site_id)
+                for subject_identifier, consent_datetime, site_id in consents}
+
+    def put_on_schedule_many(self, subject_identifiers, schedule_names):
+        """Puts each subject on each schedule and returns a dictionary
+        with the number of onschedule and appointment rows created and
+        the subjects skipped for not being registered or consented.
+        """
+        subject_identifiers = list(dict.fromkeys(subject_identifiers))
+        schedules = self.get_schedules(schedule_names)
+        result = dict(onschedules=0, appointments=0, skipped=[], full=[])
+        total = len(subject_identifiers)
+        for start in range(0, total, self.chunk_size):
+            chunk = subject_identifiers[start:start + self.chunk_size]
+            consents = self.get_consents(chunk)
+            result['skipped'].extend(
+                [subject_identifier for subject_identifier in chunk
+                 if subject_identifier not in consents])
+            with transaction.atomic():
+                for schedule_name, (visit_schedule, schedule) in schedules.items():
+                    onschedules, appointments, full = self.schedule_chunk(
+                        consents, visit_schedule, schedule)
+                    result['onschedules'] += onschedules
+                    result['appointments'] += appointments
+                    result['full'].extend(full)
+            if self.progress:
+                self.progress(min(start + self.chunk_size, total), total)
+        return result
+
+    def schedule_chunk(self, consents, visit_schedule, schedule):
+        subject_identifiers = list(consents)
+        existing = set(self.onschedule_model_cls.objects.filter(
+            subject_identifier__in=subject_identifiers,
+            schedule_name=schedule.name).values_list(
+                'subject_identifier', flat=True))
+        onschedules = [
+            self.onschedule_model_cls(
+                subject_identifier=subject_identifier,
+                schedule_name=schedule.name,
+                onschedule_datetime=consents[subject_identifier][0],
+                report_datetime=consents[subject_identifier][0],
+                site_id=consents[subject_identifier][1])
+            for subject_identifier in subject_identifiers
+            if subject_identifier not in existing]
+        full = []
+        cohort = self.get_capped_cohort(schedule.name)
+        if cohort:
+            taken = django_apps.get_model(
+                self.cohort_capacity_model).objects.reserve_many(
+                    cohort, len(onschedules))
+            full = [obj.subject_identifier for obj in onschedules[taken:]]
+            onschedules = onschedules[:taken]
+            consents = {subject_identifier: consent
+                        for subject_identifier, consent in consents.items()
+                        if subject_identifier not in full}
+            subject_identifiers = list(consents)
+        self.onschedule_model_cls.objects.bulk_create(onschedules)
+
+        existing = set(self.history_model_cls.objects.filter(
+            subject_identifier__in=subject_identifiers,
+            visit_schedule_name=visit_schedule.name,
+            schedule_name=schedule.name).values_list(
+                'subject_identifier', flat=True))
+        self.history_model_cls.objects.bulk_create([
+            self.history_model_cls(
+                subject_identifier=subject_identifier,
+                onschedule_model=schedule.onschedule_model,
+                offschedule_model=schedule.offschedule_model,
+                visit_schedule_name=visit_schedule.name,
+                schedule_name=schedule.name,
+                onschedule_datetime=consents[subject_identifier][0],
+                schedule_status=ON_SCHEDULE)
+            for subject_identifier in subject_identifiers
+            if subject_identifier not in existing])
+
+        appointments = self.get_appointments(consents, visit_schedule, schedule)
+        self.appointment_model_cls.objects.bulk_create(appointments)
+        return len(onschedules), len(appointments), full
+
+    def get_capped_cohort(self, schedule_name):
+        """Returns the cohort whose enrolment schedule this is, if its
+        enrolment is capped, otherwise None.
+        """
+        for cohort in django_apps.get_app_config(
+                'esr21_subject').cohort_capacities:
+            if schedule_name == f'{cohort}_enrol_schedule':
+                return cohort
+        return None
+
+    def get_appointments(self, consents, visit_schedule, schedule):
+        """Returns unsaved appointments for the visits not yet
+        appointed, dated as the appointment creator would date them.
+        """
+        facility_app_config = django_apps.get_app_config('edc_facility')
+        existing = {}
+        appointments = self.appointment_model_cls.objects.filter(
+            subject_identifier__in=list(consents),
+            visit_schedule_name=visit_schedule.name,
+            schedule_name=schedule.name,
+            visit_code_sequence=0).values_list(
+                'subject_identifier', 'visit_code', 'appt_datetime')
+        for subject_identifier, visit_code, appt_datetime in appointments:
+            existing.setdefault(subject_identifier, {}).update(
+                {visit_code: appt_datetime})
+
+        new_appointments = []
+        for subject_identifier, (onschedule_datetime, site_id) in consents.items():
+            appointed = existing.get(subject_identifier, {})
+            taken_datetimes = list(appointed.values())
+            for visit in schedule.visits.values():
+                if visit.code in appointed:
+                    continue
+                facility = facility_app_config.get_facility(visit.facility_name)
+                timepoint_datetime = onschedule_datetime + visit.rbase
+                appt_datetime = facility.available_arr(
+                    suggested_datetime=timepoint_datetime,
+                    forward_delta=visit.rupper,
+                    reverse_delta=visit.rlower,
+                    taken_datetimes=taken_datetimes).datetime
+                taken_datetimes.append(appt_datetime)
+                new_appointments.append(
+                    self.appointment_model_cls(
+                        subject_identifier=subject_identifier,
+                        visit_schedule_name=visit_schedule.name,
+                        schedule_name=schedule.name,
+                        visit_code=visit.code,
+                        visit_code_sequence=0,
+                        timepoint=visit.timepoint,
+                        timepoint_datetime=timepoint_datetime,
+                        appt_datetime=appt_datetime,
+                        appt_reason=SCHEDULED_APPT,
+                        facility_name=facility.name,
+                        site_id=site_id))
+        return new_appointments
+
+
+def put_on_schedule_many(subject_identifiers, schedule_names,
+                         onschedule_model=None, progress=None):
+    return BulkScheduler(
+        onschedule_model=onschedule_model,
+        progress=progress).put_on_schedule_many(
+            subject_identifiers, schedule_names)
@@ -0,0 +1,78 @@
+from django.apps import apps as django_apps
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+
+class ScheduleResolverError(Exception):
+    pass
+
+
+class ScheduleResolver:
+    """A process-wide index of (onschedule_model, schedule_name) to
+    (visit_schedule, schedule, onschedule_model_cls).
+
+    The index is built once from the visit schedule registry and rebuilt
+    after a visit schedule is registered. Registration bumps `version`
+    through the hook installed by `connect`. Code that replaces the
+    registry directly, e.g. a test, should call `invalidate`.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def connect(self, site):
+        """Wraps the site's `register` to invalidate the index after
+        each visit schedule is registered.
+        """
+        register = site.register
+
+        def register_and_invalidate(*args, **kwargs):
+            register(*args, **kwargs)
+            self.invalidate()
+
+        site.register = register_and_invalidate
+
+    def build(self):
+        index = {}
+        for visit_schedule in site_visit_schedules.registry.values():
+            for schedule in visit_schedule.schedules.values():
+                index.update({
+                    (schedule.onschedule_model, schedule.name): (
+                        visit_schedule, schedule,
+                        django_apps.get_model(schedule.onschedule_model))})
+        self._index = index
+        self._version = self.version
+
+    def invalidate(self):
+        self.version += 1
+        self._index = None
+
+    def get(self, onschedule_model=None, schedule_name=None):
+        """Returns a tuple of (visit_schedule, schedule, onschedule_model_cls).
+        """
+        if self._index is None or self._version != self.version:
+            self.build()
+        try:
+            resolved = self._index[(onschedule_model, schedule_name)]
+        except KeyError:
+            self.misses += 1
+            raise ScheduleResolverError(
+                f'Schedule not found. Got onschedule_model={onschedule_model}, '
+                f'schedule_name={schedule_name}.')
+        else:
+            self.hits += 1
+        return resolved
+
+    @property
+    def stats(self):
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self._index or {}))
+
+
+schedule_resolver = ScheduleResolver()
+schedule_resolver.connect(site_visit_schedules)
@@ -0,0 +1 @@
+from .bulk_screening import BulkScreening, BulkScreeningError
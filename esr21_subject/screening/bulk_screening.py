@@ -0,0 +1,113 @@
+from django.apps import apps as django_apps
+from django.contrib.sites.models import Site
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from edc_base.utils import get_utcnow
+from edc_constants.constants import NO, YES
+
+from ..identifiers import ScreeningIdentifier
+from ..models.eligibility import BatchEligibility
+
+
+class BulkScreeningError(Exception):
+    pass
+
+
+class BulkScreening:
+    """Creates eligibility confirmations for many candidates at once,
+    e.g. from a mass vaccination screening day spreadsheet.
+
+    The eligibility criteria are applied column by column, screening
+    identifiers are made in one block per chunk and the rows are inserted
+    with `bulk_create`. Model save(), signals and historical records are
+    not called for the rows created.
+    """
+
+    eligibility_model = 'esr21_subject.eligibilityconfirmation'
+    identifier_cls = ScreeningIdentifier
+
+    def __init__(self, chunk_size=None, site_id=None, user_created=None):
+        self.chunk_size = chunk_size or 1000
+        self.site_id = site_id
+        self.user_created = user_created
+
+    @property
+    def eligibility_model_cls(self):
+        return django_apps.get_model(self.eligibility_model)
+
+    def clean(self, rows):
+        """Returns the rows as (age_in_years, received_vaccines,
+        report_datetime) tuples, raising BulkScreeningError listing every
+        invalid row.
+        """
+        cleaned, errors = [], []
+        for index, row in enumerate(rows, start=1):
+            try:
+                age_in_years = int(row.get('age_in_years'))
+            except (TypeError, ValueError):
+                errors.append(
+                    f'Row {index}: invalid age_in_years. Got {row.get("age_in_years")}.')
+                continue
+            received_vaccines = (row.get('received_vaccines') or '').strip().title()
+            if received_vaccines not in [YES, NO]:
+                errors.append(
+                    f'Row {index}: invalid received_vaccines. '
+                    f'Got {row.get("received_vaccines")}.')
+                continue
+            report_datetime = get_utcnow()
+            if row.get('report_datetime'):
+                report_datetime = parse_datetime(row.get('report_datetime'))
+                if not report_datetime:
+                    errors.append(
+                        f'Row {index}: invalid report_datetime. '
+                        f'Got {row.get("report_datetime")}.')
+                    continue
+            cleaned.append((age_in_years, received_vaccines, report_datetime))
+        if errors:
+            raise BulkScreeningError(' '.join(errors))
+        return cleaned
+
+    def screen(self, rows):
+        """Screens the rows and returns a dictionary with the number of
+        rows created and of those eligible.
+        """
+        rows = self.clean(rows)
+        site_id = self.site_id or Site.objects.get_current().id
+        result = dict(created=0, eligible=0)
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            ages_in_years, received_vaccines, report_datetimes = zip(*chunk)
+            eligibility = BatchEligibility(ages_in_years, received_vaccines)
+            with transaction.atomic():
+                screening_identifiers = self.identifier_cls.make_many(
+                    len(chunk), site_id=site_id)
+                objs = []
+                for values in zip(
+                        screening_identifiers, ages_in_years, received_vaccines,
+                        report_datetimes, eligibility.is_eligible,
+                        eligibility.error_messages):
+                    objs.append(self.get_model_obj(*values, site_id=site_id))
+                self.eligibility_model_cls.objects.bulk_create(objs)
+            result['created'] += len(objs)
+            result['eligible'] += sum(eligibility.is_eligible)
+        return result
+
+    def get_model_obj(self, screening_identifier, age_in_years,
+                      received_vaccines, report_datetime, is_eligible,
+                      error_message, site_id=None):
+        """Returns an unsaved eligibility confirmation with the values
+        save() would have set.
+        """
+        obj = self.eligibility_model_cls(
+            screening_identifier=screening_identifier,
+            age_in_years=age_in_years,
+            received_vaccines=received_vaccines,
+            report_datetime=report_datetime,
+            is_eligible=is_eligible,
+            ineligibility=error_message,
+            site_id=site_id)
+        if self.user_created:
+            obj.user_created = self.user_created
+        obj.slug = obj.search_slug_updater_cls(
+            fields=obj.get_search_slug_fields(), model_obj=obj).slug
+        return obj
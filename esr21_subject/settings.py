@@ -76,6 +76,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.contrib.sites.middleware.CurrentSiteMiddleware',
     'edc_subject_dashboard.middleware.DashboardMiddleware',
+    'esr21_subject.profiling.middleware.QueryProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'esr21_subject.urls'
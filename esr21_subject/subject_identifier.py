@@ -1,6 +1,22 @@
 from edc_identifier.subject_identifier import SubjectIdentifier
 
+from .identifier_allocator import IdentifierAllocator
+
 
 class SubjectIdentifier(SubjectIdentifier):
 
     template = '{protocol_number}-0{site_id}{device_id}{sequence}'
+
+    @property
+    def sequence_number(self):
+        """Returns the next sequence number for the device and site,
+        from the allocator's reserved block, skipping any already
+        recorded in the identifier model.
+        """
+        if not getattr(self, '_sequence_number', None):
+            self._sequence_number = subject_identifier_allocator.next(
+                self.device_id, site_id=self.site.pk)
+        return self._sequence_number
+
+
+subject_identifier_allocator = IdentifierAllocator(name=SubjectIdentifier.label)
@@ -0,0 +1,34 @@
+from dateutil.relativedelta import relativedelta
+from edc_appointment.models import Appointment
+from edc_base.utils import get_utcnow
+from edc_constants.constants import FEMALE, OMANG
+from edc_visit_tracking.constants import SCHEDULED
+from model_mommy import mommy
+
+
+def make_subject_visit(visit_code='1000', **consent_options):
+    """Consents a 45 year old female participant, or as given by
+    `consent_options`, and returns her scheduled subject visit.
+
+    Holidays must be imported first, see `import_holidays`.
+    """
+    eligibility = mommy.make_recipe('esr21_subject.eligibilityconfirmation')
+    options = dict(
+        screening_identifier=eligibility.screening_identifier,
+        consent_datetime=get_utcnow(),
+        version=1,
+        dob=(get_utcnow() - relativedelta(years=45)).date(),
+        first_name='TEST ONE',
+        last_name='TEST',
+        initials='TOT',
+        identity_type=OMANG,
+        gender=FEMALE)
+    options.update(consent_options)
+    subject_consent = mommy.make_recipe('esr21_subject.informedconsent', **options)
+    return mommy.make_recipe(
+        'esr21_subject.subjectvisit',
+        appointment=Appointment.objects.get(
+            subject_identifier=subject_consent.subject_identifier,
+            visit_code=visit_code),
+        report_datetime=get_utcnow(),
+        reason=SCHEDULED)
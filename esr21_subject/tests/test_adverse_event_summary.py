@@ -0,0 +1,127 @@
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from edc_constants.constants import NO, YES
+from edc_facility.import_holidays import import_holidays
+from model_mommy import mommy
+
+from ..models import AdverseEvent, AdverseEventSummary, AdverseEventTerm
+from ..models import SeriousAdverseEvent
+from ..models.adverse_event_summary import TOTAL, get_summary_counts
+from ..models.list_models import SAECriteria
+from ..models.adverse_event_term import tokenize
+from .helpers import make_subject_visit
+
+
+@tag('adverse_event_summary')
+class TestAdverseEventSummary(TestCase):
+
+    def test_summary_counts(self):
+        adverse_event = AdverseEvent(
+            ae_grade='mild', serious_event=YES, special_interest_ae=NO,
+            covid_related_ae=NO, study_treatmnt_rel='related')
+        counts = get_summary_counts(adverse_event)
+        self.assertEqual(counts[(TOTAL, '')], 1)
+        self.assertEqual(counts[('ae_grade', 'mild')], 1)
+        self.assertEqual(counts[('serious_event', YES)], 1)
+        self.assertEqual(counts[('study_treatmnt_rel', 'related')], 1)
+
+    def test_summary_counts_of_previous_values(self):
+        adverse_event = AdverseEvent(ae_grade='severe')
+        counts = get_summary_counts(adverse_event, values={'ae_grade': 'mild'})
+        self.assertEqual(counts[('ae_grade', 'mild')], 1)
+        self.assertEqual(counts[('ae_grade', 'severe')], 0)
+
+
+@tag('adverse_event_summary')
+class TestAdverseEventSummarySignals(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        self.subject_visit = make_subject_visit()
+        self.criteria = [
+            SAECriteria.objects.create(
+                name=name, short_name=name, display_index=index)
+            for index, name in enumerate(['death', 'hospitalized'])]
+
+    def counters(self):
+        return {
+            (obj.model, obj.field, obj.value, obj.site_id): obj.count
+            for obj in AdverseEventSummary.objects.all() if obj.count}
+
+    def assertCountersRebuilt(self):
+        counters = self.counters()
+        rebuilt = {
+            (obj.model, obj.field, obj.value, obj.site_id): obj.count
+            for obj in AdverseEventSummary.objects.rebuild() if obj.count}
+        self.assertEqual(counters, rebuilt)
+        return counters
+
+    def test_counters_match_rebuild(self):
+        adverse_event = mommy.make(
+            AdverseEvent, subject_visit=self.subject_visit,
+            report_datetime=self.subject_visit.report_datetime,
+            ae_grade='mild', serious_event=YES, special_interest_ae=NO,
+            covid_related_ae=NO)
+        serious_adverse_event = mommy.make(
+            SeriousAdverseEvent, adverse_event=adverse_event)
+        serious_adverse_event.seriousness_criteria.add(*self.criteria)
+        counters = self.assertCountersRebuilt()
+        self.assertEqual(counters.get((
+            'esr21_subject.seriousadverseevent', 'seriousness_criteria',
+            'death', adverse_event.site_id)), 1)
+
+        adverse_event.ae_grade = 'severe'
+        adverse_event.save()
+        serious_adverse_event.seriousness_criteria.remove(self.criteria[0])
+        counters = self.assertCountersRebuilt()
+        self.assertEqual(counters.get((
+            'esr21_subject.adverseevent', 'ae_grade', 'severe',
+            adverse_event.site_id)), 1)
+        self.assertNotIn((
+            'esr21_subject.adverseevent', 'ae_grade', 'mild',
+            adverse_event.site_id), counters)
+
+        serious_adverse_event.delete()
+        adverse_event.delete()
+        self.assertEqual(self.assertCountersRebuilt(), {})
+
+
+@tag('adverse_event_term')
+class TestAdverseEventTerm(TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize('Injection-site PAIN 10022086'),
+            ['injection', 'site', 'pain', '10022086'])
+
+    def test_terms(self):
+        adverse_event = AdverseEvent(
+            ae_name='Sore arm', meddra_pname='Injection site pain',
+            meddra_pcode='10022086')
+        tokens = {term.token for term in
+                  AdverseEventTerm.objects.get_terms(adverse_event)}
+        self.assertEqual(
+            tokens, {'sore', 'arm', 'injection', 'site', 'pain', '10022086'})
+
+    def test_search(self):
+        ae, sae = 'esr21_subject.adverseevent', 'esr21_subject.seriousadverseevent'
+        now = get_utcnow()
+        rows = [
+            (ae, '1', ['injection', 'site', 'pain'], now - relativedelta(days=2)),
+            (ae, '2', ['injection', 'site', 'swelling'], now - relativedelta(days=1)),
+            (sae, '3', ['chest', 'pain', '10008479'], now)]
+        AdverseEventTerm.objects.bulk_create([
+            AdverseEventTerm(model=model, object_id=object_id, token=token,
+                             report_datetime=report_datetime)
+            for model, object_id, tokens, report_datetime in rows
+            for token in tokens])
+        search = AdverseEventTerm.objects.search
+        self.assertEqual(search('Inj site'), [(ae, '2'), (ae, '1')])
+        self.assertEqual(search('inj pa'), [(ae, '1')])
+        self.assertEqual(search('pain'), [(sae, '3'), (ae, '1')])
+        self.assertEqual(search('pain', models=[ae]), [(ae, '1')])
+        self.assertEqual(search('pain', models=[]), [])
+        self.assertEqual(search('inj', limit=1), [(ae, '2')])
+        self.assertEqual(search('1000'), [(sae, '3')])
+        self.assertEqual(search('p'), [])
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from edc_facility.import_holidays import import_holidays
+from model_mommy import mommy
+
+from ..constants import JOB_DONE, JOB_RUNNING
+from ..models import OnSchedule, SchedulingJob
+from ..scheduling import async_scheduler
+
+
+@tag('async_scheduler')
+class TestAsyncScheduler(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        eligibility = mommy.make_recipe('esr21_subject.eligibilityconfirmation')
+        self.subject_identifier = mommy.make_recipe(
+            'esr21_subject.informedconsent',
+            screening_identifier=eligibility.screening_identifier).subject_identifier
+
+    def make_running_job(self, seconds_ago):
+        job = SchedulingJob.objects.create(
+            subject_identifier=self.subject_identifier,
+            status=JOB_RUNNING, attempts=1)
+        SchedulingJob.objects.filter(pk=job.pk).update(
+            modified=get_utcnow() - timedelta(seconds=seconds_ago))
+        return job
+
+    def test_running_job_within_lease_not_due(self):
+        self.make_running_job(seconds_ago=10)
+        self.assertFalse(
+            SchedulingJob.objects.filter(async_scheduler.due).exists())
+        self.assertIsNone(async_scheduler.claim(self.subject_identifier))
+
+    def test_running_job_past_lease_rerun(self):
+        job = self.make_running_job(
+            seconds_ago=async_scheduler.lease_seconds + 60)
+        self.assertTrue(
+            SchedulingJob.objects.filter(async_scheduler.due).exists())
+        call_command('run_scheduling_jobs')
+        job.refresh_from_db()
+        self.assertEqual(job.status, JOB_DONE)
+        self.assertEqual(job.attempts, 2)
+        self.assertTrue(OnSchedule.objects.filter(
+            subject_identifier=self.subject_identifier).exists())
@@ -0,0 +1,46 @@
+import os
+from unittest import skipUnless
+
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+
+from ..benchmarks import EnrolmentBenchmark, compare_to_baseline, load_baseline
+
+
+@tag('benchmark')
+class TestEnrolmentBenchmark(TestCase):
+
+    databases = '__all__'
+
+    n = 10
+
+    def setUp(self):
+        import_holidays()
+
+    def get_results(self):
+        baseline = load_baseline()
+        if str(self.n) not in baseline:
+            self.skipTest(
+                f'No baseline for n={self.n}. Run `manage.py run_benchmarks '
+                f'--n {self.n} --update-baseline` and commit the file.')
+        results = EnrolmentBenchmark(n=self.n).run()
+        self.assertEqual(results['screening']['operations'], self.n)
+        self.assertEqual(results['consent']['operations'], self.n)
+        return results, baseline
+
+    def test_enrolment_to_visit_queries(self):
+        """Assert that no stage of the enrolment to visit workflow runs
+        more queries per operation than the baseline.
+        """
+        results, baseline = self.get_results()
+        self.assertEqual(
+            compare_to_baseline(self.n, results, baseline, timings=False), [])
+
+    @skipUnless(os.environ.get('ESR21_BENCHMARK_TIMINGS'),
+                'Timings depend on the machine. Set ESR21_BENCHMARK_TIMINGS=1.')
+    def test_enrolment_to_visit_timings(self):
+        """Assert that no stage of the enrolment to visit workflow is
+        slower per operation than the baseline.
+        """
+        results, baseline = self.get_results()
+        self.assertEqual(compare_to_baseline(self.n, results, baseline), [])
@@ -0,0 +1,175 @@
+import json
+import uuid
+
+from django.contrib.auth.models import Permission, User
+from django.test import TestCase, tag
+from edc_appointment.models import Appointment
+from edc_base.utils import get_utcnow
+from edc_constants.constants import NO, YES
+from edc_facility.import_holidays import import_holidays
+from edc_metadata.constants import KEYED
+from edc_metadata.models import CrfMetadata
+from edc_visit_tracking.constants import SCHEDULED
+from model_mommy import mommy
+
+from ..ingestion import BulkCrfIngestion, BulkCrfIngestionError
+from ..models import AdverseEvent, AdverseEventSummary, AdverseEventTerm
+from ..models import SeriousAdverseEvent
+from ..models.list_models import SAECriteria
+from .helpers import make_subject_visit
+
+
+@tag('bulk_crf_ingestion')
+class TestBulkCrfIngestion(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        self.subject_visit = make_subject_visit()
+
+    def test_rejected_records_are_reported(self):
+        records = [
+            {'id': 'a', 'model': 'esr21_subject.unknown',
+             'subject_visit': str(uuid.uuid4())},
+            {'id': 'b', 'model': 'esr21_subject.eligibilityconfirmation',
+             'subject_visit': str(uuid.uuid4())},
+            {'id': 'c', 'model': 'esr21_subject.vitalsigns',
+             'subject_visit': str(uuid.uuid4())}]
+        result = BulkCrfIngestion().ingest_lines(
+            [json.dumps(record) for record in records])
+        self.assertEqual(result.get('created'), 0)
+        self.assertIn('Unknown model', result.get('errors').get('a'))
+        self.assertIn('Not a CRF', result.get('errors').get('b'))
+        self.assertIn('Subject visit not found', result.get('errors').get('c'))
+
+    def test_invalid_visit_keys_are_rejected_per_record(self):
+        records = [
+            {'id': 'bad-pk', 'model': 'esr21_subject.vitalsigns',
+             'subject_visit': 'not-a-uuid'},
+            {'id': 'bad-sequence', 'model': 'esr21_subject.vitalsigns',
+             'subject_visit': {
+                 'subject_identifier': self.subject_visit.subject_identifier,
+                 'visit_code': '1000', 'visit_code_sequence': 'x'}},
+            {'id': 'good', 'model': 'esr21_subject.vitalsigns',
+             'subject_visit': str(self.subject_visit.pk),
+             'data': {'report_datetime': get_utcnow().isoformat()}}]
+        result = BulkCrfIngestion().ingest(records)
+        errors = result.get('errors')
+        self.assertIn('Invalid subject visit', errors.get('bad-pk'))
+        self.assertIn('Invalid visit_code_sequence', errors.get('bad-sequence'))
+        self.assertNotIn('Subject visit', str(errors.get('good', '')))
+        self.assertNotIn('Invalid', str(errors.get('good', '')))
+
+    def test_records_the_user_may_not_add_are_rejected(self):
+        user = User.objects.create(username='staff', is_staff=True)
+        record = {'id': 'a', 'model': 'esr21_subject.vitalsigns',
+                  'subject_visit': str(self.subject_visit.pk),
+                  'data': {'report_datetime': get_utcnow().isoformat()}}
+        result = BulkCrfIngestion(user=user).ingest([record])
+        self.assertEqual(result.get('created'), 0)
+        self.assertIn('Permission denied', result.get('errors').get('a'))
+
+        user.user_permissions.add(Permission.objects.get(
+            content_type__app_label='esr21_subject', codename='add_vitalsigns'))
+        user = User.objects.get(pk=user.pk)
+        result = BulkCrfIngestion(user=user).ingest([record])
+        self.assertNotIn('Permission denied', str(result.get('errors').get('a', '')))
+
+    def test_invalid_json_raises(self):
+        self.assertRaises(
+            BulkCrfIngestionError, BulkCrfIngestion().ingest_lines, ['{'])
+
+    def test_adverse_event_with_serious_adverse_event_created(self):
+        criteria = SAECriteria.objects.create(
+            name='hospitalized', short_name='hospitalized', display_index=0)
+        # the AE may be a PRN form at this visit, so make sure it has metadata
+        CrfMetadata.objects.get_or_create(
+            subject_identifier=self.subject_visit.subject_identifier,
+            model='esr21_subject.adverseevent',
+            **self.subject_visit.metadata_query_options)
+        today = get_utcnow().date().isoformat()
+        record = {
+            'id': 'ae', 'model': 'esr21_subject.adverseevent',
+            'subject_visit': str(self.subject_visit.pk),
+            'data': {
+                'report_datetime': get_utcnow().isoformat(),
+                'experienced_ae': YES,
+                'ae_name': 'Sore arm',
+                'event_details': 'Sore arm after vaccination',
+                'meddra_pname': 'Injection site pain',
+                'meddra_pcode': '10022086',
+                'meddra_version': 24,
+                'start_date': today,
+                'status': 'ongoing',
+                'ae_grade': 'moderate',
+                'study_treatmnt_rel': 'related',
+                'nonstudy_treatmnt_rel': 'not_related',
+                'studyproc_treatmnt_rel': 'not_related',
+                'action_taken': 'dose_not_changed',
+                'outcome': 'resolving',
+                'serious_event': YES,
+                'special_interest_ae': NO,
+                'medically_attended_ae': NO,
+                'treatment_given': NO,
+                'ae_study_discontinued': NO,
+                'covid_related_ae': NO},
+            'inlines': {'seriousadverseevent_set': [{
+                'sae_name': 'Cellulitis',
+                'sae_details': 'Admitted with cellulitis of the arm',
+                'meddra_pname': 'Cellulitis',
+                'meddra_pcode': '10007882',
+                'meddra_version': 24,
+                'sae_intensity': 'moderate',
+                'start_date': today,
+                'date_aware_of': today,
+                'seriousness_criteria': [str(criteria.pk)],
+                'admission_date': today,
+                'rationale': 'Local reaction',
+                'event_abate': NO,
+                'describe_sae_treatmnt': 'Antibiotics',
+                'test_performed': 'FBC',
+                'additional_info': 'None'}]}}
+
+        result = BulkCrfIngestion().ingest([record])
+
+        self.assertEqual(result, {'created': 1, 'errors': {}})
+        adverse_event = AdverseEvent.objects.get(subject_visit=self.subject_visit)
+        self.assertEqual(
+            adverse_event.subject_identifier, self.subject_visit.subject_identifier)
+        serious_adverse_event = SeriousAdverseEvent.objects.get(
+            adverse_event=adverse_event)
+        self.assertEqual(
+            list(serious_adverse_event.seriousness_criteria.all()), [criteria])
+        self.assertEqual(
+            CrfMetadata.objects.get(
+                subject_identifier=self.subject_visit.subject_identifier,
+                model='esr21_subject.adverseevent',
+                **self.subject_visit.metadata_query_options).entry_status,
+            KEYED)
+        self.assertEqual(AdverseEventSummary.objects.get(
+            model='esr21_subject.adverseevent', field='ae_grade',
+            value='moderate', site_id=adverse_event.site_id).count, 1)
+        self.assertEqual(AdverseEventSummary.objects.get(
+            model='esr21_subject.seriousadverseevent',
+            field='seriousness_criteria', value='hospitalized',
+            site_id=adverse_event.site_id).count, 1)
+        self.assertEqual(
+            AdverseEventTerm.objects.search('cellulitis'),
+            [('esr21_subject.seriousadverseevent', str(serious_adverse_event.pk))])
+        self.assertIn(
+            ('esr21_subject.adverseevent', str(adverse_event.pk)),
+            AdverseEventTerm.objects.search('injection site'))
+
+    def test_record_missing_previous_visit_rejected(self):
+        appointment = Appointment.objects.filter(
+            subject_identifier=self.subject_visit.subject_identifier).order_by(
+                'timepoint')[1]
+        subject_visit = mommy.make_recipe(
+            'esr21_subject.subjectvisit', appointment=appointment,
+            report_datetime=get_utcnow(), reason=SCHEDULED)
+        self.subject_visit.delete()
+        record = {'id': 'a', 'model': 'esr21_subject.vitalsigns',
+                  'subject_visit': str(subject_visit.pk),
+                  'data': {'report_datetime': get_utcnow().isoformat()}}
+        result = BulkCrfIngestion().ingest([record])
+        self.assertEqual(result.get('created'), 0)
+        self.assertIn('Previous visit', str(result.get('errors').get('a')))
@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.test import TestCase, tag
+from django_crypto_fields.models import Crypt
+from edc_facility.import_holidays import import_holidays
+
+from ..admin.modeladmin_mixins import EncryptedSearchMixin
+from ..admin_site import esr21_subject_admin
+from ..bulk_decryption import BulkDecryptor
+from ..models import InformedConsent
+from .helpers import make_subject_visit
+
+
+class InformedConsentSearchAdmin(EncryptedSearchMixin, admin.ModelAdmin):
+
+    search_fields = ('subject_identifier', )
+
+    encrypted_search_fields = ('identity', 'first_name')
+
+
+@tag('bulk_decryption')
+class TestBulkDecryption(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        make_subject_visit()
+        make_subject_visit(first_name='TEST TWO', initials='TTT')
+
+    def get_values(self, objs):
+        return {obj.pk: (obj.first_name, obj.last_name, obj.identity)
+                for obj in objs}
+
+    def test_iterator_round_trip(self):
+        expected = self.get_values(InformedConsent.objects.all())
+        self.assertEqual(len(expected), 2)
+        objs = list(BulkDecryptor().iterator(
+            InformedConsent.objects.all(), chunk_size=1))
+        self.assertEqual(self.get_values(objs), expected)
+
+    def test_value_decrypted_once(self):
+        field = InformedConsent._meta.get_field('last_name')
+        decryptor = BulkDecryptor()
+        with mock.patch.object(
+                field.field_cryptor, 'decrypt',
+                wraps=field.field_cryptor.decrypt) as decrypt:
+            objs = list(decryptor.iterator(InformedConsent.objects.all()))
+            list(decryptor.iterator(InformedConsent.objects.all()))
+        self.assertEqual({obj.last_name for obj in objs}, {'TEST'})
+        self.assertEqual(decrypt.call_count, 1)
+
+
+@tag('bulk_decryption')
+class TestEncryptedSearch(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        self.subject_identifier = make_subject_visit().subject_identifier
+        self.consent = InformedConsent.objects.get(
+            subject_identifier=self.subject_identifier)
+        self.model_admin = InformedConsentSearchAdmin(
+            InformedConsent, esr21_subject_admin)
+
+    def search(self, search_term):
+        results, _ = self.model_admin.get_search_results(
+            None, InformedConsent.objects.all(), search_term)
+        return list(results)
+
+    def test_search_round_trip(self):
+        self.assertEqual(self.search(self.consent.identity), [self.consent])
+        self.assertEqual(self.search(' TEST ONE '), [self.consent])
+        self.assertEqual(self.search(self.subject_identifier), [self.consent])
+
+    def test_search_does_not_store_secrets(self):
+        crypt_count = Crypt.objects.count()
+        self.assertEqual(self.search('999999999'), [])
+        self.assertEqual(Crypt.objects.count(), crypt_count)
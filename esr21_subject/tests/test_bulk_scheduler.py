@@ -0,0 +1,75 @@
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+from edc_appointment.models import Appointment
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule.models import SubjectScheduleHistory
+from model_mommy import mommy
+
+from ..models import CohortCapacity, OnSchedule
+from ..scheduling import put_on_schedule_many
+
+
+@tag('bulk_scheduler')
+class TestBulkScheduler(TestCase):
+
+    schedule_names = ['esr21_sub_enrol_schedule', 'esr21_sub_fu_schedule']
+
+    def setUp(self):
+        import_holidays()
+        self.app_config = django_apps.get_app_config('esr21_subject')
+        self.cohort_capacities = self.app_config.cohort_capacities
+        eligibility = mommy.make_recipe('esr21_subject.eligibilityconfirmation')
+        self.subject_identifier = mommy.make_recipe(
+            'esr21_subject.informedconsent',
+            screening_identifier=eligibility.screening_identifier).subject_identifier
+        self.expected = self.get_appointments()
+        Appointment.objects.filter(
+            subject_identifier=self.subject_identifier).delete()
+        SubjectScheduleHistory.objects.filter(
+            subject_identifier=self.subject_identifier).delete()
+        OnSchedule.objects.filter(
+            subject_identifier=self.subject_identifier).delete()
+
+    def tearDown(self):
+        self.app_config.cohort_capacities = self.cohort_capacities
+
+    def get_appointments(self):
+        return {
+            (schedule_name, visit_code): (timepoint_datetime, appt_datetime)
+            for schedule_name, visit_code, timepoint_datetime, appt_datetime in
+            Appointment.objects.filter(
+                subject_identifier=self.subject_identifier).values_list(
+                    'schedule_name', 'visit_code', 'timepoint_datetime',
+                    'appt_datetime')}
+
+    def test_bulk_matches_put_on_schedule(self):
+        self.assertTrue(self.expected)
+        result = put_on_schedule_many(
+            [self.subject_identifier], self.schedule_names)
+        self.assertEqual(result.get('onschedules'), 2)
+        self.assertEqual(result.get('appointments'), len(self.expected))
+        self.assertEqual(self.get_appointments(), self.expected)
+        self.assertEqual(
+            OnSchedule.objects.filter(
+                subject_identifier=self.subject_identifier).count(), 2)
+        self.assertEqual(
+            SubjectScheduleHistory.objects.filter(
+                subject_identifier=self.subject_identifier).count(), 2)
+
+    def test_bulk_idempotent(self):
+        put_on_schedule_many([self.subject_identifier], self.schedule_names)
+        result = put_on_schedule_many(
+            [self.subject_identifier], self.schedule_names)
+        self.assertEqual(result.get('onschedules'), 0)
+        self.assertEqual(result.get('appointments'), 0)
+        self.assertEqual(self.get_appointments(), self.expected)
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 1)
+
+    def test_bulk_reserves_capped_cohort(self):
+        self.app_config.cohort_capacities = {'esr21_sub': 0}
+        result = put_on_schedule_many(
+            [self.subject_identifier], ['esr21_sub_enrol_schedule'])
+        self.assertEqual(result.get('full'), [self.subject_identifier])
+        self.assertEqual(result.get('onschedules'), 0)
+        self.assertEqual(result.get('appointments'), 0)
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 0)
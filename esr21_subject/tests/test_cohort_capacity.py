@@ -0,0 +1,75 @@
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+from model_mommy import mommy
+
+from ..models import CohortCapacity, InformedConsent, OnSchedule
+
+
+@tag('cohort_capacity')
+class TestCohortCapacity(TestCase):
+
+    def setUp(self):
+        self.app_config = django_apps.get_app_config('esr21_subject')
+        self.cohort_capacities = self.app_config.cohort_capacities
+        self.app_config.cohort_capacities = {'esr21_sub': 2}
+
+    def tearDown(self):
+        self.app_config.cohort_capacities = self.cohort_capacities
+
+    def test_reserve(self):
+        self.assertTrue(CohortCapacity.objects.reserve('esr21_sub'))
+        self.assertEqual(CohortCapacity.objects.remaining('esr21_sub'), 1)
+
+    def test_reserve_over_capacity(self):
+        self.assertTrue(CohortCapacity.objects.reserve('esr21_sub'))
+        self.assertTrue(CohortCapacity.objects.reserve('esr21_sub'))
+        self.assertFalse(CohortCapacity.objects.reserve('esr21_sub'))
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 2)
+
+    def test_capacity_read_from_config_on_reserve(self):
+        self.assertTrue(CohortCapacity.objects.reserve('esr21_sub'))
+        self.assertTrue(CohortCapacity.objects.reserve('esr21_sub'))
+        self.app_config.cohort_capacities = {'esr21_sub': 3}
+        self.assertTrue(CohortCapacity.objects.reserve('esr21_sub'))
+
+    def test_release(self):
+        CohortCapacity.objects.reserve('esr21_sub')
+        CohortCapacity.objects.release('esr21_sub')
+        CohortCapacity.objects.release('esr21_sub')
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 0)
+
+    def test_slot_kept_on_consent_delete_and_reconsent(self):
+        import_holidays()
+        eligibility = mommy.make_recipe('esr21_subject.eligibilityconfirmation')
+        consent = mommy.make_recipe(
+            'esr21_subject.informedconsent',
+            screening_identifier=eligibility.screening_identifier)
+        self.assertTrue(OnSchedule.objects.filter(
+            subject_identifier=consent.subject_identifier,
+            schedule_name='esr21_sub_enrol_schedule').exists())
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 1)
+        InformedConsent.objects.filter(pk=consent.pk).delete()
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 1)
+        mommy.make_recipe(
+            'esr21_subject.informedconsent',
+            screening_identifier=eligibility.screening_identifier,
+            subject_identifier=consent.subject_identifier,
+            identity=consent.identity,
+            confirm_identity=consent.identity,
+            dob=consent.dob,
+            gender=consent.gender)
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 1)
+
+    def test_release_on_enrol_schedule_delete(self):
+        import_holidays()
+        eligibility = mommy.make_recipe('esr21_subject.eligibilityconfirmation')
+        consent = mommy.make_recipe(
+            'esr21_subject.informedconsent',
+            screening_identifier=eligibility.screening_identifier)
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 1)
+        for onschedule in OnSchedule.objects.filter(
+                subject_identifier=consent.subject_identifier,
+                schedule_name='esr21_sub_enrol_schedule'):
+            onschedule.delete()
+        self.assertEqual(CohortCapacity.objects.get(name='esr21_sub').enrolled, 0)
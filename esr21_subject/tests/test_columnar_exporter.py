@@ -0,0 +1,56 @@
+import os
+import tempfile
+from importlib.util import find_spec
+from unittest import skipUnless
+
+from django.test import TestCase, tag
+
+from ..exports import ColumnarExporter, ColumnarExporterError
+from ..models import ChangelistDateBucket, VitalSigns
+
+
+@tag('columnar_exporter')
+@skipUnless(find_spec('pyarrow'), 'Columnar exports require pyarrow.')
+class TestColumnarExporter(TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for day in range(1, 4):
+            ChangelistDateBucket.objects.create(
+                model='esr21_subject.test', year=2021, month=1, day=day,
+                count=day)
+
+    def read(self, filename, file_format):
+        import pyarrow
+
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.read_table(filename)
+        return pyarrow.ipc.open_file(filename).read_all()
+
+    def test_round_trip(self):
+        queryset = ChangelistDateBucket.objects.order_by('day')
+        for file_format in ['parquet', 'arrow']:
+            exporter = ColumnarExporter(
+                model_cls=ChangelistDateBucket, batch_size=2,
+                file_format=file_format)
+            filename = os.path.join(self.path, f'buckets.{exporter.extension}')
+            self.assertEqual(exporter.write(filename, queryset=queryset), 3)
+            rows = sorted(
+                self.read(filename, file_format).to_pylist(),
+                key=lambda row: row['day'])
+            self.assertEqual(
+                [(row['id'], row['day'], row['count'], row['modified'])
+                 for row in rows],
+                [(str(obj.pk), obj.day, obj.count, obj.modified)
+                 for obj in queryset])
+
+    def test_crf_subject_identifier_column(self):
+        names = ColumnarExporter(model_cls=VitalSigns).schema.names
+        self.assertEqual(names.count('subject_identifier'), 1)
+        self.assertIn('subject_visit_id', names)
+
+    def test_invalid_format(self):
+        self.assertRaises(
+            ColumnarExporterError, ColumnarExporter,
+            model_cls=ChangelistDateBucket, file_format='csv')
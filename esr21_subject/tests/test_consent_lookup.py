@@ -0,0 +1,21 @@
+from django.test import TestCase, tag
+from django.test.client import RequestFactory
+
+from ..consent_lookup import ConsentLookup
+
+
+@tag('consent_lookup')
+class TestConsentLookup(TestCase):
+
+    def test_not_consented_is_not_cached(self):
+        consent_lookup = ConsentLookup(maxsize=10, ttl=60)
+        self.assertIsNone(consent_lookup.get('021-40990001-1'))
+        self.assertEqual(len(consent_lookup._cache), 0)
+
+    def test_memoized_on_request(self):
+        consent_lookup = ConsentLookup(maxsize=10, ttl=60)
+        request = RequestFactory().get('/')
+        request._consent_lookup = {('021-40990001-1', None): 'consent'}
+        self.assertEqual(
+            consent_lookup.get('021-40990001-1', request=request), 'consent')
+        self.assertEqual(len(consent_lookup._cache), 0)
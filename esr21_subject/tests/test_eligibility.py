@@ -1,6 +1,6 @@
 from django.test import TestCase, tag
 
-from ..models.eligibility import Eligibility
+from ..models.eligibility import BatchEligibility, Eligibility
 
 
 class TestEligibility(TestCase):
@@ -26,3 +26,18 @@ class TestEligibility(TestCase):
         eligiblity = Eligibility(age_in_years=61)
         self.assertFalse(eligiblity.is_eligible)
         self.assertIn('Participant is too old (>60)', eligiblity.error_message)
+
+    @tag('batch_eligibility')
+    def test_batch_eligibility(self):
+        """Batch evaluation matches Eligibility row for row.
+        """
+        ages_in_years = [31, 40, 61, 50]
+        received_vaccines = ['No', 'No', 'Yes', 'Yes']
+        batch = BatchEligibility(ages_in_years, received_vaccines)
+        for index, (age, received) in enumerate(
+                zip(ages_in_years, received_vaccines)):
+            eligibility = Eligibility(
+                age_in_years=age, received_vaccines=received)
+            self.assertEqual(batch.is_eligible[index], eligibility.is_eligible)
+            self.assertEqual(
+                batch.error_messages[index], eligibility.error_message)
@@ -0,0 +1,42 @@
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+from model_mommy import mommy
+
+from ..exports import ExportPlanner
+from ..models import AdverseEvent, InformedConsent
+
+
+@tag('export')
+class TestExportPlanner(TestCase):
+
+    def setUp(self):
+        import_holidays()
+
+        mommy.make_recipe(
+            'esr21_subject.eligibilityconfirmation',)
+
+        self.informed_consent = mommy.make_recipe(
+            'esr21_subject.informedconsent',
+            subject_identifier='123-9878')
+
+    def test_crf_select_related(self):
+        planner = ExportPlanner(AdverseEvent)
+        self.assertEqual(
+            planner.select_related, ['subject_visit__appointment'])
+
+    def test_consent_datetimes_single_query_per_chunk(self):
+        planner = ExportPlanner(InformedConsent)
+        subject_identifier = self.informed_consent.subject_identifier
+        with self.assertNumQueries(1):
+            objs = list(planner.iterator(
+                [self.informed_consent, self.informed_consent], chunk_size=2))
+            planner.load_consent_datetimes([subject_identifier])
+        self.assertEqual(len(objs), 2)
+        self.assertEqual(
+            planner.consent_datetimes,
+            {(subject_identifier, '1'): self.informed_consent.consent_datetime})
+
+    def test_consent_datetimes_of_other_subjects_not_loaded(self):
+        planner = ExportPlanner(InformedConsent)
+        planner.load_consent_datetimes(['123-0000'])
+        self.assertEqual(planner.consent_datetimes, {})
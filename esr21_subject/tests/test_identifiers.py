@@ -0,0 +1,71 @@
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, tag
+from edc_identifier.models import IdentifierModel
+
+from ..identifier_allocator import IdentifierAllocator
+from ..identifiers import ScreeningIdentifier
+from ..models import IdentifierSequence
+
+
+@tag('identifiers')
+class TestIdentifiers(TestCase):
+
+    def setUp(self):
+        self.device_id = django_apps.get_app_config('edc_device').device_id
+
+    def test_screening_identifiers_unique_and_recorded_alike(self):
+        identifiers = ScreeningIdentifier.make_many(50)
+        identifiers += [ScreeningIdentifier().identifier for _ in range(5)]
+        self.assertEqual(len(set(identifiers)), 55)
+        records = IdentifierModel.objects.filter(identifier__in=identifiers)
+        self.assertEqual(records.count(), 55)
+        self.assertEqual(
+            set(records.values_list('name', 'identifier_type', 'device_id')),
+            {(ScreeningIdentifier.identifier_type,
+              ScreeningIdentifier.identifier_type, self.device_id)})
+
+    def test_taken_sequence_numbers_are_skipped(self):
+        IdentifierModel.objects.create(
+            name='testidentifier', identifier='TEST-1', sequence_number=1,
+            device_id=self.device_id, site_id=None)
+        allocator = IdentifierAllocator(name='testidentifier', block_size=5)
+        self.assertNotIn(1, allocator.take(5, self.device_id))
+
+
+@tag('identifiers')
+class TestIdentifierAllocatorTransactions(TransactionTestCase):
+
+    def test_block_reserved_in_rolled_back_transaction_is_dropped(self):
+        allocator = IdentifierAllocator(name='testidentifier', block_size=5)
+        try:
+            with transaction.atomic():
+                allocator.next('99')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(allocator.blocks, {})
+
+    def test_block_reserved_in_committed_transaction_is_kept(self):
+        allocator = IdentifierAllocator(name='testidentifier', block_size=5)
+        with transaction.atomic():
+            value = allocator.next('99')
+        self.assertEqual(allocator.blocks.get(('99', None)),
+                         list(range(value + 1, value + 5)))
+
+    def test_block_reused_across_transactions(self):
+        allocator = IdentifierAllocator(name='testidentifier', block_size=5)
+        with transaction.atomic():
+            first = allocator.next('99')
+        with transaction.atomic():
+            second = allocator.next('99')
+        self.assertEqual(second, first + 1)
+        self.assertEqual(
+            IdentifierSequence.objects.get(
+                name='testidentifier', device_id='99').last_value, 5)
+
+    def test_values_kept_are_added_to_the_block(self):
+        allocator = IdentifierAllocator(name='testidentifier', block_size=5)
+        allocator.keep(('99', None), [1, 2])
+        allocator.keep(('99', None), [3])
+        self.assertEqual(allocator.take(3, '99'), [1, 2, 3])
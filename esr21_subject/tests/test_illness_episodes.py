@@ -0,0 +1,51 @@
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+
+from ..models import OffSchedule, OnScheduleIll
+from ..models.signals import get_illness_schedule_name
+
+
+@tag('illness_episodes')
+class TestIllnessEpisodes(TestCase):
+
+    subject_identifier = '021-40990001-1'
+
+    def setUp(self):
+        # bulk_create skips save(), leaving episode at its default as
+        # for rows saved before the column was added.
+        OnScheduleIll.objects.bulk_create([
+            OnScheduleIll(
+                subject_identifier=self.subject_identifier,
+                schedule_name='esr21_illness1_schedule',
+                onschedule_datetime=get_utcnow() - relativedelta(days=30)),
+            OnScheduleIll(
+                subject_identifier=self.subject_identifier,
+                schedule_name='esr21_illness2_schedule',
+                onschedule_datetime=get_utcnow() - relativedelta(days=10))])
+
+    def test_first_episode(self):
+        self.assertEqual(
+            get_illness_schedule_name('021-40990002-2'),
+            'esr21_illness1_schedule')
+
+    def test_existing_episode_is_read_from_schedule_name(self):
+        self.assertEqual(
+            get_illness_schedule_name(self.subject_identifier),
+            'esr21_illness2_schedule')
+
+    def test_next_episode_after_existing_episode_closed(self):
+        OffSchedule.objects.bulk_create([OffSchedule(
+            subject_identifier=self.subject_identifier,
+            schedule_name='esr21_illness2_schedule',
+            offschedule_datetime=get_utcnow())])
+        self.assertEqual(
+            get_illness_schedule_name(self.subject_identifier),
+            'esr21_illness3_schedule')
+
+    def test_backfill_illness_episodes(self):
+        call_command('backfill_illness_episodes')
+        self.assertEqual(
+            dict(OnScheduleIll.objects.values_list('schedule_name', 'episode')),
+            {'esr21_illness1_schedule': 1, 'esr21_illness2_schedule': 2})
@@ -0,0 +1,77 @@
+import csv
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, tag
+
+from ..exports import IncrementalExporter
+from ..models import ChangelistDateBucket, ExportWatermark
+
+
+@tag('incremental_exporter')
+class TestIncrementalExporter(TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.changed_filename = os.path.join(self.path, 'changed.csv')
+        self.deleted_filename = os.path.join(self.path, 'deleted.csv')
+
+    def get_exporter(self):
+        return IncrementalExporter(
+            model_cls=ChangelistDateBucket, consumer='test', lag_seconds=0)
+
+    def make_bucket(self, day):
+        return ChangelistDateBucket.objects.create(
+            model='esr21_subject.test', year=2021, month=1, day=day)
+
+    def export(self):
+        return self.get_exporter().export(
+            self.changed_filename, self.deleted_filename)
+
+    def get_exported_pks(self):
+        with open(self.changed_filename, newline='') as f:
+            return [row['id'] for row in csv.DictReader(f)]
+
+    def test_watermark_advances(self):
+        first = self.make_bucket(1)
+        self.assertEqual(self.export(), (1, 0))
+        self.assertEqual(self.get_exported_pks(), [str(first.pk)])
+        watermark = self.get_exporter().watermark
+
+        second = self.make_bucket(2)
+        self.assertEqual(self.export(), (1, 0))
+        self.assertEqual(self.get_exported_pks(), [str(second.pk)])
+        self.assertGreater(self.get_exporter().watermark, watermark)
+
+        self.assertEqual(self.export(), (0, 0))
+
+    def test_saved_row_exported_again(self):
+        bucket = self.make_bucket(1)
+        self.export()
+        bucket.count = 1
+        bucket.save()
+        self.assertEqual(self.export(), (1, 0))
+        self.assertEqual(self.get_exported_pks(), [str(bucket.pk)])
+
+    def test_failed_run_resumed_from_watermark(self):
+        self.make_bucket(1)
+        self.export()
+        watermark = self.get_exporter().watermark
+
+        bucket = self.make_bucket(2)
+        with mock.patch.object(
+                IncrementalExporter, 'deleted', side_effect=OSError):
+            self.assertRaises(OSError, self.export)
+        self.assertEqual(self.get_exporter().watermark, watermark)
+
+        self.assertEqual(self.export(), (1, 0))
+        self.assertEqual(self.get_exported_pks(), [str(bucket.pk)])
+
+    def test_reset(self):
+        self.make_bucket(1)
+        self.make_bucket(2)
+        self.export()
+        self.get_exporter().reset()
+        self.assertFalse(ExportWatermark.objects.filter(consumer='test').exists())
+        self.assertEqual(self.export(), (2, 0))
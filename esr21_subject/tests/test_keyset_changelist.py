@@ -0,0 +1,74 @@
+from django.core.management import call_command
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+
+from ..admin.keyset_changelist import KeysetChangeList
+from ..admin_site import esr21_subject_admin
+from ..models import ChangelistDateBucket, SubjectVisit
+from .helpers import make_subject_visit
+
+
+@tag('keyset_changelist')
+class TestKeysetChangeList(TestCase):
+
+    def setUp(self):
+        for day in range(1, 6):
+            ChangelistDateBucket.objects.create(
+                model='esr21_subject.test', year=2021, month=1, day=day)
+
+    def get_changelist(self, cursor=None):
+        changelist = KeysetChangeList.__new__(KeysetChangeList)
+        changelist.model = ChangelistDateBucket
+        changelist.model_admin = esr21_subject_admin._registry[SubjectVisit]
+        changelist.queryset = ChangelistDateBucket.objects.order_by(
+            '-modified', '-id')
+        changelist.list_per_page = 2
+        changelist.cursor = cursor
+        changelist.next_cursor = None
+        changelist.use_keyset = True
+        changelist.get_results(None)
+        return changelist
+
+    def test_pages_follow_cursor(self):
+        expected = list(ChangelistDateBucket.objects.order_by('-modified', '-id'))
+        pages = []
+        cursor = None
+        while True:
+            changelist = self.get_changelist(cursor=cursor)
+            pages.append(changelist.result_list)
+            cursor = changelist.next_cursor
+            if not cursor:
+                break
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual([obj for page in pages for obj in page], expected)
+
+    def test_malformed_cursor_shows_first_page(self):
+        first_page = self.get_changelist().result_list
+        for cursor in ['not-a-cursor', 'bm90LWEtZGF0ZXxub3QtYS1waw']:
+            changelist = self.get_changelist(cursor=cursor)
+            self.assertEqual(changelist.result_list, first_page)
+            self.assertIsNone(changelist.cursor)
+
+
+@tag('keyset_changelist')
+class TestChangelistDateBuckets(TestCase):
+
+    def get_counts(self):
+        return dict(ChangelistDateBucket.objects.filter(
+            model='esr21_subject.subjectvisit').values_list(
+                'day', 'count'))
+
+    def test_buckets_kept_by_signals(self):
+        import_holidays()
+        subject_visit = make_subject_visit()
+        subject_visit.save()
+        counts = self.get_counts()
+        self.assertEqual(sum(counts.values()), 1)
+        call_command('refresh_changelist_buckets')
+        self.assertEqual(self.get_counts(), counts)
+
+    def test_bucket_decremented_on_delete(self):
+        import_holidays()
+        subject_visit = make_subject_visit()
+        SubjectVisit.objects.filter(pk=subject_visit.pk).delete()
+        self.assertEqual(sum(self.get_counts().values()), 0)
@@ -0,0 +1,43 @@
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+from edc_metadata.constants import NOT_REQUIRED
+from edc_metadata.models import CrfMetadata
+
+from ..metadata_recompute import MetadataRecompute
+from .helpers import make_subject_visit
+
+
+@tag('mr')
+class TestMetadataRecompute(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        self.subject_identifier = make_subject_visit().subject_identifier
+
+    def get_metadata(self):
+        return dict(CrfMetadata.objects.filter(
+            subject_identifier=self.subject_identifier,
+            visit_code='1000',
+            visit_code_sequence=0).values_list('model', 'entry_status'))
+
+    def test_recompute_creates_metadata_as_saving_the_visit(self):
+        expected = self.get_metadata()
+        self.assertTrue(expected)
+        CrfMetadata.objects.filter(
+            subject_identifier=self.subject_identifier).delete()
+
+        result = MetadataRecompute(workers=1).recompute([self.subject_identifier])
+
+        self.assertEqual(result.get('created'), len(expected))
+        self.assertEqual(self.get_metadata(), expected)
+
+    def test_recompute_reapplies_rules_as_saving_the_visit(self):
+        expected = self.get_metadata()
+        CrfMetadata.objects.filter(
+            subject_identifier=self.subject_identifier,
+            model='esr21_subject.pregnancytest').update(entry_status=NOT_REQUIRED)
+
+        result = MetadataRecompute(workers=1).recompute([self.subject_identifier])
+
+        self.assertEqual(result.get('updated'), 1)
+        self.assertEqual(self.get_metadata(), expected)
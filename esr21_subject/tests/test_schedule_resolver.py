@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+from ..scheduling import ScheduleResolver, ScheduleResolverError
+
+
+class DummySite:
+
+    def __init__(self):
+        self.registered = []
+
+    def register(self, visit_schedule):
+        self.registered.append(visit_schedule)
+
+
+@tag('schedule_resolver')
+class TestScheduleResolver(TestCase):
+
+    def setUp(self):
+        self.resolver = ScheduleResolver()
+        self.visit_schedule = list(site_visit_schedules.registry.values())[0]
+        self.schedule = list(self.visit_schedule.schedules.values())[0]
+
+    def get(self):
+        return self.resolver.get(
+            onschedule_model=self.schedule.onschedule_model,
+            schedule_name=self.schedule.name)
+
+    def test_get(self):
+        self.assertEqual(self.get(), (
+            self.visit_schedule, self.schedule,
+            django_apps.get_model(self.schedule.onschedule_model)))
+
+    def test_index_built_once(self):
+        with mock.patch.object(
+                self.resolver, 'build', wraps=self.resolver.build) as build:
+            self.get()
+            self.get()
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(self.resolver.stats.get('hits'), 2)
+
+    def test_unknown_schedule(self):
+        self.assertRaises(
+            ScheduleResolverError, self.resolver.get,
+            onschedule_model=self.schedule.onschedule_model,
+            schedule_name='unknown_schedule')
+        self.assertEqual(self.resolver.stats.get('misses'), 1)
+
+    def test_register_invalidates(self):
+        site = DummySite()
+        self.resolver.connect(site)
+        self.get()
+        with mock.patch.object(
+                self.resolver, 'build', wraps=self.resolver.build) as build:
+            site.register(self.visit_schedule)
+            self.get()
+            self.get()
+        self.assertEqual(site.registered, [self.visit_schedule])
+        self.assertEqual(build.call_count, 1)
+
+    def test_invalidate(self):
+        self.get()
+        self.resolver.invalidate()
+        self.assertEqual(self.resolver.stats.get('size'), 0)
+        self.get()
+        self.assertGreater(self.resolver.stats.get('size'), 0)
+
+    def test_site_visit_schedules_connected(self):
+        self.assertEqual(
+            site_visit_schedules.register.__name__, 'register_and_invalidate')
@@ -27,6 +27,9 @@ setup(
         'django-cors-headers',
         'django-rest-framework'
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+    },
     classifiers=[
         'Environment :: Web Environment',
         'Framework :: Django',